@@ -27,7 +27,43 @@ resource "aws_codebuild_project" "validation" {
     environment_variable {
       name  = "INFERENCE_PROFILE"
       value = jsonencode(var.bedrock_model_id)
-    }    
+    }
+    environment_variable {
+      name  = "MAX_WORKERS"
+      value = tostring(var.processor_max_workers)
+    }
+    environment_variable {
+      name  = "RUN_TIME_BUDGET"
+      value = tostring(var.processor_time_budget)
+    }
+    environment_variable {
+      name  = "CALL_TIMEOUT"
+      value = tostring(var.processor_call_timeout)
+    }
+    environment_variable {
+      name  = "VALIDATION_CACHE"
+      value = var.enable_validation_cache ? "s3" : "off"
+    }
+    environment_variable {
+      name  = "VALIDATION_CACHE_BUCKET"
+      value = aws_s3_bucket.artifacts.id
+    }
+    environment_variable {
+      name  = "VALIDATION_CACHE_TTL"
+      value = tostring(var.validation_cache_ttl)
+    }
+    environment_variable {
+      name  = "BUILD_MANIFEST"
+      value = var.enable_incremental_build ? "s3" : "off"
+    }
+    environment_variable {
+      name  = "BUILD_MANIFEST_BUCKET"
+      value = aws_s3_bucket.artifacts.id
+    }
+    environment_variable {
+      name  = "CAPACITY_CHECK"
+      value = var.enable_capacity_check ? "on" : "off"
+    }
   }
 
 
@@ -61,10 +97,8 @@ resource "aws_codebuild_project" "validation" {
           commands = var.enable_bedrock ? [
             "echo '[INFO] Starting build phase'",
             "cd terraform/",
-            "chmod +x ../scp-policy-processor/main.py",
-            "python3 ../scp-policy-processor/main.py",
-            "chmod +x ../rcp-policy-processor/main.py",
-            "python3 ../rcp-policy-processor/main.py",
+            "chmod +x ../policy-processor/main.py",
+            "python3 ../policy-processor/main.py",
             "terraform init -backend-config='bucket=${aws_s3_bucket.tfstate.id}' -backend-config='key=${var.project_name}.tfstate' -backend-config='region=${data.aws_region.current.region}'",
             "terraform plan | tee tf.log",
             "python3 ../bedrock-prompt/prompt.py",
@@ -73,10 +107,8 @@ resource "aws_codebuild_project" "validation" {
             ] : [
             "echo '[INFO] Starting build phase'",
             "cd terraform/",
-            "chmod +x ../scp-policy-processor/main.py",
-            "python3 ../scp-policy-processor/main.py",
-            "chmod +x ../rcp-policy-processor/main.py",
-            "python3 ../rcp-policy-processor/main.py",
+            "chmod +x ../policy-processor/main.py",
+            "python3 ../policy-processor/main.py",
             "terraform init -backend-config='bucket=${aws_s3_bucket.tfstate.id}' -backend-config='key=${var.project_name}.tfstate' -backend-config='region=${data.aws_region.current.region}'",
             "terraform plan | tee tf.log",
             "SUMMARY=$(echo 'You have new SCP/RCP changes to approve. See ValidationPlan logs for more details.')",
@@ -148,6 +148,25 @@ resource "aws_iam_role_policy" "codebuild_policy_plan" {
         ]
         Resource = aws_kms_key.pipeline_key.arn
       },
+      {
+        Effect = "Allow"
+        Action = [
+          "s3:ListBucket"
+        ]
+        Resource = aws_s3_bucket.artifacts.arn
+        Condition = {
+          StringLike = {
+            "s3:prefix" = ["cache/*", "manifest/*"]
+          }
+        }
+      },
+      {
+        Effect = "Allow"
+        Action = [
+          "s3:DeleteObject"
+        ]
+        Resource = "${aws_s3_bucket.artifacts.arn}/cache/*"
+      },
       {
         Effect = "Allow"
         Action = [
@@ -163,6 +182,7 @@ resource "aws_iam_role_policy" "codebuild_policy_plan" {
           "Organizations:DescribePolicy",
           "Organizations:ListTagsForResource",
           "Organizations:ListTargetsForPolicy",
+          "Organizations:ListPoliciesForTarget",
           "Bedrock:InvokeModel",
           "Bedrock:InvokeModelWithResponseStream"
         ]
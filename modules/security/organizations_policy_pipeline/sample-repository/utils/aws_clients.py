@@ -0,0 +1,95 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import os
+import threading
+import time
+
+import boto3
+from botocore.config import Config
+
+# Retries to handle throttling, shared by every client of the utils scripts
+RETRIES = {'max_attempts': 1000, 'mode': 'adaptive'}
+
+# Requests per second shared by every thread of a script, per service, overridden
+# with RATE_LIMIT_<SERVICE> (e.g. RATE_LIMIT_ORGANIZATIONS=20). 0 disables the limit.
+DEFAULT_RATES = {'organizations': 10.0}
+
+_session = None
+_clients = {}
+_limiters = {}
+_call_count = 0
+_pool_size = 10
+_lock = threading.Lock()
+
+
+class RateLimiter:
+    """Token bucket shared by every client and thread calling one service"""
+
+    def __init__(self, rate):
+        self.rate = float(rate)
+        self.burst = max(1.0, self.rate)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, **kwargs):
+        """Block until a request can be sent, registered on the botocore before-send event"""
+        if not self.rate:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def get_limiter(service):
+    """Return the process-wide rate limiter of a service, must be called with _lock held"""
+    if service not in _limiters:
+        rate = os.getenv(f'RATE_LIMIT_{service.upper()}', DEFAULT_RATES.get(service, 0))
+        _limiters[service] = RateLimiter(rate)
+    return _limiters[service]
+
+
+def _count_call(**kwargs):
+    global _call_count
+    with _lock:
+        _call_count += 1
+
+
+def call_count():
+    """Number of API calls (pages included, retries excluded) made by the clients of this module"""
+    with _lock:
+        return _call_count
+
+
+def configure(pool_size):
+    """Size the connection pools for the concurrency of the calling script, before any client is created"""
+    global _pool_size
+    with _lock:
+        _pool_size = max(10, pool_size)
+
+
+def get_client(service, region_name=None):
+    """Return the shared client of a service, created once from a single session"""
+    global _session
+    with _lock:
+        if _session is None:
+            _session = boto3.Session()
+        key = (service, region_name)
+        if key not in _clients:
+            _clients[key] = _session.client(
+                service,
+                region_name=region_name,
+                config=Config(retries=RETRIES, max_pool_connections=_pool_size)
+            )
+            # Every attempt, retries included, waits for the shared rate limit
+            _clients[key].meta.events.register('before-send', get_limiter(service).acquire)
+            _clients[key].meta.events.register('before-call', _count_call)
+        return _clients[key]
@@ -2,7 +2,7 @@
 # SPDX-License-Identifier: MIT-0
 
 import json
-import boto3
+from org_snapshot import OrgSnapshot
 import sys
 import argparse
 
@@ -18,54 +18,74 @@ def load_environments(file_path):
         print(f"Error: File {file_path} is not valid JSON")
         sys.exit(1)
 
-def get_policy_targets(policy_name, policy_type):
+def get_policy_targets(policy_name, policy_type, snapshot):
     """Get all targets for a specific SCP"""
     print(f"\nGetting targets for SCP: {policy_name}")
-    client = boto3.client('organizations')
-    targets = []
+
+    if policy_type not in ('scp', 'rcp'):
+        print("Policy type não suportado")
+        exit()
 
     try:
-        # First, find the policy ID
-        paginator = client.get_paginator('list_policies')
-        policy_id = None
-        
-        temp_policy = ""
-        if policy_type == 'scp':
-            temp_policy = "SERVICE_CONTROL_POLICY"
-        elif policy_type == 'rcp':
-            temp_policy = "RESOURCE_CONTROL_POLICY"
-        else:
-            print("Policy type não suportado")
-            exit()        
-            
-        for page in paginator.paginate(Filter=temp_policy):
-            for policy in page['Policies']:
-                if policy['Name'] == policy_name:
-                    policy_id = policy['Id']
-                    break
-            if policy_id:
-                break
+        policy_id = snapshot.find_policy(policy_type, policy_name)
 
         if not policy_id:
             print(f"Error: SCP '{policy_name}' not found")
             sys.exit(1)
 
-        # Get all targets for the policy
-        paginator_targets = client.get_paginator('list_targets_for_policy')
-        for page in paginator_targets.paginate(PolicyId=policy_id):
-            for target in page['Targets']:
-                targets.append(target['TargetId'])
+        # Get all targets for the policy, as a set for membership checks
+        targets = {target_id for target_id, _ in snapshot.policy_targets(policy_type, policy_id)}
         
         print(f"Found {len(targets)} targets for SCP {policy_name}")
         return targets
 
-    except client.exceptions.PolicyNotFoundException:
-        print(f"Error: SCP '{policy_name}' not found")
-        sys.exit(1)
     except Exception as e:
         print(f"Error getting SCP targets: {str(e)}")
         sys.exit(1)
 
+def find_missing_targets(env, policy_targets):
+    """Environment targets (Name:ID) whose ID is not in the policy_targets set"""
+    return [target for target in env['Target'] if target.split(':')[1] not in policy_targets]
+
+def check_all_coverage(environments, policy_type, snapshot, output_file):
+    """Check every (policy, environment) pair in one pass and write the coverage matrix"""
+    if policy_type not in ('scp', 'rcp'):
+        print("Policy type não suportado")
+        exit()
+
+    # Load every attachment once, then index the targets of each policy as a set
+    snapshot.load_targets(policy_type)
+    policy_targets = {
+        policy['Name']: {target_id for target_id, _ in policy['Targets']}
+        for policy in snapshot.policies(policy_type).values()
+    }
+    print(f"Checking {len(policy_targets)} policies against {len(environments)} environments...")
+
+    matrix = {}
+    fully_covered = 0
+    for policy_name, targets in sorted(policy_targets.items()):
+        row = {}
+        for env in environments:
+            missing_targets = find_missing_targets(env, targets)
+            row[env['ID']] = {
+                'Covered': len(env['Target']) - len(missing_targets),
+                'Total': len(env['Target']),
+                'Missing': missing_targets
+            }
+            if not missing_targets:
+                fully_covered += 1
+        matrix[policy_name] = row
+
+    with open(output_file, 'w') as f:
+        json.dump({
+            'PolicyType': policy_type,
+            'Environments': [env['ID'] for env in environments],
+            'Policies': matrix
+        }, f, indent=2)
+
+    print(f"{fully_covered} of {len(matrix) * len(environments)} (policy, environment) pairs are fully covered")
+    print(f"Coverage matrix written to {output_file}")
+
 def check_policy_coverage(environments, policy_targets, env_id):
     env = None
     for environment in environments:
@@ -79,18 +99,10 @@ def check_policy_coverage(environments, policy_targets, env_id):
 
     print(f"\nChecking targets for environment: {env_id}")
     
-    # Extract target IDs from the environment
-    env_targets = []
-    missing_targets = []
-    
-    for target in env['Target']:
-        target_id = target.split(':')[1]  # Get the ID part after the colon
-        env_targets.append(target_id)
-        if target_id not in policy_targets:
-            missing_targets.append(target)
+    missing_targets = find_missing_targets(env, policy_targets)
 
     # Results
-    total_targets = len(env_targets)
+    total_targets = len(env['Target'])
     covered_targets = total_targets - len(missing_targets)
     
     print("\nResults:")
@@ -110,16 +122,26 @@ def main():
     # Set up argument parser
     parser = argparse.ArgumentParser(description='Check SCP coverage for environment targets')
     parser.add_argument('--policy-type', required=True, help='Type of the policy to check')
-    parser.add_argument('--policy-name', required=True, help='Name of the policy to check')
-    parser.add_argument('--env-id', required=True, help='Environment ID to check')
+    parser.add_argument('--policy-name', help='Name of the policy to check')
+    parser.add_argument('--env-id', help='Environment ID to check')
+    parser.add_argument('--all', action='store_true', dest='all_pairs',
+                        help='Check every policy against every environment and write coverage-<type>-matrix.json')
+    parser.add_argument('--refresh-snapshot', action='store_true', help='Crawl the organization again instead of reusing the snapshot')
     
     args = parser.parse_args()
+    if not args.all_pairs and (args.policy_name is None or args.env_id is None):
+        parser.error('--policy-name and --env-id are required unless --all is set')
 
     # Load environments from file
     environments = load_environments("../environments/environments.json")
 
+    snapshot = OrgSnapshot(refresh=args.refresh_snapshot)
+    if args.all_pairs:
+        check_all_coverage(environments, args.policy_type, snapshot, f"coverage-{args.policy_type}-matrix.json")
+        sys.exit(0)
+
     # Get SCP targets
-    policy_targets = get_policy_targets(args.policy_name, args.policy_type)
+    policy_targets = get_policy_targets(args.policy_name, args.policy_type, snapshot)
 
     # Check coverage
     is_fully_covered = check_policy_coverage(environments, policy_targets, args.env_id)
@@ -1,119 +1,94 @@
 # Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 # SPDX-License-Identifier: MIT-0
 
-import boto3
+from org_snapshot import OrgSnapshot
 import json
 import argparse
 import sys 
 
 parser = argparse.ArgumentParser(description='AWS Organization environments creation')
 parser.add_argument('--policy-type', action="store", dest='policy_type')
+parser.add_argument('--refresh-snapshot', action='store_true', help='Crawl the organization again instead of reusing the snapshot')
+parser.add_argument('--max-workers', type=int, default=8, help='Concurrent Organizations calls while crawling (rate limited by RATE_LIMIT_ORGANIZATIONS)')
+parser.add_argument('--plan', choices=['auto', 'policy', 'target'], default='auto',
+                    help='List attachments policy by policy, target by target, or whichever is estimated cheaper')
 args = parser.parse_args()
 
 
-def get_all_accounts():
-    print("Getting all AWS accounts...")
-    accounts = {}
-    client = boto3.client('organizations')
-    paginator = client.get_paginator('list_accounts')
-    
-    account_count = 0
-    for page in paginator.paginate():
-        for account in page['Accounts']:
-            accounts[account['Id']] = account['Name']
-            account_count += 1
-    
-    print(f"Found {account_count} accounts in the organization")
-    return accounts
+def is_excluded(policy_name):
+    return (policy_name.startswith('aws-guardrails-') or 
+            policy_name == 'FullAWSAccess' or 
+            policy_name == 'RCPFullAWSAccess' or 
+            policy_name.startswith('AWSControlTower-Controls'))
 
-def get_ou_details():
-    print("Getting all Organizational Units...")
-    ous = {}
-    client = boto3.client('organizations')
-    
-    roots = client.list_roots()['Roots']
-    root_id = roots[0]['Id']
-    
-    def get_child_ous(parent_id):
-        paginator = client.get_paginator('list_organizational_units_for_parent')
-        try:
-            for page in paginator.paginate(ParentId=parent_id):
-                for ou in page['OrganizationalUnits']:
-                    ous[ou['Id']] = ou['Name']
-                    get_child_ous(ou['Id'])
-        except client.exceptions.ParentNotFoundException:
-            pass
-    
-    get_child_ous(root_id)
-    print(f"Found {len(ous)} Organizational Units")
-    return ous
+def print_plan(plan):
+    if plan['direction'] == 'snapshot':
+        print("Policy targets loaded from the snapshot, no API calls made")
+        return
+    estimate = {direction: 'n/a' if calls is None else calls for direction, calls in plan['estimate'].items()}
+    direction = 'policy -> targets' if plan['direction'] == 'policy' else 'target -> policies'
+    print(f"Listed targets of {plan['policies']} policies {direction}")
+    print(f"Estimated calls: {estimate['policy']} policy -> targets, {estimate['target']} target -> policies")
+    print(f"API calls made: {plan['calls']} (estimate {estimate[plan['direction']]})")
 
-def get_scp_targets():
+def get_scp_targets(snapshot):
     print("Getting Service Control Policies...")
-    client = boto3.client('organizations')
     result = []
     
-    accounts = get_all_accounts()
-    ous = get_ou_details()
-    
-    paginator = client.get_paginator('list_policies')
+    accounts = snapshot.account_names()
+    print(f"Found {len(accounts)} accounts in the organization")
+    ous = snapshot.ou_names()
+    print(f"Found {len(ous)} Organizational Units")
     
     policy_count = 0
     skipped_count = 0
     processed_count = 0
 
-    policy_type = ""
-    if args.policy_type == 'scp':
-        policy_type = "SERVICE_CONTROL_POLICY"
-    elif args.policy_type == 'rcp':
-        policy_type = "RESOURCE_CONTROL_POLICY"
-    else:
+    if args.policy_type not in ('scp', 'rcp'):
         print("Policy type não suportado")
         exit()
     
-    for page in paginator.paginate(Filter=policy_type):
-        for policy in page['Policies']:
-            policy_count += 1
-            print(f"\nProcessing {args.policy_type}: {policy['Name']}")
-            
-            if (policy['Name'].startswith('aws-guardrails-') or 
-                policy['Name'] == 'FullAWSAccess' or 
-                policy['Name'] == 'RCPFullAWSAccess' or 
-                policy['Name'].startswith('AWSControlTower-Controls')):
-                print(f"Skipping excluded policy: {policy['Name']}")
-                skipped_count += 1
-                continue
-                
-            targets = []
+    # Only the attachments of the policies written to the output are needed
+    policies = snapshot.policies(args.policy_type)
+    print(f"Found {len(policies)} {args.policy_type}s, planning how to list their targets...")
+    plan = snapshot.load_targets(
+        args.policy_type,
+        [policy_id for policy_id, policy in policies.items() if not is_excluded(policy['Name'])],
+        args.plan
+    )
+    print_plan(plan)
+    
+    for policy in policies.values():
+        policy_count += 1
+        print(f"\nProcessing {args.policy_type}: {policy['Name']}")
+        
+        if is_excluded(policy['Name']):
+            print(f"Skipping excluded policy: {policy['Name']}")
+            skipped_count += 1
+            continue
             
-            try:
-                paginator_targets = client.get_paginator('list_targets_for_policy')
-                target_count = 0
-                for target_page in paginator_targets.paginate(PolicyId=policy['Id']):
-                    for target in target_page['Targets']:
-                        if target['Type'] == 'ACCOUNT':
-                            if target['TargetId'] in accounts:
-                                targets.append(f"{accounts[target['TargetId']]}:{target['TargetId']}")
-                                target_count += 1
-                        elif target['Type'] == 'ORGANIZATIONAL_UNIT':
-                            if target['TargetId'] in ous:
-                                targets.append(f"{ous[target['TargetId']]}:{target['TargetId']}")
-                                target_count += 1
-                
-                print(f"Found {target_count} targets for policy {policy['Name']}")
-                
-                if targets:  # Only add policies that have targets
-                    result.append({
-                        "ID": policy['Name'],
-                        "Target": targets
-                    })
-                    processed_count += 1
-                else:
-                    print(f"No targets found for policy {policy['Name']}")
-                    
-            except client.exceptions.PolicyNotFoundException:
-                print(f"Policy {policy['Name']} not found")
-                continue
+        targets = []
+        target_count = 0
+        for target_id, target_type in snapshot.organization_order(policy['Targets']):
+            if target_type == 'ACCOUNT':
+                if target_id in accounts:
+                    targets.append(f"{accounts[target_id]}:{target_id}")
+                    target_count += 1
+            elif target_type == 'ORGANIZATIONAL_UNIT':
+                if target_id in ous:
+                    targets.append(f"{ous[target_id]}:{target_id}")
+                    target_count += 1
+        
+        print(f"Found {target_count} targets for policy {policy['Name']}")
+        
+        if targets:  # Only add policies that have targets
+            result.append({
+                "ID": policy['Name'],
+                "Target": targets
+            })
+            processed_count += 1
+        else:
+            print(f"No targets found for policy {policy['Name']}")
     
     print("\nSummary:")
     print(f"Total {args.policy_type}s found: {policy_count}")
@@ -132,7 +107,8 @@ def main():
     try:
         print("Starting {args.policy_type} target analysis...")
         
-        scp_data = get_scp_targets()
+        snapshot = OrgSnapshot(max_workers=args.max_workers, refresh=args.refresh_snapshot)
+        scp_data = get_scp_targets(snapshot)
         
         output_file = f'environments-{args.policy_type}-based.json'
         print(f"\nWriting results to {output_file}...")
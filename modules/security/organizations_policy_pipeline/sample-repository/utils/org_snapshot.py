@@ -0,0 +1,452 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+# On-disk snapshot of the organization shared by the utils scripts and the policy
+# processor (ORG_SNAPSHOT_FILE). The file holds independent sections, each with
+# the time it was crawled, so a tool only crawls what is missing or expired:
+#
+#   {"version": 1, "sections": {
+#       "accounts": {"created": 1700000000.0, "data": {"<account id>": {"Name": ..., "Status": ...}}},
+#       "tags": {"created": ..., "data": {"<account id>": {"<key>": "<value>"}}},
+#       "ous": {"created": ..., "data": {"roots": {"<root id>": "Root"},
+#                                        "units": {"<ou id>": {"Name": ..., "ParentId": ...}}}},
+#       "policies:scp": {"created": ..., "data": {"<policy id>": {"Name": ..., "AwsManaged": ...,
+#                                                                "Targets": [["<target id>", "ACCOUNT"], ...]}}},
+#       "policies:rcp": {...},
+#       "target-policies:scp": {"created": ..., "data": {"<target id>": {"created": ...,
+#                                                                       "Policies": ["<policy id>", ...]}}}}}
+#
+# "Targets" is null until the targets of the policy are loaded. "target-policies"
+# memoizes targets queried one by one; each entry expires on its own, and
+# "Policies" is null for targets not in the organization.
+
+import concurrent.futures
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+
+import aws_clients
+from aws_clients import get_client
+
+SNAPSHOT_VERSION = 1
+DEFAULT_PATH = os.path.expanduser('~/.cache/org-policy-pipeline/org-snapshot.json')
+DEFAULT_TTL = 3600
+
+POLICY_TYPES = {'scp': 'SERVICE_CONTROL_POLICY', 'rcp': 'RESOURCE_CONTROL_POLICY'}
+
+# Largest page of the Organizations list calls
+PAGE_SIZE = 20
+
+# Policies of one type that can be attached directly to a root, OU or account
+POLICIES_PER_TARGET = 5
+
+# AWS managed policies attached to every root, OU and account
+FULL_ACCESS_POLICIES = ('FullAWSAccess', 'RCPFullAWSAccess')
+
+
+def target_type(target_id):
+    """Type of a root, OU or account from the prefix of its ID"""
+    if target_id.startswith('r-'):
+        return 'ROOT'
+    if target_id.startswith('ou-'):
+        return 'ORGANIZATIONAL_UNIT'
+    return 'ACCOUNT'
+
+
+def empty_snapshot():
+    return {'version': SNAPSHOT_VERSION, 'sections': {}}
+
+
+def load(path):
+    """Read a snapshot file, or return an empty snapshot when it is missing, unreadable or of another version"""
+    try:
+        with open(path, 'r') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return empty_snapshot()
+    if data.get('version') != SNAPSHOT_VERSION:
+        return empty_snapshot()
+    return data
+
+
+def save(path, snapshot):
+    """Write the snapshot atomically, so concurrent readers never see a partial file"""
+    folder = os.path.dirname(os.path.abspath(path))
+    os.makedirs(folder, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=folder, prefix='.org-snapshot-')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(snapshot, f, separators=(',', ':'))
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+class OrgSnapshot:
+    """Accounts, OUs, tags, policies and attachments of the organization, cached on disk with a TTL.
+    Each section is crawled on first use when it is missing, expired or refresh is set."""
+
+    def __init__(self, path=None, ttl=None, max_workers=8, refresh=False):
+        self.path = path or os.getenv('ORG_SNAPSHOT_FILE', DEFAULT_PATH)
+        self.ttl = int(os.getenv('ORG_SNAPSHOT_TTL', DEFAULT_TTL)) if ttl is None else ttl
+        self.max_workers = max(1, max_workers)
+        self.refresh = refresh
+        self._snapshot = load(self.path)
+        self._refreshed = set()
+        self._started = time.time()
+        self._lock = threading.RLock()
+        self._policies_by_target = {}
+        aws_clients.configure(self.max_workers)
+
+    def _map(self, fn, items):
+        """Apply fn to items with a bounded thread pool, keeping the order of items"""
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return list(executor.map(fn, items))
+
+    def _is_fresh(self, name):
+        section = self._snapshot['sections'].get(name)
+        if section is None:
+            return False
+        if self.refresh and name not in self._refreshed:
+            return False
+        return time.time() - section['created'] <= self.ttl
+
+    def _section(self, name, crawl):
+        with self._lock:
+            if not self._is_fresh(name):
+                print(f"Crawling {name} from AWS Organizations...")
+                started = time.time()
+                data = crawl()
+                self._snapshot['sections'][name] = {'created': started, 'data': data}
+                self._refreshed.add(name)
+                save(self.path, self._snapshot)
+            return self._snapshot['sections'][name]['data']
+
+    def age(self, name):
+        """Seconds since a section was crawled, None when it is not in the snapshot"""
+        section = self._snapshot['sections'].get(name)
+        return None if section is None else time.time() - section['created']
+
+    # Crawlers
+
+    def _crawl_accounts(self):
+        accounts = {}
+        paginator = get_client('organizations').get_paginator('list_accounts')
+        for page in paginator.paginate():
+            for account in page['Accounts']:
+                accounts[account['Id']] = {'Name': account['Name'], 'Status': account.get('Status')}
+        return accounts
+
+    def _crawl_tags(self):
+        def list_tags(account_id):
+            tags = {}
+            paginator = get_client('organizations').get_paginator('list_tags_for_resource')
+            for page in paginator.paginate(ResourceId=account_id):
+                for tag in page['Tags']:
+                    tags[tag['Key']] = tag['Value']
+            return tags
+
+        account_ids = list(self.accounts())
+        return dict(zip(account_ids, self._map(list_tags, account_ids)))
+
+    def _crawl_ous(self):
+        client = get_client('organizations')
+        roots = {root['Id']: root['Name'] for root in client.list_roots()['Roots']}
+
+        def list_children(parent_id):
+            children = []
+            paginator = client.get_paginator('list_organizational_units_for_parent')
+            try:
+                for page in paginator.paginate(ParentId=parent_id):
+                    children.extend(page['OrganizationalUnits'])
+            except client.exceptions.ParentNotFoundException:
+                pass
+            return parent_id, children
+
+        # Every OU is listed as soon as its parent is known, so the crawl is
+        # as deep as the tree but as wide as the worker pool
+        children_by_parent = {}
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            pending = {executor.submit(list_children, root_id) for root_id in roots}
+            while pending:
+                done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    parent_id, children = future.result()
+                    children_by_parent[parent_id] = children
+                    pending |= {executor.submit(list_children, ou['Id']) for ou in children}
+
+        # Same depth-first order as a sequential walk, whatever order the calls completed in
+        units = {}
+
+        def visit(parent_id):
+            for ou in children_by_parent.get(parent_id, []):
+                units[ou['Id']] = {'Name': ou['Name'], 'ParentId': parent_id}
+                visit(ou['Id'])
+
+        for root_id in roots:
+            visit(root_id)
+        return {'roots': roots, 'units': units}
+
+    def _crawl_policies(self, policy_type):
+        """List the policies only, their targets are loaded on demand by load_targets"""
+        policies = {}
+        paginator = get_client('organizations').get_paginator('list_policies')
+        for page in paginator.paginate(Filter=POLICY_TYPES[policy_type]):
+            for policy in page['Policies']:
+                policies[policy['Id']] = {
+                    'Name': policy['Name'],
+                    'AwsManaged': policy.get('AwsManaged', False),
+                    'Targets': None
+                }
+        return policies
+
+    def _list_targets_by_policy(self, policy_type, policy_ids):
+        """One list_targets_for_policy listing per policy"""
+        client = get_client('organizations')
+
+        def list_targets(policy_id):
+            targets = []
+            paginator_targets = client.get_paginator('list_targets_for_policy')
+            try:
+                for target_page in paginator_targets.paginate(
+                    PolicyId=policy_id, PaginationConfig={'PageSize': PAGE_SIZE}
+                ):
+                    for target in target_page['Targets']:
+                        targets.append([target['TargetId'], target['Type']])
+            except client.exceptions.PolicyNotFoundException:
+                pass
+            return targets
+
+        policies = self.policies(policy_type)
+        for policy_id, targets in zip(policy_ids, self._map(list_targets, policy_ids)):
+            policies[policy_id]['Targets'] = targets
+
+    def _list_policies_for_target(self, policy_type, target_id):
+        """IDs of the policies attached to target_id, every page of them, None when the target does not exist"""
+        client = get_client('organizations')
+        policy_ids = []
+        paginator = client.get_paginator('list_policies_for_target')
+        try:
+            for page in paginator.paginate(
+                TargetId=target_id,
+                Filter=POLICY_TYPES[policy_type],
+                PaginationConfig={'PageSize': PAGE_SIZE}
+            ):
+                policy_ids.extend(policy['Id'] for policy in page['Policies'])
+        except client.exceptions.TargetNotFoundException:
+            return None
+        return policy_ids
+
+    def _list_targets_by_target(self, policy_type):
+        """One list_policies_for_target listing per root, OU and account, which fills every policy"""
+        targets = self.targets()
+        policies = self.policies(policy_type)
+        for policy in policies.values():
+            policy['Targets'] = []
+        target_ids = [target_id for target_id, _ in targets]
+        listed = self._map(lambda target_id: self._list_policies_for_target(policy_type, target_id), target_ids)
+        for target, policy_ids in zip(targets, listed):
+            for policy_id in policy_ids or []:
+                if policy_id in policies:
+                    policies[policy_id]['Targets'].append(target)
+
+    # Queries
+
+    def accounts(self):
+        """Return {account_id: {'Name': ..., 'Status': ...}}"""
+        return self._section('accounts', self._crawl_accounts)
+
+    def account_names(self):
+        return {account_id: account['Name'] for account_id, account in self.accounts().items()}
+
+    def ou_names(self):
+        """Return {ou_id: name} for every OU below the roots"""
+        return {ou_id: ou['Name'] for ou_id, ou in self._section('ous', self._crawl_ous)['units'].items()}
+
+    def roots(self):
+        return self._section('ous', self._crawl_ous)['roots']
+
+    def target_name(self, target_id):
+        """Name of an account, OU or root, None when the target is not in the organization"""
+        if target_id.startswith('ou-'):
+            return self.ou_names().get(target_id)
+        if target_id.startswith('r-'):
+            return self.roots().get(target_id)
+        account = self.accounts().get(target_id)
+        return account['Name'] if account else None
+
+    def _describe_target(self, target_id):
+        """Name of one account, OU or root read from Organizations, None when it does not exist"""
+        client = get_client('organizations')
+        kind = target_type(target_id)
+        try:
+            if kind == 'ACCOUNT':
+                return client.describe_account(AccountId=target_id)['Account']['Name']
+            if kind == 'ORGANIZATIONAL_UNIT':
+                return client.describe_organizational_unit(OrganizationalUnitId=target_id)['OrganizationalUnit']['Name']
+        except (client.exceptions.AccountNotFoundException, client.exceptions.OrganizationalUnitNotFoundException):
+            return None
+        roots = {root['Id']: root['Name'] for root in client.list_roots()['Roots']}
+        return roots.get(target_id)
+
+    def target_names(self, target_ids):
+        """Return {target_id: name} for the distinct target_ids, None for targets not in the
+        organization. The crawled accounts and OUs are used when they are fresh; otherwise
+        each target is described on its own, so naming a few targets never crawls the organization."""
+        target_ids = list(dict.fromkeys(target_ids))
+        if self._is_fresh('accounts') and self._is_fresh('ous'):
+            return {target_id: self.target_name(target_id) for target_id in target_ids}
+        return dict(zip(target_ids, self._map(self._describe_target, target_ids)))
+
+    def tags(self, account_id):
+        return self._section('tags', self._crawl_tags).get(account_id, {})
+
+    def accounts_with_tag(self, tag_key, tag_value):
+        return [
+            account_id
+            for account_id, tags in self._section('tags', self._crawl_tags).items()
+            if tags.get(tag_key) == tag_value
+        ]
+
+    def policies(self, policy_type):
+        """Return {policy_id: {'Name': ..., 'AwsManaged': ..., 'Targets': [[target_id, type], ...]}}"""
+        if policy_type not in POLICY_TYPES:
+            raise ValueError(f"Policy type {policy_type} is not supported, use scp or rcp")
+        return self._section(f'policies:{policy_type}', lambda: self._crawl_policies(policy_type))
+
+    def find_policy(self, policy_type, policy_name):
+        """Return the ID of the policy named policy_name, None when it does not exist"""
+        for policy_id, policy in self.policies(policy_type).items():
+            if policy['Name'] == policy_name:
+                return policy_id
+        return None
+
+    def targets(self):
+        """Return the [target_id, type] pairs of the roots, OUs and accounts, in organization order"""
+        return (
+            [[root_id, 'ROOT'] for root_id in self.roots()] +
+            [[ou_id, 'ORGANIZATIONAL_UNIT'] for ou_id in self.ou_names()] +
+            [[account_id, 'ACCOUNT'] for account_id in self.accounts()]
+        )
+
+    def organization_order(self, targets):
+        """Sort [target_id, type] pairs like targets(), so results do not depend on how they were listed"""
+        position = {target_id: index for index, (target_id, _) in enumerate(self.targets())}
+        return sorted(targets, key=lambda target: position.get(target[0], len(position)))
+
+    def estimate_target_calls(self, policy_type, policy_ids):
+        """Estimated calls to list the targets of policy_ids policy by policy, and target by target.
+        FullAWSAccess-like policies are attached everywhere and take one page per PAGE_SIZE targets.
+        Counting targets needs the accounts and the OU tree, so for a few policies of an
+        organization not crawled yet listing by policy is taken without counting (None)."""
+        policies = self.policies(policy_type)
+        if len(policy_ids) <= PAGE_SIZE and not (self._is_fresh('accounts') and self._is_fresh('ous')):
+            return len(policy_ids), None
+        target_count = len(self.targets())
+        by_policy = sum(
+            math.ceil(target_count / PAGE_SIZE) if policies[policy_id]['Name'] in FULL_ACCESS_POLICIES else 1
+            for policy_id in policy_ids
+        )
+        return by_policy, target_count
+
+    def load_targets(self, policy_type, policy_ids=None, direction='auto'):
+        """Make sure the targets of policy_ids (every policy by default) are in the snapshot.
+        direction is 'policy' (list_targets_for_policy per policy), 'target'
+        (list_policies_for_target per root, OU and account) or 'auto' for the one
+        with the fewest estimated calls. Returns the plan with the calls it made."""
+        if direction not in ('auto', 'policy', 'target'):
+            raise ValueError(f"Direction {direction} is not supported, use auto, policy or target")
+        with self._lock:
+            policies = self.policies(policy_type)
+            wanted = list(policies) if policy_ids is None else list(policy_ids)
+            missing = [policy_id for policy_id in wanted if policies[policy_id]['Targets'] is None]
+            plan = {'direction': 'snapshot', 'policies': len(missing), 'estimate': {}, 'calls': 0}
+            if not missing:
+                return plan
+
+            by_policy, by_target = self.estimate_target_calls(policy_type, missing)
+            if direction == 'auto':
+                direction = 'policy' if by_target is None or by_policy <= by_target else 'target'
+            plan['direction'] = direction
+            plan['estimate'] = {'policy': by_policy, 'target': by_target}
+
+            calls_before = aws_clients.call_count()
+            if direction == 'policy':
+                self._list_targets_by_policy(policy_type, missing)
+            else:
+                self._list_targets_by_target(policy_type)
+            plan['calls'] = aws_clients.call_count() - calls_before
+            save(self.path, self._snapshot)
+            return plan
+
+    def policy_targets(self, policy_type, policy_id):
+        """Return the [target_id, type] pairs the policy is directly attached to"""
+        self.load_targets(policy_type, [policy_id])
+        return self.policies(policy_type)[policy_id]['Targets']
+
+    def _attachment_index(self, policy_type):
+        """{target_id: [policy_id, ...]} built from fully loaded policy targets"""
+        policies = self.policies(policy_type)
+        index = self._policies_by_target.get(policy_type)
+        if index is None or index[0] is not policies:
+            by_target = {}
+            for policy_id, policy in policies.items():
+                for attached_id, _ in policy['Targets']:
+                    by_target.setdefault(attached_id, []).append(policy_id)
+            index = (policies, by_target)
+            self._policies_by_target[policy_type] = index
+        return index[1]
+
+    def policies_for_target(self, policy_type, target_id):
+        """Return the IDs of the policies directly attached to target_id"""
+        with self._lock:
+            self.load_targets(policy_type)
+            return self._attachment_index(policy_type).get(target_id, [])
+
+    def _fresh_memo(self, name):
+        """Return the data of a memo section after dropping its expired entries, and the
+        entries listed before this run when refresh is set. The section is created if needed."""
+        section = self._snapshot['sections'].setdefault(name, {'created': time.time(), 'data': {}})
+        oldest = max(time.time() - self.ttl, self._started if self.refresh else 0)
+        section['data'] = {
+            key: entry
+            for key, entry in section['data'].items()
+            if isinstance(entry, dict) and entry.get('created', 0) >= oldest
+        }
+        return section['data']
+
+    def policies_for_targets(self, policy_type, target_ids):
+        """Return {target_id: [policy_id, ...]} for the distinct target_ids, None for
+        targets not in the organization. When the attachments of every policy are not
+        in the snapshot yet, the targets are queried one by one if that takes fewer
+        calls than loading every attachment. Answers are memoized in the snapshot."""
+        target_ids = list(dict.fromkeys(target_ids))
+        with self._lock:
+            policies = self.policies(policy_type)
+            missing = [policy_id for policy_id, policy in policies.items() if policy['Targets'] is None]
+            memo = self._fresh_memo(f'target-policies:{policy_type}')
+            to_query = [target_id for target_id in target_ids if target_id not in memo]
+
+            if missing and not to_query:
+                return {target_id: memo[target_id]['Policies'] for target_id in target_ids}
+            if missing and len(to_query) < min(
+                calls for calls in self.estimate_target_calls(policy_type, missing) if calls is not None
+            ):
+                listed_at = time.time()
+                listed = self._map(lambda target_id: self._list_policies_for_target(policy_type, target_id), to_query)
+                for target_id, policy_ids in zip(to_query, listed):
+                    memo[target_id] = {'created': listed_at, 'Policies': policy_ids}
+                save(self.path, self._snapshot)
+                return {target_id: memo[target_id]['Policies'] for target_id in target_ids}
+
+            self.load_targets(policy_type)
+            index = self._attachment_index(policy_type)
+            known = {target_id for target_id, _ in self.targets()}
+            return {
+                target_id: index.get(target_id, []) if target_id in known else None
+                for target_id in target_ids
+            }
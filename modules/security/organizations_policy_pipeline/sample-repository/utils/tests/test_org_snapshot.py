@@ -0,0 +1,153 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import json
+
+import pytest
+
+import org_snapshot
+from org_snapshot import OrgSnapshot
+
+
+class NotFound(Exception):
+    pass
+
+
+class StubExceptions:
+    ParentNotFoundException = NotFound
+    PolicyNotFoundException = NotFound
+    TargetNotFoundException = NotFound
+
+
+class StubPaginator:
+    def __init__(self, client, operation):
+        self.client = client
+        self.operation = operation
+
+    def paginate(self, PaginationConfig=None, **kwargs):
+        items = getattr(self.client, self.operation)(**kwargs)
+        key, values = next(iter(items.items()))
+        page_size = (PaginationConfig or {}).get('PageSize') or len(values) or 1
+        for start in range(0, max(len(values), 1), page_size):
+            self.client.calls[self.operation] = self.client.calls.get(self.operation, 0) + 1
+            yield {key: values[start:start + page_size]}
+
+
+class StubOrganizations:
+    """Root r-1 holding ou-1 and two accounts, FullAWSAccess attached everywhere
+    and one SCP per extra policy attached to ou-1"""
+
+    exceptions = StubExceptions
+
+    def __init__(self, extra_policies=1):
+        self.calls = {}
+        self.targets = [['r-1', 'ROOT'], ['ou-1', 'ORGANIZATIONAL_UNIT'],
+                        ['111111111111', 'ACCOUNT'], ['222222222222', 'ACCOUNT']]
+        self.attachments = {'p-full': [target_id for target_id, _ in self.targets]}
+        for index in range(extra_policies):
+            self.attachments[f'p-{index}'] = ['ou-1']
+
+    def get_paginator(self, operation):
+        return StubPaginator(self, operation)
+
+    def list_roots(self):
+        self.calls['list_roots'] = self.calls.get('list_roots', 0) + 1
+        return {'Roots': [{'Id': 'r-1', 'Name': 'Root'}]}
+
+    def list_accounts(self):
+        return {'Accounts': [{'Id': '111111111111', 'Name': 'one'}, {'Id': '222222222222', 'Name': 'two'}]}
+
+    def list_organizational_units_for_parent(self, ParentId):
+        units = [{'Id': 'ou-1', 'Name': 'Workloads'}] if ParentId == 'r-1' else []
+        return {'OrganizationalUnits': units}
+
+    def list_policies(self, Filter):
+        names = {'p-full': 'FullAWSAccess'}
+        return {'Policies': [
+            {'Id': policy_id, 'Name': names.get(policy_id, policy_id), 'AwsManaged': policy_id == 'p-full'}
+            for policy_id in self.attachments
+        ]}
+
+    def list_targets_for_policy(self, PolicyId):
+        types = dict(self.targets)
+        return {'Targets': [
+            {'TargetId': target_id, 'Type': types[target_id]} for target_id in self.attachments[PolicyId]
+        ]}
+
+    def list_policies_for_target(self, TargetId, Filter):
+        return {'Policies': [
+            {'Id': policy_id} for policy_id, target_ids in self.attachments.items() if TargetId in target_ids
+        ]}
+
+
+@pytest.fixture
+def organizations(monkeypatch):
+    client = StubOrganizations()
+    monkeypatch.setattr(org_snapshot, 'get_client', lambda service: client)
+    return client
+
+
+def test_sections_are_reused_until_they_expire(organizations, tmp_path):
+    path = str(tmp_path / 'snapshot.json')
+    assert list(OrgSnapshot(path, ttl=60).accounts()) == ['111111111111', '222222222222']
+    assert OrgSnapshot(path, ttl=60).account_names()['222222222222'] == 'two'
+    assert organizations.calls['list_accounts'] == 1
+
+    snapshot = json.loads(open(path).read())
+    snapshot['sections']['accounts']['created'] -= 120
+    with open(path, 'w') as f:
+        json.dump(snapshot, f)
+    OrgSnapshot(path, ttl=60).accounts()
+    assert organizations.calls['list_accounts'] == 2
+
+
+def test_refresh_crawls_each_section_once_per_run(organizations, tmp_path):
+    path = str(tmp_path / 'snapshot.json')
+    OrgSnapshot(path).accounts()
+    snapshot = OrgSnapshot(path, refresh=True)
+    snapshot.accounts()
+    snapshot.accounts()
+    assert organizations.calls['list_accounts'] == 2
+
+
+def test_few_policies_of_an_uncrawled_organization_are_listed_by_policy(organizations, tmp_path):
+    snapshot = OrgSnapshot(str(tmp_path / 'snapshot.json'))
+    plan = snapshot.load_targets('scp', ['p-0'])
+    assert plan['direction'] == 'policy'
+    assert plan['estimate'] == {'policy': 1, 'target': None}
+    assert snapshot.policy_targets('scp', 'p-0') == [['ou-1', 'ORGANIZATIONAL_UNIT']]
+    assert 'list_accounts' not in organizations.calls
+
+
+def test_many_policies_are_listed_by_target(monkeypatch, tmp_path):
+    client = StubOrganizations(extra_policies=30)
+    monkeypatch.setattr(org_snapshot, 'get_client', lambda service: client)
+    snapshot = OrgSnapshot(str(tmp_path / 'snapshot.json'))
+
+    plan = snapshot.load_targets('scp')
+    assert plan['direction'] == 'target'
+    assert plan['estimate'] == {'policy': 31, 'target': 4}
+    # The 31 policies of ou-1 take two pages
+    assert client.calls['list_policies_for_target'] == 5
+    assert 'list_targets_for_policy' not in client.calls
+    assert snapshot.policy_targets('scp', 'p-full') == client.targets
+    assert snapshot.load_targets('scp')['direction'] == 'snapshot'
+
+
+def test_both_directions_load_the_same_targets(tmp_path, monkeypatch):
+    loaded = []
+    for direction in ('policy', 'target'):
+        client = StubOrganizations(extra_policies=3)
+        monkeypatch.setattr(org_snapshot, 'get_client', lambda service: client)
+        snapshot = OrgSnapshot(str(tmp_path / f'{direction}.json'))
+        assert snapshot.load_targets('scp', direction=direction)['direction'] == direction
+        loaded.append({
+            policy_id: sorted(policy['Targets']) for policy_id, policy in snapshot.policies('scp').items()
+        })
+    assert loaded[0] == loaded[1]
+
+
+def test_target_type_from_the_id_prefix():
+    assert org_snapshot.target_type('r-1') == 'ROOT'
+    assert org_snapshot.target_type('ou-1') == 'ORGANIZATIONAL_UNIT'
+    assert org_snapshot.target_type('111111111111') == 'ACCOUNT'
@@ -2,59 +2,62 @@
 # SPDX-License-Identifier: MIT-0
 
 import json
-import boto3
+from org_snapshot import OrgSnapshot, POLICIES_PER_TARGET, target_type
 import sys
 import argparse
 
 parser = argparse.ArgumentParser(description='AWS Organization Policy capacity')
 parser.add_argument('--policy-type', action="store", dest='policy_type')
+parser.add_argument('--refresh-snapshot', action='store_true', help='Crawl the organization again instead of reusing the snapshot')
+parser.add_argument('--max-workers', type=int, default=8, help='Concurrent Organizations calls (rate limited by RATE_LIMIT_ORGANIZATIONS)')
+parser.add_argument('--all', action='store_true', dest='all_targets',
+                    help='Count the slots of every root, OU and account of the organization instead of the environments')
 args = parser.parse_args()
 
-def get_target_policies(organizations_client, target):
-    try:
-        name, target_id = target.split(':')
-        
-        print(f"{name} Processando target")
-        
-        policy_type = ""
-        if args.policy_type == 'scp':
-            policy_type = "SERVICE_CONTROL_POLICY"
-        elif args.policy_type == 'rcp':
-            policy_type = "RESOURCE_CONTROL_POLICY"
-        else:
-            print("Policy type não suportado")
-            exit()
-        
-        if target_id.startswith('ou-'):
-            response = organizations_client.list_policies_for_target(
-                TargetId=target_id,
-                Filter=policy_type
-            )
-        else:
-            response = organizations_client.list_policies_for_target(
-                TargetId=target_id,
-                Filter=policy_type
-            )
-        
-        num_policies = len(response['Policies'])
-        print(f"      Found {num_policies} policies")
-        return num_policies
-    
-    except organizations_client.exceptions.TargetNotFoundException:
-        print(f"Erro: Target não encontrado")
-        return "Target not found"
-    except Exception as e:
-        print(f"      Erro: {str(e)}")
-        return f"Erro: {str(e)}"
+def build_slots_table(snapshot, target_ids):
+    """Per-target slot usage, {target_id: {'Name', 'Type', 'Attached', 'Policies'}}, None for unknown targets"""
+    print(f"Contando slots de {len(target_ids)} targets distintos...")
+    attached = snapshot.policies_for_targets(args.policy_type, target_ids)
+    policies = snapshot.policies(args.policy_type)
+    # Only the targets found are named, without crawling the organization for them
+    names = snapshot.target_names([target_id for target_id, policy_ids in attached.items() if policy_ids is not None])
+    table = {}
+    for target_id, policy_ids in attached.items():
+        if policy_ids is None:
+            table[target_id] = None
+            continue
+        table[target_id] = {
+            'Name': names[target_id],
+            'Type': target_type(target_id),
+            'Attached': len(policy_ids),
+            'Policies': [policies[policy_id]['Name'] if policy_id in policies else policy_id for policy_id in policy_ids]
+        }
+    return table
 
-def process_scp_limits(input_file, output_file):
+def write_slots_table(table, table_file):
+    """Compact per-target table, e.g. table['Targets']['ou-xxxx']['Attached']"""
+    with open(table_file, 'w') as f:
+        json.dump({
+            'PolicyType': args.policy_type,
+            'Quota': POLICIES_PER_TARGET,
+            'Targets': table
+        }, f, separators=(',', ':'))
+    print(f"Tabela de slots por target salva em {table_file}")
+
+def process_scp_limits(input_file, output_file, table_file):
     try:
-        organizations_client = boto3.client('organizations')
+        snapshot = OrgSnapshot(max_workers=args.max_workers, refresh=args.refresh_snapshot)
         
         print(f"Lendo arquivo de input: {input_file}")
         with open(input_file, 'r') as f:
             statements = json.load(f)
         
+        # Each target is counted once, however many environments share it
+        table = build_slots_table(
+            snapshot,
+            [target.split(':')[1] for statement in statements for target in statement['Target']]
+        )
+        
         print(f"Processando {len(statements)} statements...")
         output_data = []
         for i, statement in enumerate(statements, 1):
@@ -65,14 +68,21 @@ def process_scp_limits(input_file, output_file):
             }
             
             for target in statement["Target"]:
-                num_policies = get_target_policies(organizations_client, target)
-                processed_statement["Target"][target] = f"{num_policies}/5"
+                name, target_id = target.split(':')
+                if table[target_id] is None:
+                    print(f"      {name}: Erro: Target não encontrado")
+                    num_policies = "Target not found"
+                else:
+                    num_policies = table[target_id]['Attached']
+                    print(f"      {name}: Found {num_policies} policies")
+                processed_statement["Target"][target] = f"{num_policies}/{POLICIES_PER_TARGET}"
             
             output_data.append(processed_statement)
         
         print(f"\nArmazenando resultados em {output_file}")
         with open(output_file, 'w') as f:
             json.dump(output_data, indent=2, fp=f)
+        write_slots_table(table, table_file)
             
         print(f"Processamento completo. Results salvos em {output_file}")
         
@@ -80,17 +90,37 @@ def process_scp_limits(input_file, output_file):
         print(f"Error occurred: {str(e)}")
         sys.exit(1)
 
+def process_all_targets(table_file):
+    try:
+        snapshot = OrgSnapshot(max_workers=args.max_workers, refresh=args.refresh_snapshot)
+        table = build_slots_table(snapshot, [target_id for target_id, _ in snapshot.targets()])
+        full = sum(1 for usage in table.values() if usage and usage['Attached'] >= POLICIES_PER_TARGET)
+        print(f"{full} de {len(table)} targets sem slots livres")
+        write_slots_table(table, table_file)
+        
+    except Exception as e:
+        print(f"Error occurred: {str(e)}")
+        sys.exit(1)
+
 def main():
     
     if args.policy_type is None:
         print ("Usage: python " + str(sys.argv[0]) +  " --policy-type <scp or rcp>")
         print ("Example: python " + str(sys.argv[0]) +  " --policy-type scp")
         exit()
+    
+    if args.policy_type not in ('scp', 'rcp'):
+        print("Policy type não suportado")
+        exit()
             
     input_file = "../environments/environments.json" 
     output_file = f"environments-{str(args.policy_type)}-slots.json" 
+    table_file = f"targets-{str(args.policy_type)}-slots.json"
     
-    process_scp_limits(input_file, output_file)
+    if args.all_targets:
+        process_all_targets(table_file)
+    else:
+        process_scp_limits(input_file, output_file, table_file)
 
 if __name__ == "__main__":
     main()
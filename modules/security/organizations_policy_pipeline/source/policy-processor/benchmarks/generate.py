@@ -0,0 +1,251 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import json
+import os
+import random
+from collections import OrderedDict
+
+from policyengine import actions
+from policyengine.policytypes import RCP, SCP
+
+# Named scales; "large" is the size of a big organization
+SCALES = {
+    "small": {"sids": 50, "guardrails": 40, "accounts": 200, "environments": 10},
+    "medium": {"sids": 250, "guardrails": 100, "accounts": 1000, "environments": 40},
+    "large": {"sids": 1000, "guardrails": 200, "accounts": 5000, "environments": 100},
+}
+
+TAGS = {"type": ["core", "workload", "sandbox"], "env": ["dev", "hml", "prd"]}
+
+# Conditions are drawn from a small pool so statements of different guardrails
+# share a scope and get merged by the optimizer, like real guardrail libraries
+CONDITIONS = [
+    None,
+    {
+        "ArnNotLike": {
+            "aws:PrincipalARN": [
+                "arn:aws:iam::*:role/AWSAFTExecution",
+                "arn:aws:iam::*:role/AWSControlTowerExecution",
+            ]
+        }
+    },
+    {"StringNotEquals": {"aws:RequestedRegion": ["us-east-1", "sa-east-1"]}},
+    {"Bool": {"aws:SecureTransport": "false"}},
+    {"BoolIfExists": {"aws:PrincipalIsAWSService": "false"}},
+]
+
+RCP_CONDITIONS = [
+    {"StringNotEqualsIfExists": {"aws:PrincipalOrgID": "o-xxxxxxxxxx"}},
+    {"Bool": {"aws:SecureTransport": "false"}},
+    {"BoolIfExists": {"aws:PrincipalIsAWSService": "false"}},
+]
+
+
+class Organization:
+    """
+    Synthetic organization: accounts with tags and OUs grouped in environments
+    """
+
+    def __init__(self, accounts, ous, tags):
+        self.accounts = accounts
+        self.ous = ous
+        self.tags = tags
+
+
+def generate_organization(rng, scale):
+    accounts = [f"{100000000000 + index:012d}" for index in range(scale["accounts"])]
+    ous = [f"ou-bench-{index:08x}" for index in range(max(4, scale["accounts"] // 20))]
+    tags = {
+        account_id: {key: rng.choice(values) for key, values in TAGS.items()}
+        for account_id in accounts
+    }
+    return Organization(accounts, ous, tags)
+
+
+def _service_actions(catalog, services):
+    return {
+        service: catalog.expand(f"{service}:*")
+        for service in sorted(services)
+        if catalog.expand(f"{service}:*")
+    }
+
+
+def generate_guardrails(rng, count, policy_type):
+    """
+    Return {name: [statements]} for a guardrail library of the policy type
+    """
+    catalog = actions.default_catalog()
+    if policy_type.services is None:
+        services = _service_actions(catalog, catalog.services)
+        conditions = CONDITIONS
+    else:
+        services = _service_actions(catalog, catalog.services & policy_type.services)
+        conditions = RCP_CONDITIONS
+
+    guardrails = OrderedDict()
+    for index in range(count):
+        service = rng.choice(sorted(services))
+        statements = []
+        for number in range(rng.randint(1, 3)):
+            statement = OrderedDict([("Sid", f"G{index}S{number}"), ("Effect", "Deny")])
+            if policy_type.has_principal:
+                statement["Principal"] = "*"
+            chosen = rng.sample(
+                services[service], min(len(services[service]), rng.randint(1, 6))
+            )
+            if rng.random() < 0.2:
+                # Wildcards let the optimizer drop the actions they already cover
+                chosen.append(
+                    f"{service}:{rng.choice(['Get', 'List', 'Delete', 'Put'])}*"
+                )
+            statement["Action"] = chosen
+            statement["Resource"] = "*"
+            condition = rng.choice(conditions)
+            if condition is not None:
+                statement["Condition"] = condition
+            statements.append(statement)
+        guardrails[f"{service}-guardrail-{index}"] = statements
+    return guardrails
+
+
+def generate_environments(rng, organization, count):
+    environments = []
+    for index in range(count):
+        targets = rng.sample(
+            organization.ous, min(len(organization.ous), rng.randint(1, 6))
+        )
+        environments.append(
+            {
+                "ID": f"env-{index}",
+                "Target": [f"OU-{target[-4:]}:{target}" for target in targets],
+            }
+        )
+    return environments
+
+
+def _draw_target(rng, organization, environments):
+    """
+    Return a random statement target and the IDs it resolves to
+    """
+    kind = rng.random()
+    if kind < 0.4:
+        account_id = rng.choice(organization.accounts)
+        return {"Type": "Account", "ID": f"acct:{account_id}"}, [account_id]
+    if kind < 0.6:
+        ou_id = rng.choice(organization.ous)
+        return {"Type": "OU", "ID": f"ou:{ou_id}"}, [ou_id]
+    if kind < 0.9:
+        environment = rng.choice(environments)
+        return (
+            {"Type": "Environment", "ID": environment["ID"]},
+            [target.split(":")[1] for target in environment["Target"]],
+        )
+    key = rng.choice(sorted(TAGS))
+    value = rng.choice(TAGS[key])
+    return (
+        {"Type": "Tag", "ID": f"{key}:{value}"},
+        [
+            account_id
+            for account_id in organization.accounts
+            if organization.tags[account_id].get(key) == value
+        ],
+    )
+
+
+def generate_manifest(
+    rng, policy_type, count, guardrail_names, policy_names, organization, environments
+):
+    """
+    Return the statements of a management file. Targets are redrawn until each
+    one has a free slot, so no target gets more than policy_type.max_parts
+    policies and the capacity check passes like on a real repository.
+    """
+    statements = []
+    used = {}
+    for index in range(count):
+        while True:
+            target, target_ids = _draw_target(rng, organization, environments)
+            if all(
+                used.get(target_id, 0) < policy_type.max_parts
+                for target_id in target_ids
+            ):
+                break
+        for target_id in target_ids:
+            used[target_id] = used.get(target_id, 0) + 1
+
+        use_policy = policy_names and rng.random() < 0.1
+        statements.append(
+            OrderedDict(
+                [
+                    ("SID", f"{policy_type.name}-bench-{index}"),
+                    ("Target", target),
+                    (
+                        "Guardrails",
+                        (
+                            []
+                            if use_policy
+                            else rng.sample(
+                                guardrail_names,
+                                min(len(guardrail_names), rng.randint(2, 6)),
+                            )
+                        ),
+                    ),
+                    ("Policy", rng.choice(policy_names) if use_policy else ""),
+                    ("Comments", f"Synthetic statement {index}"),
+                ]
+            )
+        )
+    return statements
+
+
+def _write_json(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2)
+
+
+def generate_repository(root, scale="small", seed=0):
+    """
+    Write a synthetic policy repository under root and return its Organization
+    """
+    scale = SCALES[scale] if isinstance(scale, str) else scale
+    rng = random.Random(seed)
+    organization = generate_organization(rng, scale)
+    environments = generate_environments(rng, organization, scale["environments"])
+    _write_json(os.path.join(root, "environments", "environments.json"), environments)
+
+    for policy_type, share in ((SCP, 1.0), (RCP, 0.2)):
+        guardrails = generate_guardrails(
+            rng, max(2, int(scale["guardrails"] * share)), policy_type
+        )
+        for name, statements in guardrails.items():
+            _write_json(
+                os.path.join(root, policy_type.folder, "guardrails", f"{name}.json"),
+                statements,
+            )
+
+        # A few full policies built from guardrail statements
+        policy_names = []
+        for index, statements in enumerate(list(guardrails.values())[:3]):
+            name = f"{policy_type.name}-bench-policy-{index}"
+            _write_json(
+                os.path.join(root, policy_type.folder, "policies", f"{name}.json"),
+                {"Version": "2012-10-17", "Statement": statements},
+            )
+            policy_names.append(name)
+
+        manifest = generate_manifest(
+            rng,
+            policy_type,
+            max(1, int(scale["sids"] * share)),
+            list(guardrails),
+            policy_names,
+            organization,
+            environments,
+        )
+        _write_json(
+            os.path.join(root, policy_type.folder, policy_type.management_file),
+            manifest,
+        )
+    return organization
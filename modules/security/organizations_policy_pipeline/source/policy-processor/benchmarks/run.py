@@ -0,0 +1,356 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+"""
+Synthetic-load benchmark of the policy processor.
+
+Run from source/policy-processor:
+
+    python3 -m benchmarks.run --scale small
+    python3 -m benchmarks.run --scale large --latency 0.08 --quota-tps 20 --max-workers 8
+    python3 -m benchmarks.run --scale small --update-baseline
+"""
+
+import argparse
+import json
+import logging
+import math
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+from collections import OrderedDict
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+# Differences below these are timer and allocator noise, not regressions
+MIN_DELTA = {"seconds": 0.05, "p99": 0.005, "peakRssMb": 2.0}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Benchmark the SCP/RCP policy processor"
+    )
+    parser.add_argument("--scale", default="small", help="small, medium or large")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--scenarios",
+        default="optimize,mergeguardrails,main",
+        help="Comma-separated scenarios to run",
+    )
+    parser.add_argument("--max-workers", type=int, default=8)
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.02,
+        help="Mean stand-in API latency in seconds",
+    )
+    parser.add_argument(
+        "--quota-tps",
+        type=float,
+        default=0,
+        help="Stand-in server quota in requests per second, 0 for no throttling",
+    )
+    parser.add_argument(
+        "--client-rate",
+        type=float,
+        default=0,
+        help="Client-side rate limit per API in requests per second, 0 to disable",
+    )
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="Relative slowdown accepted before a metric counts as a regression",
+    )
+    parser.add_argument("--output", help="Also write the report to this file")
+    return parser.parse_args(argv)
+
+
+def percentile(values, fraction):
+    """
+    Nearest-rank percentile
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def result(durations, seconds):
+    return OrderedDict(
+        [
+            ("sids", len(durations)),
+            ("seconds", round(seconds, 3)),
+            ("throughput", round(len(durations) / seconds, 2) if seconds else 0.0),
+            ("p50", round(percentile(durations, 0.50), 4)),
+            ("p99", round(percentile(durations, 0.99), 4)),
+            ("peakRssMb", peak_rss_mb()),
+        ]
+    )
+
+
+def guardrail_statements(repository, policy_type):
+    with open(
+        os.path.join(repository, policy_type.folder, policy_type.management_file)
+    ) as f:
+        return [statement for statement in json.load(f) if statement["Guardrails"]]
+
+
+def bench_optimize(repository, policy_type, guardrail_catalog):
+    """
+    CPU cost of merging and optimizing, without any AWS call
+    """
+    from policyengine import mergeandoptimize
+
+    folder = os.path.join(repository, policy_type.folder, "guardrails") + "/"
+    durations = []
+    started = time.perf_counter()
+    for statement in guardrail_statements(repository, policy_type):
+        call_started = time.perf_counter()
+        policy = OrderedDict(
+            [
+                ("Version", "2012-10-17"),
+                (
+                    "Statement",
+                    mergeandoptimize.concatenate_policy_files(
+                        statement["Guardrails"], folder, guardrail_catalog
+                    ),
+                ),
+            ]
+        )
+        mergeandoptimize.optimize_iam_policy(policy, policy_type)
+        durations.append(time.perf_counter() - call_started)
+    return result(durations, time.perf_counter() - started)
+
+
+def bench_mergeguardrails(repository, policy_type, guardrail_catalog, client):
+    """
+    One SID at a time through mergeguardrails against the Access Analyzer stand-in
+    """
+    from policyengine import mergeandoptimize
+
+    folder = os.path.join(repository, policy_type.folder, "guardrails") + "/"
+    durations = []
+    started = time.perf_counter()
+    for statement in guardrail_statements(repository, policy_type):
+        call_started = time.perf_counter()
+        mergeandoptimize.mergeguardrails(
+            statement["Guardrails"],
+            folder,
+            ["ERROR", "SECURITY_WARNING"],
+            None,
+            policy_type,
+            client,
+            guardrail_catalog,
+            sid=statement["SID"],
+        )
+        durations.append(time.perf_counter() - call_started)
+    return result(durations, time.perf_counter() - started)
+
+
+def bench_main(repository, client_registry, max_workers):
+    """
+    The full processor flow of main(), for SCPs and RCPs, with a bounded worker pool
+    """
+    import main as processor
+    from policyengine import timing
+
+    output_folder = os.path.join(repository, "terraform")
+    os.makedirs(output_folder, exist_ok=True)
+    previous_folder = os.getcwd()
+    os.chdir(output_folder)
+    started = time.perf_counter()
+    try:
+        processor.main(
+            [
+                "--repository-root",
+                repository,
+                "--output-folder",
+                output_folder,
+                "--max-workers",
+                str(max_workers),
+                "--log-level",
+                "WARNING",
+            ],
+            client_registry=client_registry,
+            validation_cache=None,
+            manifest_backend=None,
+        )
+    finally:
+        os.chdir(previous_folder)
+    seconds = time.perf_counter() - started
+    durations = [
+        stages["statement"]
+        for stages in timing.recorder.summary()["sids"].values()
+        if "statement" in stages
+    ]
+    return result(durations, seconds)
+
+
+def environment():
+    """
+    Where a report was recorded; results only compare on a similar machine
+    """
+    return OrderedDict(
+        [
+            ("python", platform.python_version()),
+            ("implementation", platform.python_implementation()),
+            ("platform", platform.platform()),
+            ("machine", platform.machine()),
+            ("cpus", os.cpu_count()),
+        ]
+    )
+
+
+def compare(report, baseline, tolerance):
+    """
+    Return the regressions of report against baseline, as readable strings
+    """
+    regressions = []
+    for scenario, expected in baseline.get("scenarios", {}).items():
+        actual = report["scenarios"].get(scenario)
+        if actual is None:
+            continue
+        if (
+            actual["throughput"] < expected["throughput"] * (1 - tolerance)
+            and actual["seconds"] - expected["seconds"] > MIN_DELTA["seconds"]
+        ):
+            regressions.append(
+                f"{scenario}: throughput {actual['throughput']}/s, baseline {expected['throughput']}/s"
+            )
+        for metric in ("p99", "peakRssMb"):
+            min_delta = MIN_DELTA[metric]
+            if metric == "p99":
+                # With a few dozen SIDs the nearest-rank p99 is the slowest call, which
+                # one scheduler stall moves; the tail must grow by more than a median call
+                min_delta = max(min_delta, expected["p50"])
+            if (
+                actual[metric] > expected[metric] * (1 + tolerance)
+                and actual[metric] - expected[metric] > min_delta
+            ):
+                regressions.append(
+                    f"{scenario}: {metric} {actual[metric]}, baseline {expected[metric]}"
+                )
+    return regressions
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    # Buckets are created from the environment on first use, so set them first
+    os.environ["RATE_LIMIT_ACCESSANALYZER"] = str(args.client_rate)
+    os.environ["RATE_LIMIT_ORGANIZATIONS"] = str(args.client_rate)
+    os.environ.setdefault("VALIDATION_CACHE", "off")
+    os.environ.setdefault("BUILD_MANIFEST", "off")
+
+    from benchmarks import generate, standins
+    from policyengine import catalog, clients, ratelimit
+    from policyengine.policytypes import SCP
+
+    logging.getLogger("policyengine").setLevel(logging.WARNING)
+
+    scenarios = [name for name in args.scenarios.split(",") if name]
+    report = OrderedDict(
+        [
+            (
+                "settings",
+                OrderedDict(
+                    [
+                        ("scale", args.scale),
+                        ("seed", args.seed),
+                        ("maxWorkers", args.max_workers),
+                        ("latency", args.latency),
+                        ("quotaTps", args.quota_tps),
+                        ("clientRate", args.client_rate),
+                    ]
+                ),
+            ),
+            ("environment", environment()),
+            ("scenarios", OrderedDict()),
+        ]
+    )
+
+    with tempfile.TemporaryDirectory(prefix="policy-bench-") as repository:
+        organization = generate.generate_repository(repository, args.scale, args.seed)
+        session = standins.StandinSession(
+            organization,
+            standins.ServiceModel(args.latency, quota_tps=args.quota_tps),
+            standins.ServiceModel(args.latency, quota_tps=args.quota_tps),
+        )
+        client_registry = clients.ClientRegistry.for_concurrency(
+            args.max_workers, session=session
+        )
+        guardrail_catalog = catalog.GuardrailCatalog()
+        guardrail_catalog.load_folder(
+            os.path.join(repository, SCP.folder, "guardrails")
+        )
+
+        if "optimize" in scenarios:
+            report["scenarios"]["optimize"] = bench_optimize(
+                repository, SCP, guardrail_catalog
+            )
+        if "mergeguardrails" in scenarios:
+            report["scenarios"]["mergeguardrails"] = bench_mergeguardrails(
+                repository,
+                SCP,
+                guardrail_catalog,
+                client_registry.client("accessanalyzer"),
+            )
+        if "main" in scenarios:
+            report["scenarios"]["main"] = bench_main(
+                repository, client_registry, args.max_workers
+            )
+
+        report["standins"] = {
+            service: {"calls": model.calls, "throttles": model.throttles}
+            for service, model in session.models.items()
+        }
+        report["rateLimiter"] = ratelimit.stats()
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}, skipping the regression check")
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline.get("settings") != report["settings"]:
+        print(
+            "Baseline was recorded with other settings, skipping the regression check"
+        )
+        return 0
+    if baseline.get("environment") != report["environment"]:
+        print(
+            f"[!] Baseline was recorded on another environment ({baseline.get('environment')}), "
+            "timings may differ for that reason alone"
+        )
+
+    regressions = compare(report, baseline, args.tolerance)
+    for regression in regressions:
+        print(f"[!] Regression: {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,209 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import random
+import threading
+import time
+
+
+class ServiceModel:
+    """
+    Behaviour of a simulated AWS API: mean latency in seconds with +/- jitter,
+    and a server-side quota in requests per second (0 for no throttling)
+    """
+
+    def __init__(self, latency=0.05, jitter=0.5, quota_tps=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.quota_tps = quota_tps
+        self.calls = 0
+        self.throttles = 0
+        self._tokens = float(quota_tps)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self._random = random.Random(0)
+
+    def admit(self):
+        """
+        Return False when the request is throttled by the server quota
+        """
+        with self._lock:
+            self.calls += 1
+            if not self.quota_tps:
+                return True
+            now = time.monotonic()
+            self._tokens = min(
+                self.quota_tps, self._tokens + (now - self._updated) * self.quota_tps
+            )
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            self.throttles += 1
+            return False
+
+    def delay(self):
+        with self._lock:
+            spread = self._random.uniform(-self.jitter, self.jitter)
+        return max(0.0, self.latency * (1 + spread))
+
+
+class _Events:
+    """
+    The subset of the botocore event system used by policyengine.ratelimit
+    """
+
+    def __init__(self):
+        self._handlers = {}
+
+    def register(self, event_name, handler):
+        self._handlers.setdefault(event_name, []).append(handler)
+
+    def emit(self, event_name, **kwargs):
+        for handler in self._handlers.get(event_name, []):
+            handler(**kwargs)
+
+
+class _Meta:
+    def __init__(self):
+        self.events = _Events()
+        self.region_name = "us-east-1"
+
+
+class _Paginator:
+    def __init__(self, pages):
+        self._pages = pages
+
+    def paginate(self, **kwargs):
+        return self._pages(**kwargs)
+
+
+class _StandinClient:
+    max_attempts = 10
+
+    def __init__(self, model):
+        self.model = model
+        self.meta = _Meta()
+
+    def _call(self, response):
+        """
+        Send one simulated request, retrying throttled attempts with exponential
+        backoff like botocore does
+        """
+        for attempt in range(1, self.max_attempts + 1):
+            self.meta.events.emit("before-send")
+            if self.model.admit():
+                time.sleep(self.model.delay())
+                self.meta.events.emit(
+                    "needs-retry", response=(None, {}), attempts=attempt
+                )
+                return response()
+            self.meta.events.emit(
+                "needs-retry",
+                response=(None, {"Error": {"Code": "ThrottlingException"}}),
+                attempts=attempt,
+            )
+            time.sleep(min(1.0, 0.05 * 2 ** (attempt - 1)))
+        raise RuntimeError("ThrottlingException: rate exceeded after retries")
+
+
+class AccessAnalyzerStandin(_StandinClient):
+    def check_no_new_access(self, **kwargs):
+        return self._call(
+            lambda: {
+                "result": "PASS",
+                "message": "The modified permissions grant no new access",
+            }
+        )
+
+    def get_paginator(self, operation):
+        if operation != "validate_policy":
+            raise NotImplementedError(operation)
+
+        def pages(**kwargs):
+            yield self._call(lambda: {"findings": []})
+
+        return _Paginator(pages)
+
+
+class _OrganizationsExceptions:
+    class TargetNotFoundException(Exception):
+        pass
+
+
+class OrganizationsStandin(_StandinClient):
+    page_size = 20
+    exceptions = _OrganizationsExceptions
+
+    # The AWS managed policy every target has; the pipeline's own are not live yet
+    FULL_ACCESS = {
+        "SERVICE_CONTROL_POLICY": {"Id": "p-FullAWSAccess", "Name": "FullAWSAccess"},
+        "RESOURCE_CONTROL_POLICY": {
+            "Id": "p-RCPFullAWSAccess",
+            "Name": "RCPFullAWSAccess",
+        },
+    }
+
+    def __init__(self, model, organization):
+        super().__init__(model)
+        self.organization = organization
+        self._targets = set(organization.accounts) | set(organization.ous)
+
+    def list_tags_for_resource(self, ResourceId, **kwargs):
+        tags = self.organization.tags.get(ResourceId, {})
+        return self._call(
+            lambda: {"Tags": [{"Key": k, "Value": v} for k, v in sorted(tags.items())]}
+        )
+
+    def get_paginator(self, operation):
+        if operation == "list_accounts":
+
+            def pages(**kwargs):
+                accounts = self.organization.accounts
+                for start in range(0, len(accounts), self.page_size):
+                    chunk = accounts[start : start + self.page_size]
+                    yield self._call(
+                        lambda: {
+                            "Accounts": [{"Id": account_id} for account_id in chunk]
+                        }
+                    )
+
+            return _Paginator(pages)
+        if operation == "list_tags_for_resource":
+
+            def pages(ResourceId, **kwargs):
+                yield self.list_tags_for_resource(ResourceId)
+
+            return _Paginator(pages)
+        if operation == "list_policies_for_target":
+
+            def pages(TargetId, Filter, **kwargs):
+                if TargetId not in self._targets:
+                    raise self.exceptions.TargetNotFoundException(TargetId)
+                yield self._call(lambda: {"Policies": [self.FULL_ACCESS[Filter]]})
+
+            return _Paginator(pages)
+        raise NotImplementedError(operation)
+
+
+class StandinSession:
+    """
+    Drop-in for boto3.Session in policyengine.clients.ClientRegistry, so the
+    engine's client sharing and rate limiting run unchanged against the stand-ins
+    """
+
+    def __init__(
+        self, organization, access_analyzer_model=None, organizations_model=None
+    ):
+        self.models = {
+            "accessanalyzer": access_analyzer_model or ServiceModel(),
+            "organizations": organizations_model or ServiceModel(),
+        }
+        self.organization = organization
+
+    def client(self, service, region_name=None, config=None):
+        if service == "accessanalyzer":
+            return AccessAnalyzerStandin(self.models[service])
+        if service == "organizations":
+            return OrganizationsStandin(self.models[service], self.organization)
+        raise NotImplementedError(f"No stand-in for {service}")
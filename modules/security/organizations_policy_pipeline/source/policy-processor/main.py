@@ -0,0 +1,196 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import argparse
+import cProfile
+import io
+import json
+import logging
+import pstats
+import os
+import sys
+
+from policyengine import (
+    POLICY_TYPES,
+    AttachmentQuotaExceeded,
+    PolicyEngine,
+    PolicyProcessingError,
+)
+from policyengine import logs, timing
+from policyengine.deadlines import Deadline
+
+logger = logging.getLogger(logs.LOGGER_NAME)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Merge, optimize and validate SCPs and RCPs for Terraform"
+    )
+    parser.add_argument(
+        "--policy-type",
+        choices=sorted(POLICY_TYPES) + ["all"],
+        default="all",
+        help="Policy type to build (default: all)",
+    )
+    parser.add_argument(
+        "--repository-root",
+        default=os.path.join(os.getcwd(), "..", ".."),
+        help="Folder containing scp-management/, rcp-management/ and environments/",
+    )
+    parser.add_argument(
+        "--output-folder",
+        default=os.path.join(os.getcwd(), "..", "terraform"),
+        help="Folder where scps.json and rcps.json are written",
+    )
+    parser.add_argument(
+        "--max-workers",
+        type=int,
+        default=int(os.getenv("MAX_WORKERS", "1")),
+        help="Number of statements processed concurrently",
+    )
+    parser.add_argument(
+        "--time-budget",
+        type=float,
+        default=float(os.getenv("RUN_TIME_BUDGET", "0")),
+        help="Wall-clock seconds the whole run may take, 0 for no limit",
+    )
+    parser.add_argument(
+        "--call-timeout",
+        type=float,
+        default=float(os.getenv("CALL_TIMEOUT", "0")),
+        help="Seconds a single AWS call may take including retries, 0 for no limit",
+    )
+    parser.add_argument(
+        "--hedge-after",
+        type=float,
+        default=float(os.getenv("HEDGE_AFTER", "0")),
+        help="Resend read-only AWS calls still running after this many seconds, 0 to disable",
+    )
+    parser.add_argument(
+        "--timing-summary",
+        default=os.getenv("TIMING_SUMMARY"),
+        metavar="FILE",
+        help="Write per-stage and per-SID timings as JSON to FILE",
+    )
+    parser.add_argument(
+        "--trace",
+        default=os.getenv("TIMING_TRACE"),
+        metavar="FILE",
+        help="Write a Chrome trace-event timeline (chrome://tracing, Perfetto) to FILE",
+    )
+    parser.add_argument(
+        "--capacity-report",
+        default=os.getenv("CAPACITY_REPORT"),
+        metavar="FILE",
+        help="Write the policies each target will have attached, per policy type, as JSON to FILE",
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="processor.prof",
+        metavar="FILE",
+        help="Run under cProfile and write the stats to FILE (default: processor.prof)",
+    )
+    parser.add_argument(
+        "--log-level",
+        default=os.getenv("LOG_LEVEL", "INFO").upper(),
+        choices=["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"],
+        help="Lowest level written to the console and the log files",
+    )
+    return parser.parse_args(argv)
+
+
+def log_timing_summary(summary):
+    logger.info("Run took %.2fs", summary["wallSeconds"])
+    for name, stage in list(summary["stages"].items())[:10]:
+        logger.info(
+            "  %s: %d x, %.3fs total, %.3fs max",
+            name,
+            stage["count"],
+            stage["totalSeconds"],
+            stage["maxSeconds"],
+        )
+
+
+def write_profile(profiler, file_path):
+    profiler.dump_stats(file_path)
+    stream = io.StringIO()
+    pstats.Stats(profiler, stream=stream).sort_stats("cumulative").print_stats(20)
+    logger.info("cProfile stats written to %s\n%s", file_path, stream.getvalue())
+
+
+def write_capacity_report(reports, file_path):
+    with open(file_path, "w") as f:
+        json.dump(reports, f, indent=2)
+
+
+def main(argv=None, **engine_options):
+    """
+    Run the processor. engine_options are passed to PolicyEngine.from_environment,
+    e.g. to run against local stand-ins of the AWS APIs.
+    """
+    args = parse_args(argv)
+    logs.configure(args.log_level)
+    timing.recorder.reset()
+
+    profiler = cProfile.Profile() if args.profile else None
+    try:
+        if profiler is not None:
+            profiler.runcall(run, args, **engine_options)
+        else:
+            run(args, **engine_options)
+    finally:
+        if profiler is not None:
+            write_profile(profiler, args.profile)
+        summary = timing.recorder.summary()
+        log_timing_summary(summary)
+        if args.timing_summary:
+            timing.recorder.write_summary(args.timing_summary)
+        if args.trace:
+            timing.recorder.write_trace(args.trace)
+        # Write the pending records, the quota report included, before exiting
+        logs.shutdown()
+
+
+def run(args, **engine_options):
+    # The budget starts now and covers every policy type of the run
+    deadline = Deadline(args.time_budget, args.call_timeout, args.hedge_after)
+    engine = PolicyEngine.from_environment(
+        args.repository_root,
+        max_workers=args.max_workers,
+        deadline=deadline,
+        **engine_options,
+    )
+    policy_types = (
+        list(POLICY_TYPES.values())
+        if args.policy_type == "all"
+        else [POLICY_TYPES[args.policy_type]]
+    )
+
+    capacity_reports = {}
+    try:
+        for policy_type in policy_types:
+            # Each policy type keeps its own log file for the Bedrock summary
+            with logs.log_file(policy_type.log_file):
+                try:
+                    output = engine.build(policy_type)
+                    # Quota problems surface here instead of at terraform apply
+                    capacity_reports[policy_type.name] = engine.check_capacity(
+                        policy_type, output
+                    )
+                    engine.write(policy_type, output, args.output_folder)
+                except PolicyProcessingError as e:
+                    if isinstance(e, AttachmentQuotaExceeded):
+                        capacity_reports[policy_type.name] = e.report
+                    logger.critical("[!] Processing stopped after a fatal error: %s", e)
+                    sys.exit(1)
+                finally:
+                    if args.capacity_report:
+                        write_capacity_report(capacity_reports, args.capacity_report)
+    finally:
+        # Flush the caches and report API usage even when the run stops early
+        engine.close()
+
+
+if __name__ == "__main__":
+    main()
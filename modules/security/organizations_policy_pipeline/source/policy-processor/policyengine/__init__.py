@@ -0,0 +1,21 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+from policyengine.engine import PolicyEngine
+from policyengine.errors import (
+    AttachmentQuotaExceeded,
+    DeadlineExceeded,
+    PolicyProcessingError,
+)
+from policyengine.policytypes import POLICY_TYPES, RCP, SCP, PolicyType
+
+__all__ = [
+    "AttachmentQuotaExceeded",
+    "DeadlineExceeded",
+    "POLICY_TYPES",
+    "PolicyEngine",
+    "PolicyProcessingError",
+    "PolicyType",
+    "RCP",
+    "SCP",
+]
@@ -0,0 +1,191 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import json
+import logging
+import os
+import threading
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
+# Bundled service/action catalog. Regenerate it from the IAM Service Authorization
+# Reference and bump its "version" when new services are needed.
+DEFAULT_CATALOG_FILE = os.path.join(
+    os.path.dirname(__file__), "data", "iam-actions.json"
+)
+
+
+def is_pattern(action):
+    return "*" in action or "?" in action
+
+
+@lru_cache(maxsize=65536)
+def pattern_subsumes(general, specific):
+    """
+    True when every action matched by `specific` is also matched by `general`.
+    Both may contain IAM wildcards (* and ?). The check only relies on the
+    patterns themselves, so it stays correct when AWS adds new actions.
+    """
+    general = general.lower()
+    specific = specific.lower()
+
+    # reachable[j] is True when general[:i] can cover specific[:j]
+    reachable = [True] + [False] * len(specific)
+    for g in general:
+        next_reachable = [False] * (len(specific) + 1)
+        for j in range(len(specific) + 1):
+            if g == "*":
+                # '*' covers an empty suffix or any symbol, including another '*'
+                next_reachable[j] = reachable[j] or (j > 0 and next_reachable[j - 1])
+            elif j > 0 and reachable[j - 1]:
+                s = specific[j - 1]
+                if g == "?":
+                    next_reachable[j] = s != "*"
+                else:
+                    next_reachable[j] = s == g
+        reachable = next_reachable
+    return reachable[len(specific)]
+
+
+class ActionTrie:
+    """
+    Prefix trie of lowercase action names that can be searched with IAM wildcards
+    """
+
+    def __init__(self):
+        self._root = {}
+
+    def insert(self, action, value=None):
+        node = self._root
+        for char in action.lower():
+            node = node.setdefault(char, {})
+        node[None] = action if value is None else value
+
+    def get(self, action):
+        node = self._root
+        for char in action.lower():
+            node = node.get(char)
+            if node is None:
+                return None
+        return node.get(None)
+
+    def match(self, pattern):
+        """
+        Return the stored values whose action is matched by the pattern
+        """
+        pattern = pattern.lower()
+        results = []
+        visited = set()
+        stack = [(self._root, 0)]
+        while stack:
+            node, index = stack.pop()
+            if (id(node), index) in visited:
+                continue
+            visited.add((id(node), index))
+
+            if index == len(pattern):
+                if None in node:
+                    results.append(node[None])
+                continue
+
+            char = pattern[index]
+            if char == "*":
+                stack.append((node, index + 1))
+                stack.extend((child, index) for key, child in node.items() if key)
+            elif char == "?":
+                stack.extend((child, index + 1) for key, child in node.items() if key)
+            elif char in node:
+                stack.append((node[char], index + 1))
+        return results
+
+
+class ActionCatalog:
+    """
+    Versioned list of known IAM actions, indexed as a prefix trie
+    """
+
+    def __init__(self, version, services):
+        self.version = version
+        self.services = {service.lower() for service in services}
+        self._trie = ActionTrie()
+        for service, actions in services.items():
+            for action in actions:
+                self._trie.insert(f"{service}:{action}")
+
+    @classmethod
+    def from_file(cls, file_path=DEFAULT_CATALOG_FILE):
+        with open(file_path, "r") as f:
+            data = json.load(f)
+        return cls(data["version"], data["services"])
+
+    def canonical(self, action):
+        """
+        Return the catalog spelling of a known action, or the action unchanged
+        """
+        return self._trie.get(action) or action
+
+    def is_known(self, action):
+        return self._trie.get(action) is not None
+
+    def expand(self, pattern):
+        """
+        Return the known actions matched by a wildcard pattern
+        """
+        return sorted(self._trie.match(pattern))
+
+
+_default_catalog = None
+_default_catalog_lock = threading.Lock()
+
+
+def default_catalog():
+    global _default_catalog
+    with _default_catalog_lock:
+        if _default_catalog is None:
+            _default_catalog = ActionCatalog.from_file()
+        return _default_catalog
+
+
+def remove_subsumed_actions(actions, catalog=None):
+    """
+    Drop actions already covered by a wildcard of the same list, keeping order.
+    IAM action names are case-insensitive, so duplicates differing only in case
+    are dropped too and known actions take their catalog spelling.
+    """
+    catalog = catalog or default_catalog()
+
+    unique_actions = []
+    seen = set()
+    for action in actions:
+        action = catalog.canonical(action)
+        if action.lower() in seen:
+            continue
+        seen.add(action.lower())
+        unique_actions.append(action)
+        if not is_pattern(action) and not catalog.is_known(action):
+            service = action.split(":")[0].lower()
+            if service in catalog.services:
+                logger.debug(
+                    "Action %s is not in the action catalog %s", action, catalog.version
+                )
+
+    patterns = [action for action in unique_actions if is_pattern(action)]
+    literals = ActionTrie()
+    for action in unique_actions:
+        if not is_pattern(action):
+            literals.insert(action)
+
+    redundant = set()
+    for pattern in patterns:
+        redundant.update(action.lower() for action in literals.match(pattern))
+        for other in patterns:
+            if other != pattern and pattern_subsumes(other, pattern):
+                # Of two equivalent patterns keep the first one
+                if not pattern_subsumes(pattern, other) or unique_actions.index(
+                    other
+                ) < unique_actions.index(pattern):
+                    redundant.add(pattern.lower())
+                    break
+
+    return [action for action in unique_actions if action.lower() not in redundant]
@@ -0,0 +1,237 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+from botocore.exceptions import ClientError
+
+from policyengine import clients
+
+logger = logging.getLogger(__name__)
+
+# Default retention for cached Access Analyzer results
+DEFAULT_TTL_SECONDS = 7 * 24 * 60 * 60
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+
+# Error codes of a GetObject on a missing key; without s3:ListBucket S3 answers 403
+MISSING_OBJECT_CODES = {"NoSuchKey", "404", "403", "AccessDenied"}
+
+
+def canonical_json(document):
+    """
+    Serialize a document with sorted keys and no whitespace so equal policies hash equally
+    """
+    return json.dumps(document, sort_keys=True, separators=(",", ":"))
+
+
+def normalize_security_gate(security_gate):
+    """
+    SECURITY_GATE can be a list or the JSON string set by CodeBuild
+    """
+    if isinstance(security_gate, str):
+        try:
+            security_gate = json.loads(security_gate)
+        except json.JSONDecodeError:
+            return security_gate
+    if isinstance(security_gate, (list, tuple, set)):
+        return sorted(security_gate)
+    return security_gate
+
+
+class DiskBackend:
+    """
+    Stores cache entries as files in a local directory. It is also the local
+    stand-in for the object store backend.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key):
+        try:
+            with open(self._path(key), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def put(self, key, data):
+        # Write to a temporary file first so concurrent readers never see partial entries
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, self._path(key))
+
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def entries(self):
+        """
+        Return (key, size, last_modified) for every entry
+        """
+        result = []
+        for file_name in os.listdir(self.directory):
+            if not file_name.endswith(".json"):
+                continue
+            stat = os.stat(os.path.join(self.directory, file_name))
+            result.append((file_name[: -len(".json")], stat.st_size, stat.st_mtime))
+        return result
+
+
+class S3Backend:
+    """
+    Stores cache entries as objects under a prefix of the pipeline artifacts bucket
+    """
+
+    def __init__(self, bucket, prefix="cache/access-analyzer/", client=None):
+        self.bucket = bucket
+        self.prefix = prefix
+        self.client = client or clients.get_client("s3")
+
+    def get(self, key):
+        try:
+            response = self.client.get_object(Bucket=self.bucket, Key=self.prefix + key)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in MISSING_OBJECT_CODES:
+                return None
+            raise
+        return response["Body"].read()
+
+    def put(self, key, data):
+        self.client.put_object(Bucket=self.bucket, Key=self.prefix + key, Body=data)
+
+    def delete(self, key):
+        self.client.delete_object(Bucket=self.bucket, Key=self.prefix + key)
+
+    def entries(self):
+        result = []
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self.prefix):
+            for item in page.get("Contents", []):
+                result.append(
+                    (
+                        item["Key"][len(self.prefix) :],
+                        item["Size"],
+                        item["LastModified"].timestamp(),
+                    )
+                )
+        return result
+
+
+class ValidationCache:
+    """
+    Content-addressed cache for Access Analyzer results. Entries are keyed by a
+    hash of the canonical policy documents, the policy type and the security gate.
+    """
+
+    def __init__(
+        self, backend, ttl_seconds=DEFAULT_TTL_SECONDS, max_bytes=DEFAULT_MAX_BYTES
+    ):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(operation, policy_type, security_gate, *documents):
+        payload = {
+            "operation": operation,
+            "policyType": policy_type,
+            "securityGate": normalize_security_gate(security_gate),
+            "documents": [
+                json.loads(document) if isinstance(document, str) else document
+                for document in documents
+            ],
+        }
+        return hashlib.sha256(canonical_json(payload).encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        data = self.backend.get(key)
+        entry = None
+        if data is not None:
+            try:
+                entry = json.loads(data)
+            except json.JSONDecodeError:
+                logger.warning("Ignoring corrupted cache entry %s", key)
+
+        if entry is not None and time.time() - entry["created"] > self.ttl_seconds:
+            self.backend.delete(key)
+            entry = None
+
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return None if entry is None else entry["value"]
+
+    def put(self, key, value):
+        entry = {"created": time.time(), "value": value}
+        self.backend.put(key, canonical_json(entry).encode("utf-8"))
+
+    def evict(self):
+        """
+        Remove expired entries, then the oldest ones until the cache fits in max_bytes.
+        Returns the number of entries evicted by size.
+        """
+        now = time.time()
+        entries = []
+        for key, size, last_modified in self.backend.entries():
+            if now - last_modified > self.ttl_seconds:
+                self.backend.delete(key)
+            else:
+                entries.append((last_modified, key, size))
+
+        total_size = sum(size for _, _, size in entries)
+        evicted = 0
+        for _, key, size in sorted(entries):
+            if total_size <= self.max_bytes:
+                break
+            self.backend.delete(key)
+            total_size -= size
+            evicted += 1
+        return evicted
+
+
+def from_environment(client_registry=None):
+    """
+    Build the validation cache configured by the VALIDATION_CACHE* environment variables.
+    Returns None when caching is disabled.
+    """
+    mode = os.getenv("VALIDATION_CACHE", "off").lower()
+    ttl_seconds = int(os.getenv("VALIDATION_CACHE_TTL", DEFAULT_TTL_SECONDS))
+    max_bytes = int(os.getenv("VALIDATION_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES))
+
+    if mode == "off":
+        return None
+    elif mode == "disk":
+        backend = DiskBackend(
+            os.getenv(
+                "VALIDATION_CACHE_DIR",
+                os.path.expanduser("~/.cache/org-policy-pipeline/access-analyzer"),
+            )
+        )
+    elif mode == "s3":
+        backend = S3Backend(
+            os.environ["VALIDATION_CACHE_BUCKET"],
+            os.getenv("VALIDATION_CACHE_PREFIX", "cache/access-analyzer/"),
+            (client_registry or clients.default_registry()).client("s3"),
+        )
+    else:
+        raise ValueError(f"Invalid VALIDATION_CACHE mode: {mode}")
+
+    return ValidationCache(backend, ttl_seconds, max_bytes)
@@ -0,0 +1,112 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import concurrent.futures
+import logging
+from collections import OrderedDict
+
+from policyengine import clients, deadlines, terraform, timing
+from policyengine.policytypes import get_policy_type
+
+logger = logging.getLogger(__name__)
+
+
+class LiveAttachments:
+    """
+    Policies of a type currently attached to each target, read with
+    list_policies_for_target. Targets are listed concurrently, every page read.
+    """
+
+    def __init__(self, max_workers=4, client=None, client_registry=None):
+        self.max_workers = max(1, max_workers)
+        self._client = client
+        self._client_registry = client_registry
+
+    def _get_client(self):
+        if self._client is None:
+            registry = self._client_registry or clients.default_registry()
+            self._client = registry.client("organizations")
+        return self._client
+
+    def _list_policies(self, policy_type, target_id):
+        client = self._get_client()
+        policies = []
+        paginator = client.get_paginator("list_policies_for_target")
+        try:
+            for page in paginator.paginate(
+                TargetId=target_id, Filter=policy_type.organizations_type
+            ):
+                for policy in page["Policies"]:
+                    policies.append({"Id": policy["Id"], "Name": policy["Name"]})
+        except client.exceptions.TargetNotFoundException:
+            return None
+        return policies
+
+    def policies_for_targets(self, policy_type, target_ids, deadline=None):
+        """
+        Return {target_id: [{"Id", "Name"}]}, None for targets Organizations does not know
+        """
+        policy_type = get_policy_type(policy_type)
+
+        def list_policies(target_id):
+            with timing.span("ListPoliciesForTarget", "aws"):
+                return deadlines.call(
+                    deadline,
+                    "ListPoliciesForTarget",
+                    lambda: self._list_policies(policy_type, target_id),
+                    idempotent=True,
+                )
+
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.max_workers
+        ) as executor:
+            return dict(zip(target_ids, executor.map(list_policies, target_ids)))
+
+
+def attachment_report(policy_type, output, live):
+    """
+    Return the attachments each target of a PolicyEngine.build() output will have
+    once Terraform applies it: {target_id: {"Kept", "Desired", "Total", "Quota"}}.
+    Live policies created by this pipeline are replaced by the desired ones, every
+    other live policy (FullAWSAccess, policies managed elsewhere) keeps its slot.
+    "Kept" is None for targets missing from live.
+    """
+    policy_type = get_policy_type(policy_type)
+    prefix = terraform.managed_name_prefix(policy_type)
+
+    desired = OrderedDict()
+    for sid, target_id in output["attachments"]:
+        desired.setdefault(target_id, []).append(sid)
+
+    report = OrderedDict()
+    for target_id, sids in desired.items():
+        policies = live.get(target_id)
+        kept = (
+            None
+            if policies is None
+            else [
+                policy["Name"]
+                for policy in policies
+                if not policy["Name"].startswith(prefix)
+            ]
+        )
+        report[target_id] = OrderedDict(
+            [
+                ("Kept", kept),
+                ("Desired", sids),
+                ("Total", len(kept or []) + len(sids)),
+                ("Quota", policy_type.max_attachments),
+            ]
+        )
+    return report
+
+
+def over_quota(report):
+    """
+    Return the (target_id, entry) pairs of a report above the quota
+    """
+    return [
+        (target_id, entry)
+        for target_id, entry in report.items()
+        if entry["Total"] > entry["Quota"]
+    ]
@@ -0,0 +1,134 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import concurrent.futures
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+from policyengine import cache
+
+logger = logging.getLogger(__name__)
+
+
+class CatalogEntry:
+    """
+    A parsed guardrail or policy file. Guardrail files hold a list of statements,
+    policy files a full policy document.
+    """
+
+    def __init__(self, path, mtime_ns, size, digest, content):
+        self.path = path
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.digest = digest
+        self.content = content
+
+        if isinstance(content, list):
+            raw_statements = content
+        elif isinstance(content, dict):
+            raw_statements = content.get("Statement", [])
+        else:
+            raw_statements = []
+
+        # Statements are stored without their SID, ready to be merged
+        self.statements = [
+            OrderedDict((k, v) for k, v in statement.items() if k.lower() != "sid")
+            for statement in raw_statements
+        ]
+        self.statement_hashes = [
+            hashlib.sha256(cache.canonical_json(statement).encode("utf-8")).hexdigest()
+            for statement in self.statements
+        ]
+
+
+class GuardrailCatalog:
+    """
+    Loads the guardrails/ and policies/ folders once, in parallel, and serves
+    their parsed statements from memory. Entries are revalidated by mtime and
+    content hash by refresh(), so a long-lived engine picks up edited files.
+    """
+
+    def __init__(self, max_workers=4):
+        self.max_workers = max(1, max_workers)
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def _read(self, path):
+        stat = os.stat(path)
+        with open(path, "rb") as f:
+            data = f.read()
+        digest = hashlib.sha256(data).hexdigest()
+        try:
+            content = json.loads(data, object_pairs_hook=OrderedDict)
+        except json.JSONDecodeError:
+            logger.error("[!] Error: %s is not a valid file.", path)
+            content = None
+        return CatalogEntry(path, stat.st_mtime_ns, stat.st_size, digest, content)
+
+    def load_folder(self, folder):
+        """
+        Parse every JSON file of a folder concurrently
+        """
+        if not os.path.isdir(folder):
+            return
+        paths = [
+            os.path.normpath(os.path.join(folder, file_name))
+            for file_name in sorted(os.listdir(folder))
+            if file_name.endswith(".json")
+        ]
+        paths = [path for path in paths if path not in self._entries]
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.max_workers
+        ) as executor:
+            for entry in executor.map(self._read, paths):
+                with self._lock:
+                    self._entries[entry.path] = entry
+        logger.info("Loaded %d file(s) from %s into the catalog", len(paths), folder)
+
+    def get(self, path):
+        """
+        Return the entry of a file, loading it on first use
+        """
+        path = os.path.normpath(path)
+        entry = self._entries.get(path)
+        if entry is None:
+            entry = self._read(path)
+            with self._lock:
+                self._entries[path] = entry
+        return entry
+
+    def digest(self, path):
+        """
+        Content hash of a file, or None when it does not exist
+        """
+        try:
+            return self.get(path).digest
+        except FileNotFoundError:
+            return None
+
+    def refresh(self):
+        """
+        Reload files whose mtime or size changed and drop deleted ones.
+        Returns the paths whose content actually changed.
+        """
+        changed = []
+        for path, entry in list(self._entries.items()):
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                with self._lock:
+                    del self._entries[path]
+                changed.append(path)
+                continue
+            if stat.st_mtime_ns == entry.mtime_ns and stat.st_size == entry.size:
+                continue
+            new_entry = self._read(path)
+            with self._lock:
+                self._entries[path] = new_entry
+            if new_entry.digest != entry.digest:
+                changed.append(path)
+        return changed
@@ -0,0 +1,75 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import threading
+
+import boto3
+from botocore.config import Config
+
+from policyengine import ratelimit
+
+# Retries to handle throttling, shared by every client of the pipeline. The rate
+# limiters slow callers down on throttling, so a bounded number of attempts is
+# enough, and a call abandoned at its deadline stops retrying soon after.
+RETRIES = {"max_attempts": 50, "mode": "adaptive"}
+
+# botocore keeps 10 connections per client by default
+DEFAULT_POOL_SIZE = 10
+
+
+class ClientRegistry:
+    """
+    Thread-safe cache of boto3 clients created from a single session, one per
+    service and region. Clients are thread-safe, so every worker shares them and
+    their connection pools instead of paying for new clients and TLS handshakes.
+    """
+
+    def __init__(self, pool_size=DEFAULT_POOL_SIZE, session=None):
+        self.pool_size = max(DEFAULT_POOL_SIZE, pool_size)
+        self.config = Config(retries=RETRIES, max_pool_connections=self.pool_size)
+        self._session = session
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_concurrency(cls, max_workers, calls_per_worker=3, **kwargs):
+        """
+        Size the connection pools for max_workers workers issuing calls_per_worker
+        concurrent calls each
+        """
+        return cls(pool_size=max(1, max_workers) * calls_per_worker, **kwargs)
+
+    def client(self, service, region_name=None):
+        with self._lock:
+            if self._session is None:
+                # boto3.Session is not thread-safe to create clients from, hence the lock
+                self._session = boto3.Session()
+            key = (service, region_name)
+            if key not in self._clients:
+                # Calls of every client of a service share one process-wide rate limit
+                self._clients[key] = ratelimit.attach(
+                    self._session.client(
+                        service, region_name=region_name, config=self.config
+                    ),
+                    service,
+                )
+            return self._clients[key]
+
+
+_default_registry = None
+_default_registry_lock = threading.Lock()
+
+
+def default_registry():
+    global _default_registry
+    with _default_registry_lock:
+        if _default_registry is None:
+            _default_registry = ClientRegistry()
+        return _default_registry
+
+
+def get_client(service, region_name=None):
+    """
+    Return the shared client of a service from the default registry
+    """
+    return default_registry().client(service, region_name)
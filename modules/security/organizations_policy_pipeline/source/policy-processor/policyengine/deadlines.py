@@ -0,0 +1,138 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import concurrent.futures
+import logging
+import os
+import threading
+import time
+
+from policyengine.errors import DeadlineExceeded
+
+logger = logging.getLogger(__name__)
+
+
+class Deadline:
+    """
+    Wall-clock budget of a run plus the deadline of every AWS call made within it.
+    A call gets the smaller of call_timeout and the time left in the run. Idempotent
+    reads still running after hedge_after seconds are sent a second time and the
+    first answer wins.
+    """
+
+    def __init__(self, budget_seconds=None, call_timeout=None, hedge_after=None):
+        self.budget_seconds = budget_seconds or None
+        self.call_timeout = call_timeout or None
+        self.hedge_after = hedge_after or None
+        self.hedged_calls = 0
+        self._started = time.monotonic()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_environment(cls):
+        """
+        Build the deadline configured by RUN_TIME_BUDGET, CALL_TIMEOUT and HEDGE_AFTER (seconds)
+        """
+        return cls(
+            float(os.getenv("RUN_TIME_BUDGET", "0")),
+            float(os.getenv("CALL_TIMEOUT", "0")),
+            float(os.getenv("HEDGE_AFTER", "0")),
+        )
+
+    def remaining(self):
+        """
+        Seconds left in the run, None when the run is not bounded
+        """
+        if self.budget_seconds is None:
+            return None
+        return self.budget_seconds - (time.monotonic() - self._started)
+
+    def check(self, what, sid=None):
+        """
+        Raise DeadlineExceeded when the run budget is spent
+        """
+        remaining = self.remaining()
+        if remaining is not None and remaining <= 0:
+            raise DeadlineExceeded(
+                f"Run budget of {self.budget_seconds:g}s exhausted before {what}{_for_sid(sid)}"
+            )
+
+    def call(self, api, fn, sid=None, idempotent=False):
+        """
+        Run fn, an AWS call, and raise DeadlineExceeded naming the API and SID when
+        it does not return in time
+        """
+        self.check(api, sid)
+        timeouts = [t for t in (self.remaining(), self.call_timeout) if t is not None]
+        timeout = min(timeouts) if timeouts else None
+        hedge_after = self.hedge_after if idempotent else None
+
+        if timeout is None and hedge_after is None:
+            return fn()
+
+        started = time.monotonic()
+        futures = [_start(fn)]
+        if hedge_after is not None and (timeout is None or hedge_after < timeout):
+            done, _ = concurrent.futures.wait(futures, timeout=hedge_after)
+            if not done:
+                logger.info(
+                    "%s%s slower than %gs, sending a hedged request",
+                    api,
+                    _for_sid(sid),
+                    hedge_after,
+                )
+                with self._lock:
+                    self.hedged_calls += 1
+                futures.append(_start(fn))
+
+        pending = set(futures)
+        while True:
+            left = (
+                None
+                if timeout is None
+                else max(0, timeout - (time.monotonic() - started))
+            )
+            done, pending = concurrent.futures.wait(
+                pending, timeout=left, return_when=concurrent.futures.FIRST_COMPLETED
+            )
+            if not done:
+                # The abandoned call keeps running in a daemon thread until botocore gives up
+                raise DeadlineExceeded(
+                    f"{api}{_for_sid(sid)} did not complete within {timeout:.3g}s"
+                )
+            # A failed hedged request still leaves the other one a chance to answer
+            for future in futures:
+                if future in done and future.exception() is None:
+                    return future.result()
+            if not pending:
+                # Every request failed, report the error of the first one
+                return futures[0].result()
+
+
+def _for_sid(sid):
+    return f" for SID {sid}" if sid else ""
+
+
+def _start(fn):
+    """
+    Run fn in a daemon thread so a call that outlives its deadline never blocks exit
+    """
+    future = concurrent.futures.Future()
+
+    def run():
+        try:
+            future.set_result(fn())
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=run, daemon=True).start()
+    return future
+
+
+def call(deadline, api, fn, sid=None, idempotent=False):
+    """
+    Run fn under a deadline, or directly when there is none
+    """
+    if deadline is None:
+        return fn()
+    return deadline.call(api, fn, sid, idempotent)
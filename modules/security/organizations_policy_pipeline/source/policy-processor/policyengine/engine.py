@@ -0,0 +1,648 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import concurrent.futures
+import functools
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+from policyengine import (
+    cache,
+    capacity,
+    catalog,
+    clients,
+    deadlines,
+    grammar,
+    manifest,
+    mergeandoptimize,
+    organization,
+    ratelimit,
+    terraform,
+    timing,
+)
+from policyengine.errors import (
+    AttachmentQuotaExceeded,
+    DeadlineExceeded,
+    PolicyProcessingError,
+)
+from policyengine.policytypes import get_policy_type
+
+logger = logging.getLogger(__name__)
+
+ENVIRONMENT_FILE_NAME = "environments.json"
+DEFAULT_SECURITY_GATE = ["ERROR", "SECURITY_WARNING"]
+
+
+class PolicyEngine:
+    """
+    Builds the SCP and RCP documents of a policy repository. One engine shares its
+    AWS clients, caches and organization data between every policy type it builds.
+    """
+
+    def __init__(
+        self,
+        repository_root,
+        security_gate=DEFAULT_SECURITY_GATE,
+        max_workers=1,
+        validation_cache=None,
+        manifest_backend=None,
+        account_tag_index=None,
+        access_analyzer_client=None,
+        guardrail_catalog=None,
+        client_registry=None,
+        deadline=None,
+        live_attachments=None,
+        capacity_check=True,
+    ):
+        self.repository_root = repository_root
+        self.security_gate = security_gate
+        self.max_workers = max(1, max_workers)
+        self.validation_cache = validation_cache
+        self.manifest_backend = manifest_backend
+        self.client_registry = (
+            client_registry or clients.ClientRegistry.for_concurrency(self.max_workers)
+        )
+        self.account_tag_index = account_tag_index or organization.AccountTagIndex(
+            client_registry=self.client_registry
+        )
+        self.live_attachments = live_attachments or capacity.LiveAttachments(
+            client_registry=self.client_registry
+        )
+        self.capacity_check = capacity_check
+        self.guardrail_catalog = guardrail_catalog or catalog.GuardrailCatalog()
+        self.deadline = deadline
+        self._access_analyzer_client = access_analyzer_client
+        self._client_lock = threading.Lock()
+        self._environments = None
+
+    @classmethod
+    def from_environment(cls, repository_root, **kwargs):
+        """
+        Create an engine configured like the CodeBuild project, from environment variables
+        """
+        kwargs.setdefault(
+            "security_gate", os.getenv("SECURITY_GATE", DEFAULT_SECURITY_GATE)
+        )
+        kwargs.setdefault("max_workers", int(os.getenv("MAX_WORKERS", "1")))
+        kwargs.setdefault("deadline", deadlines.Deadline.from_environment())
+        tag_lookup_workers = int(os.getenv("TAG_LOOKUP_WORKERS", "4"))
+        # Pools sized for every statement worker issuing its Access Analyzer calls
+        # at once, or for the tag lookups, whichever needs more connections
+        kwargs.setdefault(
+            "client_registry",
+            clients.ClientRegistry(
+                pool_size=max(kwargs["max_workers"] * 3, tag_lookup_workers)
+            ),
+        )
+        kwargs.setdefault(
+            "validation_cache", cache.from_environment(kwargs["client_registry"])
+        )
+        kwargs.setdefault(
+            "manifest_backend",
+            manifest.backend_from_environment(kwargs["client_registry"]),
+        )
+        kwargs.setdefault(
+            "account_tag_index",
+            organization.AccountTagIndex(
+                tag_lookup_workers,
+                client_registry=kwargs["client_registry"],
+                snapshot_file=os.getenv("ORG_SNAPSHOT_FILE"),
+                snapshot_ttl=int(
+                    os.getenv("ORG_SNAPSHOT_TTL", organization.DEFAULT_SNAPSHOT_TTL)
+                ),
+            ),
+        )
+        kwargs.setdefault(
+            "live_attachments",
+            capacity.LiveAttachments(
+                tag_lookup_workers, client_registry=kwargs["client_registry"]
+            ),
+        )
+        kwargs.setdefault(
+            "capacity_check", os.getenv("CAPACITY_CHECK", "on").lower() != "off"
+        )
+        return cls(repository_root, **kwargs)
+
+    @property
+    def access_analyzer_client(self):
+        with self._client_lock:
+            if self._access_analyzer_client is None:
+                self._access_analyzer_client = self.client_registry.client(
+                    "accessanalyzer"
+                )
+            return self._access_analyzer_client
+
+    def _path(self, *parts):
+        return os.path.join(self.repository_root, *parts)
+
+    def guardrail_folder(self, policy_type):
+        return self._path(policy_type.folder, "guardrails") + "/"
+
+    def policy_folder(self, policy_type):
+        return self._path(policy_type.folder, "policies") + "/"
+
+    def load_environments(self):
+        """
+        Load environments.json once and share it between policy types
+        """
+        if self._environments is None:
+            with open(self._path("environments", ENVIRONMENT_FILE_NAME), "r") as f:
+                self._environments = json.load(f)
+        return self._environments
+
+    def load_statements(self, policy_type):
+        """
+        Load the management file of a policy type and check that SIDs are unique
+        """
+        policy_type = get_policy_type(policy_type)
+        with open(self._path(policy_type.folder, policy_type.management_file)) as f:
+            data = json.load(f)
+
+        sid_set = set()
+        for item in data:
+            sid = item.get("SID")
+            if sid in sid_set:
+                logger.error(
+                    "[!] SIDs are not unique. Please, review %s file.",
+                    policy_type.management_file,
+                )
+                raise PolicyProcessingError(f"Duplicated SID: {sid}")
+            sid_set.add(sid)
+        logger.info("SIDs are unique")
+        return data
+
+    def build(self, policy_type):
+        """
+        Return the output document of a policy type: {"policies": {sid: {comments, policy}},
+        "attachments": [[sid, target_id], ...]}. Statements are processed in a bounded
+        worker pool and returned in manifest order.
+        """
+        policy_type = get_policy_type(policy_type)
+        banner = f"# Starting {policy_type.label} Policy Processor #"
+        logger.info("#" * len(banner))
+        logger.info(banner)
+        logger.info("#" * len(banner) + "\n")
+
+        with timing.span(f"{policy_type.name}.load"):
+            data = self.load_statements(policy_type)
+            environment_ou_list = self.load_environments()
+
+            # Parse guardrails and policies once; files edited since the last build are reloaded
+            self.guardrail_catalog.refresh()
+            self.guardrail_catalog.load_folder(self.guardrail_folder(policy_type))
+            self.guardrail_catalog.load_folder(self.policy_folder(policy_type))
+
+        # Fail on malformed guardrails and policies before any network call
+        with timing.span(f"{policy_type.name}.prevalidate"):
+            self.prevalidate(policy_type, data)
+
+        build_manifest = None
+        if self.manifest_backend is not None:
+            build_manifest = manifest.BuildManifest(
+                self.manifest_backend, f"{policy_type.name}-manifest"
+            )
+
+        # Results are stored by the statement index so the output keeps the
+        # order of the management file.
+        logger.info(
+            "Processing %d statements with %d worker(s)", len(data), self.max_workers
+        )
+        cancel_event = threading.Event()
+        results = [None] * len(data)
+
+        with timing.span(f"{policy_type.name}.statements"):
+            with concurrent.futures.ThreadPoolExecutor(
+                max_workers=self.max_workers
+            ) as executor:
+                futures = {
+                    executor.submit(
+                        self.process_statement,
+                        policy_type,
+                        statement,
+                        environment_ou_list,
+                        build_manifest,
+                        cancel_event,
+                    ): index
+                    for index, statement in enumerate(data)
+                }
+                done, not_done = concurrent.futures.wait(
+                    futures, return_when=concurrent.futures.FIRST_EXCEPTION
+                )
+
+                if any(future.exception() is not None for future in done):
+                    # Stop queued statements and let running ones finish their current call
+                    cancel_event.set()
+                    for future in not_done:
+                        future.cancel()
+
+        # Statements still running when the first failure was seen have finished
+        # by now; report the failure that comes first in the management file
+        failed = [
+            future
+            for future in futures
+            if not future.cancelled() and future.exception() is not None
+        ]
+        if failed:
+            first_failure = min(failed, key=lambda future: futures[future])
+            raise first_failure.exception()
+
+        for future, index in futures.items():
+            results[index] = future.result()
+
+        if build_manifest is not None:
+            build_manifest.save()
+            logger.info(
+                "Incremental build: %d SID(s) reused, %d SID(s) rebuilt",
+                build_manifest.reused,
+                build_manifest.rebuilt,
+            )
+
+        # Policy bodies are stored once per SID, targets only reference them
+        output = OrderedDict([("policies", OrderedDict()), ("attachments", [])])
+        attached = set()
+        for result in results:
+            for sid, policy in result["policies"].items():
+                if sid in output["policies"]:
+                    raise PolicyProcessingError(
+                        f"SID {sid} is produced by more than one statement"
+                    )
+                output["policies"][sid] = policy
+            for attachment in result["attachments"]:
+                if tuple(attachment) not in attached:
+                    attached.add(tuple(attachment))
+                    output["attachments"].append(attachment)
+        return output
+
+    def prevalidate(self, policy_type, data):
+        """
+        Check every guardrail and policy referenced by the management file against
+        the policy grammar and report all problems at once
+        """
+        policy_type = get_policy_type(policy_type)
+
+        files = {}
+        for statement in data:
+            for name in statement.get("Guardrails", []):
+                files.setdefault(
+                    f"{self.guardrail_folder(policy_type)}{name}.json", False
+                )
+            if statement.get("Policy"):
+                files.setdefault(
+                    f"{self.policy_folder(policy_type)}{statement['Policy']}.json", True
+                )
+
+        problems = []
+        for path, is_policy in files.items():
+            try:
+                content = self.guardrail_catalog.get(path).content
+            except FileNotFoundError:
+                problems.append(f"{path}: file not found")
+                continue
+            if content is None:
+                problems.append(f"{path}: not a valid JSON file")
+            elif is_policy:
+                problems.extend(
+                    f"{path}: {problem}"
+                    for problem in grammar.check_document(content, policy_type)
+                )
+            elif not isinstance(content, list):
+                problems.append(
+                    f"{path}: guardrail files must hold a list of statements"
+                )
+            else:
+                problems.extend(
+                    f"{path}: {problem}"
+                    for problem in grammar.check_statements(content, policy_type)
+                )
+
+        if problems:
+            for problem in problems:
+                logger.error("[!] %s", problem)
+            raise PolicyProcessingError(
+                f"{len(problems)} problem(s) found in {policy_type.label} guardrails and policies"
+            )
+        logger.info(
+            "%d %s file(s) passed the local grammar checks",
+            len(files),
+            policy_type.label,
+        )
+
+    def check_capacity(self, policy_type, output):
+        """
+        Count the policies every target of an output will have attached after
+        Terraform applies it, from the desired attachments and the live ones, and
+        fail before anything is written when a target goes over the quota.
+        Returns the per-target report, None when the check is disabled.
+        """
+        policy_type = get_policy_type(policy_type)
+        if not self.capacity_check:
+            return None
+
+        with timing.span(f"{policy_type.name}.capacity"):
+            target_ids = list(
+                OrderedDict.fromkeys(
+                    target_id for _, target_id in output["attachments"]
+                )
+            )
+            live = self.live_attachments.policies_for_targets(
+                policy_type, target_ids, self.deadline
+            )
+            report = capacity.attachment_report(policy_type, output, live)
+
+        for target_id, entry in report.items():
+            if entry["Kept"] is None:
+                logger.warning(
+                    "[!] Target %s not found in Organizations, only its %d desired %s(s) are counted",
+                    target_id,
+                    len(entry["Desired"]),
+                    policy_type.label,
+                )
+
+        over = capacity.over_quota(report)
+        for target_id, entry in over:
+            logger.error(
+                "[!] Target %s would have %d %s(s) attached, over the quota of %d: kept %s, from this pipeline %s",
+                target_id,
+                entry["Total"],
+                policy_type.label,
+                entry["Quota"],
+                entry["Kept"],
+                entry["Desired"],
+            )
+        if over:
+            raise AttachmentQuotaExceeded(
+                f"{len(over)} target(s) over the quota of {policy_type.max_attachments} {policy_type.label}s per target",
+                report,
+            )
+
+        fullest = max((entry["Total"] for entry in report.values()), default=0)
+        logger.info(
+            "%d target(s) within the quota of %d %s(s), the fullest has %d",
+            len(report),
+            policy_type.max_attachments,
+            policy_type.label,
+            fullest,
+        )
+        return report
+
+    def write(self, policy_type, output, output_folder):
+        """
+        Write the output built for a policy type, and the Terraform resources
+        created from it, to the Terraform folder
+        """
+        policy_type = get_policy_type(policy_type)
+        with timing.span(f"{policy_type.name}.write"):
+            with open(os.path.join(output_folder, policy_type.output_file), "w") as o:
+                json.dump(output, o)
+            with open(
+                os.path.join(output_folder, policy_type.terraform_file), "w"
+            ) as o:
+                json.dump(terraform.render_resources(policy_type, output), o, indent=2)
+
+    def close(self):
+        """
+        Apply cache eviction and report cache and API usage at the end of a run
+        """
+        if self.deadline is not None and self.deadline.hedged_calls:
+            logger.info("Hedged requests sent: %d", self.deadline.hedged_calls)
+        for family, counters in ratelimit.stats().items():
+            logger.info(
+                "Rate limiter %s: %d call(s), %d throttle(s), %ss waited, %s call(s)/s at the end",
+                family,
+                counters["calls"],
+                counters["throttles"],
+                counters["waitedSeconds"],
+                counters["rate"],
+            )
+        if self.validation_cache is not None:
+            evicted = self.validation_cache.evict()
+            logger.info(
+                "Validation cache: %d hit(s), %d miss(es), %d entry(ies) evicted",
+                self.validation_cache.hits,
+                self.validation_cache.misses,
+                evicted,
+            )
+
+    def process_statement(
+        self, policy_type, statement, environment_ou_list, build_manifest, cancel_event
+    ):
+        """
+        Function to build the policies and attachments of a single statement
+        """
+
+        if cancel_event.is_set():
+            raise PolicyProcessingError("Processing was cancelled")
+        if self.deadline is not None:
+            self.deadline.check("processing", statement.get("SID"))
+
+        if statement == {}:
+            logger.error(
+                "[!] Empty statement found. Please, review %s file.",
+                policy_type.management_file,
+            )
+            raise PolicyProcessingError("Empty statement found")
+        # Every span opened while the statement is processed is attributed to its SID
+        with timing.span("statement", sid=statement["SID"]):
+            logger.info("[*] Processing statement ID: %s", statement["SID"])
+
+            # Reuse the previous optimized policy when none of the SID inputs changed
+            policy_parts = None
+            if build_manifest is not None:
+                input_hash = manifest.statement_input_hash(
+                    statement,
+                    self.guardrail_folder(policy_type),
+                    self.policy_folder(policy_type),
+                    environment_ou_list,
+                    self.security_gate,
+                    self.guardrail_catalog.digest,
+                )
+                policy_parts = build_manifest.lookup(statement["SID"], input_hash)
+                if policy_parts is not None:
+                    logger.info(
+                        "Inputs unchanged for SID %s, reusing previous optimized policy",
+                        statement["SID"],
+                    )
+
+            if policy_parts is None:
+                with timing.span("build"):
+                    policy_parts = self.build_policy(policy_type, statement)
+                if build_manifest is not None:
+                    build_manifest.record(statement["SID"], input_hash, policy_parts)
+
+            # A policy split over several documents is attached as sub-SIDs <SID>-1..n
+            if len(policy_parts) == 1:
+                documents = [(statement["SID"], statement["Comments"], policy_parts[0])]
+            else:
+                documents = [
+                    (
+                        f"{statement['SID']}-{index}",
+                        f"{statement['Comments']} (part {index}/{len(policy_parts)})",
+                        policy_part,
+                    )
+                    for index, policy_part in enumerate(policy_parts, start=1)
+                ]
+
+            with timing.span("targets"):
+                target_ids = self.resolve_targets(statement, environment_ou_list)
+            output = OrderedDict([("policies", OrderedDict()), ("attachments", [])])
+            if target_ids:
+                for sid, comments, policy in documents:
+                    output["policies"][sid] = OrderedDict(
+                        [("comments", comments), ("policy", policy)]
+                    )
+                output["attachments"] = [
+                    [sid, target_id]
+                    for target_id in target_ids
+                    for sid, _, _ in documents
+                ]
+
+            logger.info("[*] Finished statement ID: %s", statement["SID"])
+        return output
+
+    def build_policy(self, policy_type, statement):
+        """
+        Function to merge, optimize and validate the policy of a single statement.
+        Returns the policy documents, more than one when it exceeds the size quota.
+        """
+
+        # Checks if statement is using GUARDRAIL or POLICY
+        if statement["Guardrails"] != []:
+            logger.info(
+                "Guardrails are being used for SID %s: %s",
+                statement["SID"],
+                statement["Guardrails"],
+            )
+            policy_parts = mergeandoptimize.mergeguardrails(
+                statement["Guardrails"],
+                self.guardrail_folder(policy_type),
+                self.security_gate,
+                self.validation_cache,
+                policy_type,
+                self.access_analyzer_client,
+                self.guardrail_catalog,
+                self.deadline,
+                statement["SID"],
+            )
+        elif statement["Policy"] != "":
+            logger.info(
+                "Individual policy is being used for SID %s: %s",
+                statement["SID"],
+                statement["Policy"],
+            )
+            policy_file = (
+                self.policy_folder(policy_type) + str(statement["Policy"]) + ".json"
+            )
+            policy_content = self.guardrail_catalog.get(policy_file).content
+            if policy_content is None:
+                raise PolicyProcessingError(f"{policy_file} is not a valid file")
+
+            # Split before validating so oversized policies fail without network calls
+            policy_parts = mergeandoptimize.split_policy(policy_content, policy_type)
+
+            # Validate individual policy with Access Analyzer
+            logger.info(
+                "Validating individual %s policy '%s' with Access Analyzer",
+                policy_type.label,
+                statement["Policy"],
+            )
+            logger.info("Security Gate: %s", self.security_gate)
+
+            findings_per_part = mergeandoptimize.run_concurrently(
+                [
+                    functools.partial(
+                        mergeandoptimize.validate_policy,
+                        self.access_analyzer_client,
+                        policy_part,
+                        policy_type.organizations_type,
+                        self.security_gate,
+                        self.validation_cache,
+                        self.deadline,
+                        statement["SID"],
+                    )
+                    for policy_part in policy_parts
+                ]
+            )
+            for findings in findings_per_part:
+                mergeandoptimize.check_findings(
+                    findings,
+                    self.security_gate,
+                    f"{policy_type.label} policy {statement['Policy']}",
+                )
+        else:
+            logger.error(
+                "[!] No policy or guardrails found for statement ID: %s",
+                statement["SID"],
+            )
+            raise PolicyProcessingError(
+                f"No policy or guardrails found for SID {statement['SID']}"
+            )
+
+        return policy_parts
+
+    def resolve_targets(self, statement, environment_ou_list):
+        """
+        Return the target IDs (accounts or OUs) a statement is attached to
+        """
+
+        # Checks the target Type
+        if (
+            statement["Target"]["Type"] == "Account"
+            or statement["Target"]["Type"] == "OU"
+        ):
+            logger.info("Target type is %s", statement["Target"]["Type"])
+            return [statement["Target"]["ID"].split(":")[1]]
+        elif statement["Target"]["Type"] == "Environment":
+            logger.info("Target type is %s", statement["Target"]["Type"])
+            targets = []
+            for environment in environment_ou_list:
+                if environment["ID"] == statement["Target"]["ID"]:
+                    logger.info("Environment ID found: %s", environment["ID"])
+                    targets = environment["Target"].copy()
+
+            if targets == []:
+                logger.error(
+                    "Environment ID not found for SID %s: %s",
+                    statement["SID"],
+                    statement["Target"]["ID"],
+                )
+                raise PolicyProcessingError(
+                    f"Environment ID not found for SID {statement['SID']}: {statement['Target']['ID']}"
+                )
+
+            logger.info(
+                "The environment %s has the following targets: %s",
+                statement["Target"]["Type"],
+                targets,
+            )
+            return [each_target.split(":")[1] for each_target in targets]
+        elif statement["Target"]["Type"] == "Tag":
+            logger.info("Target type is %s", statement["Target"]["Type"])
+            return self.get_aws_accounts_by_tag(
+                statement["Target"]["ID"].split(":")[0],
+                statement["Target"]["ID"].split(":")[1],
+                statement["SID"],
+            )
+        else:
+            logger.error("[!] Invalid Target Type: %s", statement["Target"]["Type"])
+            raise PolicyProcessingError(
+                f"Invalid Target Type for SID {statement['SID']}: {statement['Target']['Type']}"
+            )
+
+    def get_aws_accounts_by_tag(self, tag_key, tag_value, sid=None):
+        try:
+            # The index lists the organization once and is reused by every Tag statement
+            return self.account_tag_index.accounts_with_tag(
+                tag_key, tag_value, self.deadline, sid
+            )
+
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            # An empty list would silently drop the policy from the Terraform output
+            logger.error("[!] Error getting accounts by tag: %s", e)
+            raise PolicyProcessingError(
+                f"Could not list the accounts tagged {tag_key}={tag_value} for SID {sid}: {e}"
+            ) from e
@@ -0,0 +1,142 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import json
+import logging
+from collections import OrderedDict
+
+from policyengine.actions import pattern_subsumes
+from policyengine.policytypes import WILDCARD_PRINCIPALS
+
+logger = logging.getLogger(__name__)
+
+# Elements whose value lists are ORed, so their order and duplicates do not matter
+_SET_ELEMENTS = ("Resource", "NotResource")
+
+
+def _as_list(value):
+    if isinstance(value, list):
+        return value
+    return [value]
+
+
+def _normalize_value(value):
+    """
+    Canonical form of a non-action element: lists become sorted sets, dicts are sorted
+    """
+    if isinstance(value, dict):
+        return OrderedDict((k, _normalize_value(v)) for k, v in sorted(value.items()))
+    if isinstance(value, list):
+        return sorted({json.dumps(_normalize_value(v), sort_keys=True) for v in value})
+    return value
+
+
+def _normalize_principal(principal):
+    if principal in WILDCARD_PRINCIPALS:
+        return "*"
+    return _normalize_value(principal)
+
+
+def statement_scope(statement):
+    """
+    Key of everything in a statement except its Action/NotAction list. Statements
+    with the same scope apply to the same requests, so their action lists can be
+    compared as sets of IAM patterns. Like the optimizer, a missing Resource is
+    read as "*" and an empty Condition as none; other missing elements stay
+    distinct from "*".
+    """
+    if "Action" in statement and "NotAction" in statement:
+        kind = "invalid"
+    elif "Action" in statement:
+        kind = "Action"
+    elif "NotAction" in statement:
+        kind = "NotAction"
+    else:
+        kind = "invalid"
+
+    scope = OrderedDict([("kind", kind)])
+    if "Resource" not in statement and "NotResource" not in statement:
+        scope["Resource"] = _normalize_value(["*"])
+    for element, value in sorted(statement.items()):
+        if element.lower() == "sid" or element in ("Action", "NotAction"):
+            continue
+        if element == "Condition" and value == {}:
+            continue
+        if element in _SET_ELEMENTS:
+            scope[element] = _normalize_value(_as_list(value))
+        elif element in ("Principal", "NotPrincipal"):
+            scope[element] = _normalize_principal(value)
+        else:
+            scope[element] = _normalize_value(value)
+    return json.dumps(scope, sort_keys=True)
+
+
+def _actions(statement, element):
+    return [action for action in _as_list(statement.get(element, [])) if action]
+
+
+def patterns_equivalent(first, second):
+    """
+    True when two lists of IAM action patterns match the same actions. Every
+    pattern of each list must be covered by a single pattern of the other one,
+    so this can miss equivalences spread over several patterns, never invent one.
+    """
+    return all(
+        any(pattern_subsumes(general, specific) for general in second)
+        for specific in first
+    ) and all(
+        any(pattern_subsumes(general, specific) for general in first)
+        for specific in second
+    )
+
+
+def _group_equivalent(kind, original_statements, optimized_statements):
+    if not original_statements or not optimized_statements or kind == "invalid":
+        return False
+
+    if kind == "Action":
+        # Statements of one scope grant or deny the union of their actions
+        return patterns_equivalent(
+            [a for s in original_statements for a in _actions(s, "Action")],
+            [a for s in optimized_statements for a in _actions(s, "Action")],
+        )
+
+    # NotAction statements can not be merged, so match them one to one
+    def covered(statements, others):
+        return all(
+            any(
+                patterns_equivalent(
+                    _actions(statement, "NotAction"), _actions(other, "NotAction")
+                )
+                for other in others
+            )
+            for statement in statements
+        )
+
+    return covered(original_statements, optimized_statements) and covered(
+        optimized_statements, original_statements
+    )
+
+
+def compare_policies(original_policy, optimized_policy):
+    """
+    Compare two policies scope by scope without calling AWS.
+    Returns (proven, undecided): the number of scopes proven equivalent and a list
+    of (original_statements, optimized_statements) for the scopes that could not be.
+    """
+    groups = OrderedDict()
+    for index, policy in enumerate((original_policy, optimized_policy)):
+        for statement in policy.get("Statement", []):
+            group = groups.setdefault(statement_scope(statement), ([], []))
+            group[index].append(statement)
+
+    proven = 0
+    undecided = []
+    for scope, (original_statements, optimized_statements) in groups.items():
+        kind = json.loads(scope)["kind"]
+        if _group_equivalent(kind, original_statements, optimized_statements):
+            proven += 1
+        else:
+            logger.debug("Equivalence of scope %s could not be proven locally", scope)
+            undecided.append((original_statements, optimized_statements))
+    return proven, undecided
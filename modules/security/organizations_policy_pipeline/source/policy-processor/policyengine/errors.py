@@ -0,0 +1,25 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+
+class PolicyProcessingError(Exception):
+    """
+    Raised when a statement can not be turned into a valid policy
+    """
+
+
+class DeadlineExceeded(PolicyProcessingError):
+    """
+    Raised when the run budget or the deadline of an AWS call runs out
+    """
+
+
+class AttachmentQuotaExceeded(PolicyProcessingError):
+    """
+    Raised when a target would have more policies attached than the Organizations quota
+    """
+
+    def __init__(self, message, report=None):
+        super().__init__(message)
+        # Per-target report of PolicyEngine.check_capacity
+        self.report = report
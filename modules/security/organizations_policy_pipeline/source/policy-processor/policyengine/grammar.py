@@ -0,0 +1,203 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import re
+from collections import OrderedDict
+
+from policyengine import sizing
+from policyengine.policytypes import WILDCARD_PRINCIPALS
+
+POLICY_VERSIONS = ("2012-10-17", "2008-10-17")
+
+CONDITION_OPERATORS = frozenset(
+    [
+        "StringEquals",
+        "StringNotEquals",
+        "StringEqualsIgnoreCase",
+        "StringNotEqualsIgnoreCase",
+        "StringLike",
+        "StringNotLike",
+        "NumericEquals",
+        "NumericNotEquals",
+        "NumericLessThan",
+        "NumericLessThanEquals",
+        "NumericGreaterThan",
+        "NumericGreaterThanEquals",
+        "DateEquals",
+        "DateNotEquals",
+        "DateLessThan",
+        "DateLessThanEquals",
+        "DateGreaterThan",
+        "DateGreaterThanEquals",
+        "Bool",
+        "BinaryEquals",
+        "IpAddress",
+        "NotIpAddress",
+        "ArnEquals",
+        "ArnNotEquals",
+        "ArnLike",
+        "ArnNotLike",
+        "Null",
+    ]
+)
+
+_ACTION_PATTERN = re.compile(r"^[A-Za-z0-9-]+:[A-Za-z0-9*?]+$")
+_SET_OPERATOR_PREFIXES = ("ForAllValues:", "ForAnyValue:")
+
+
+def is_condition_operator(operator):
+    for prefix in _SET_OPERATOR_PREFIXES:
+        if operator.startswith(prefix):
+            operator = operator[len(prefix) :]
+            break
+    if operator.endswith("IfExists") and operator != "NullIfExists":
+        operator = operator[: -len("IfExists")]
+    return operator in CONDITION_OPERATORS
+
+
+def _as_list(value):
+    if isinstance(value, list):
+        return value
+    return [value]
+
+
+def _check_actions(element, value, policy_type, problems):
+    for action in _as_list(value):
+        if not isinstance(action, str) or not (
+            action == "*" or _ACTION_PATTERN.match(action)
+        ):
+            problems.append(f"{element} value {action!r} is not a valid action")
+            continue
+        service = action.split(":")[0].lower()
+        if (
+            policy_type.services is not None
+            and action != "*"
+            and service not in policy_type.services
+        ):
+            problems.append(
+                f"{element} value {action!r} targets a service {policy_type.label}s do not support"
+            )
+
+
+def _check_condition(condition, problems):
+    if not isinstance(condition, dict):
+        problems.append("Condition must be an object")
+        return
+    for operator, block in condition.items():
+        if not is_condition_operator(operator):
+            problems.append(f"Condition operator {operator!r} is not supported")
+        if not isinstance(block, dict) or not block:
+            problems.append(
+                f"Condition operator {operator!r} must map condition keys to values"
+            )
+            continue
+        for key, values in block.items():
+            for value in _as_list(values):
+                if not isinstance(value, (str, bool, int, float)):
+                    problems.append(
+                        f"Condition key {key!r} of {operator!r} has an invalid value {value!r}"
+                    )
+
+
+def check_statement(statement, policy_type):
+    """
+    Return the grammar problems of a single statement, an empty list when it is valid
+    """
+    if not isinstance(statement, dict):
+        return ["Statement must be an object"]
+
+    problems = []
+    for element in statement:
+        # Sids are stripped before the policy is built, whatever their spelling
+        if element.lower() == "sid":
+            continue
+        if element not in policy_type.statement_elements:
+            problems.append(
+                f"Element {element!r} is not supported in {policy_type.label}s"
+            )
+
+    effect = statement.get("Effect")
+    if effect is None:
+        problems.append("Effect is missing")
+    elif effect not in policy_type.effects:
+        problems.append(
+            f"Effect {effect!r} is not supported in {policy_type.label}s, use one of {list(policy_type.effects)}"
+        )
+
+    if "Action" in statement and "NotAction" in statement:
+        problems.append("Action and NotAction can not be used together")
+    elif "Action" not in statement and "NotAction" not in statement:
+        problems.append("Action or NotAction is missing")
+    for element in ("Action", "NotAction"):
+        if element in statement:
+            _check_actions(element, statement[element], policy_type, problems)
+
+    if "Resource" in statement and "NotResource" in statement:
+        problems.append("Resource and NotResource can not be used together")
+
+    if policy_type.has_principal:
+        principal = statement.get("Principal")
+        if principal in (None, "", [], {}):
+            problems.append(f'Principal is missing, {policy_type.label}s require "*"')
+        elif principal not in WILDCARD_PRINCIPALS:
+            problems.append(
+                f'Principal {principal!r} is not supported, {policy_type.label}s only allow "*"'
+            )
+
+    if "Condition" in statement:
+        _check_condition(statement["Condition"], problems)
+
+    # A statement must fit in a document on its own, or the policy can not be split.
+    # It is measured like sizing.pack_policy sees it, without the Sid the catalog strips
+    merged = OrderedDict((k, v) for k, v in statement.items() if k.lower() != "sid")
+    envelope = OrderedDict([("Version", "2012-10-17"), ("Statement", [merged])])
+    size = sizing.policy_size(envelope)
+    if size > policy_type.size_limit:
+        problems.append(
+            f"Statement is {size} characters, over the {policy_type.size_limit} characters quota"
+        )
+
+    return problems
+
+
+def check_statements(statements, policy_type):
+    """
+    Return the problems of a list of statements, prefixed with their position and Sid
+    """
+    if not isinstance(statements, list):
+        statements = [statements]
+
+    problems = []
+    for index, statement in enumerate(statements, start=1):
+        label = f"Statement {index}"
+        sids = [
+            value
+            for key, value in (statement.items() if isinstance(statement, dict) else [])
+            if key.lower() == "sid" and value
+        ]
+        if sids:
+            label += f" ({sids[0]})"
+        problems.extend(
+            f"{label}: {problem}" for problem in check_statement(statement, policy_type)
+        )
+    return problems
+
+
+def check_document(document, policy_type):
+    """
+    Return the problems of a full policy document
+    """
+    if not isinstance(document, dict):
+        return ["Policy must be an object"]
+
+    problems = []
+    for element in document:
+        if element not in ("Version", "Id", "Statement"):
+            problems.append(f"Policy element {element!r} is not supported")
+    if document.get("Version") not in POLICY_VERSIONS:
+        problems.append(f"Version must be one of {list(POLICY_VERSIONS)}")
+    if "Statement" not in document:
+        problems.append("Statement is missing")
+    else:
+        problems.extend(check_statements(document["Statement"], policy_type))
+    return problems
@@ -0,0 +1,182 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import atexit
+import contextlib
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+
+from policyengine import timing
+
+LOGGER_NAME = "policyengine"
+FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(sidprefix)s%(message)s"
+
+# Characters of a policy or findings payload written to the log, 0 for no limit
+PAYLOAD_LIMIT = int(os.getenv("LOG_PAYLOAD_LIMIT", "2000"))
+
+
+class SidFormatter(logging.Formatter):
+    """
+    Formatter prefixing messages with the SID captured by SidFilter
+    """
+
+    def formatMessage(self, record):
+        sid = getattr(record, "sid", None)
+        record.sidprefix = f"[{sid}] " if sid else ""
+        return super().formatMessage(record)
+
+
+formatter = SidFormatter(FORMAT)
+
+_lock = threading.Lock()
+_level = logging.INFO
+_queue = None
+_queue_handler = None
+_listener = None
+_dispatcher = None
+_console_handler = None
+
+
+class Payload:
+    """
+    Log argument rendering a JSON value compactly and only when the record is
+    emitted. Serialization stops once the character limit is reached, so a
+    large policy costs the same as a small one. A limit of 0 disables the cap.
+    """
+
+    __slots__ = ("value", "limit")
+
+    def __init__(self, value, limit=None):
+        self.value = value
+        self.limit = PAYLOAD_LIMIT if limit is None else limit
+
+    def __str__(self):
+        encoder = json.JSONEncoder(separators=(",", ":"), default=str)
+        chunks = []
+        length = 0
+        for chunk in encoder.iterencode(self.value):
+            chunks.append(chunk)
+            length += len(chunk)
+            if self.limit and length > self.limit:
+                return "".join(chunks)[: self.limit] + "... (truncated)"
+        return "".join(chunks)
+
+
+def payload(value, limit=None):
+    return Payload(value, limit)
+
+
+class SidFilter(logging.Filter):
+    """
+    Tag records with the SID being processed by the emitting thread. Only the
+    SID is captured here; the listener thread renders the prefix.
+    """
+
+    def filter(self, record):
+        record.sid = getattr(record, "sid", None) or timing.current_sid()
+        return True
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """
+    Queue records as they are. The stock QueueHandler formats the message and
+    any exception on the emitting thread; here the listener does it.
+    """
+
+    def prepare(self, record):
+        return record
+
+
+class _Dispatcher(logging.Handler):
+    """
+    Fan-out handler of the queue listener. Unlike the handlers of a
+    QueueListener, its targets can change while the listener runs.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.targets = []
+
+    def emit(self, record):
+        for handler in list(self.targets):
+            if record.levelno >= handler.level:
+                handler.handle(record)
+
+
+def configure(level=logging.INFO, console=True):
+    """
+    Route the policyengine loggers through a queue to a background thread, so
+    worker threads never wait on the console or log files. Safe to call more
+    than once; the last level wins.
+    """
+    global _queue, _queue_handler, _listener, _dispatcher, _console_handler, _level
+
+    logger = logging.getLogger(LOGGER_NAME)
+    logger.setLevel(level)
+    _level = logger.level
+    logger.propagate = False
+
+    with _lock:
+        if _listener is None:
+            _queue = queue.Queue()
+            _queue_handler = _QueueHandler(_queue)
+            _queue_handler.addFilter(SidFilter())
+            logger.addHandler(_queue_handler)
+            _dispatcher = _Dispatcher()
+            _listener = logging.handlers.QueueListener(_queue, _dispatcher)
+            _listener.start()
+            atexit.register(shutdown)
+
+        if console and _console_handler is None:
+            _console_handler = logging.StreamHandler()
+            _console_handler.setFormatter(formatter)
+            _dispatcher.targets.append(_console_handler)
+        elif not console and _console_handler is not None:
+            _dispatcher.targets.remove(_console_handler)
+            _console_handler = None
+
+
+def flush():
+    """
+    Wait until every record queued so far has been written
+    """
+    if _queue is not None:
+        _queue.join()
+
+
+@contextlib.contextmanager
+def log_file(file_path, level=None):
+    """
+    Also write the records emitted inside the block to file_path, from level on,
+    by default the level given to configure()
+    """
+    dispatcher = _dispatcher
+    if dispatcher is None:
+        raise RuntimeError("logs.configure() must be called before logs.log_file()")
+    handler = logging.FileHandler(file_path)
+    handler.setLevel(_level if level is None else level)
+    handler.setFormatter(formatter)
+    flush()
+    dispatcher.targets.append(handler)
+    try:
+        yield handler
+    finally:
+        flush()
+        dispatcher.targets.remove(handler)
+        handler.close()
+
+
+def shutdown():
+    """
+    Write the pending records and stop the background thread
+    """
+    global _queue, _queue_handler, _listener, _dispatcher, _console_handler
+    with _lock:
+        if _listener is not None:
+            logging.getLogger(LOGGER_NAME).removeHandler(_queue_handler)
+            _listener.stop()
+            _queue = _queue_handler = _listener = _dispatcher = _console_handler = None
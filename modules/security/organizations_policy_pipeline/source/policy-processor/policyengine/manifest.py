@@ -0,0 +1,152 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import hashlib
+import json
+import os
+import threading
+
+from policyengine import cache, clients
+
+# Changes to the code or data shaping the optimized policies (guardrail loading,
+# merge, subsumption and its action catalog, equivalence, grammar, splitting,
+# rendering, quotas) must invalidate every recorded output
+_PROCESSOR_FILES = [
+    "catalog.py",
+    "mergeandoptimize.py",
+    "actions.py",
+    os.path.join("data", "iam-actions.json"),
+    "equivalence.py",
+    "grammar.py",
+    "sizing.py",
+    "terraform.py",
+    "policytypes.py",
+]
+_processor_hash = hashlib.sha256()
+for _file_name in _PROCESSOR_FILES:
+    with open(os.path.join(os.path.dirname(__file__), _file_name), "rb") as f:
+        _processor_hash.update(f.read())
+PROCESSOR_FINGERPRINT = _processor_hash.hexdigest()
+
+
+def _file_digest(file_path):
+    try:
+        with open(file_path, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except FileNotFoundError:
+        return None
+
+
+def statement_input_hash(
+    statement,
+    guardrail_folder,
+    policy_folder,
+    environment_ou_list,
+    security_gate,
+    file_digest=_file_digest,
+):
+    """
+    Hash everything a statement's optimized policy depends on: the statement itself,
+    every referenced guardrail or policy file and its environment definition.
+    file_digest can be a GuardrailCatalog's digest to avoid reading files again.
+    """
+
+    environment = None
+    if statement.get("Target", {}).get("Type") == "Environment":
+        environment = next(
+            (
+                item
+                for item in environment_ou_list
+                if item["ID"] == statement["Target"]["ID"]
+            ),
+            None,
+        )
+
+    inputs = {
+        "processor": PROCESSOR_FINGERPRINT,
+        "statement": statement,
+        "guardrails": {
+            name: file_digest(f"{guardrail_folder}{name}.json")
+            for name in statement.get("Guardrails", [])
+        },
+        "policy": (
+            file_digest(f"{policy_folder}{statement['Policy']}.json")
+            if statement.get("Policy")
+            else None
+        ),
+        "environment": environment,
+        "securityGate": cache.normalize_security_gate(security_gate),
+    }
+    return hashlib.sha256(cache.canonical_json(inputs).encode("utf-8")).hexdigest()
+
+
+class BuildManifest:
+    """
+    Records the input hash and optimized policy documents of every SID so the next run can
+    reuse the output of SIDs whose inputs did not change
+    """
+
+    def __init__(self, backend, key):
+        self.backend = backend
+        self.key = key
+        self.reused = 0
+        self.rebuilt = 0
+        self._lock = threading.Lock()
+        self._current = {}
+
+        data = backend.get(key)
+        self._previous = json.loads(data) if data is not None else {}
+
+    def lookup(self, sid, input_hash):
+        """
+        Return the previous optimized policy documents for sid if its inputs are unchanged
+        """
+        entry = self._previous.get(sid)
+        # Entries written before policies could be split hold a single "policy"
+        if (
+            entry is None
+            or entry["input_hash"] != input_hash
+            or "policies" not in entry
+        ):
+            return None
+        with self._lock:
+            self._current[sid] = entry
+            self.reused += 1
+        return entry["policies"]
+
+    def record(self, sid, input_hash, policies):
+        with self._lock:
+            self._current[sid] = {"input_hash": input_hash, "policies": policies}
+            self.rebuilt += 1
+
+    def save(self):
+        """
+        Persist the SIDs of this run. Removed SIDs are dropped from the manifest.
+        """
+        self.backend.put(self.key, json.dumps(self._current).encode("utf-8"))
+
+
+def backend_from_environment(client_registry=None):
+    """
+    Return the storage backend configured by the BUILD_MANIFEST* environment variables.
+    Returns None when incremental builds are disabled.
+    """
+    mode = os.getenv("BUILD_MANIFEST", "off").lower()
+
+    if mode == "off":
+        return None
+    elif mode == "disk":
+        return cache.DiskBackend(
+            os.getenv(
+                "BUILD_MANIFEST_DIR",
+                os.path.expanduser("~/.cache/org-policy-pipeline/manifest"),
+            )
+        )
+    elif mode == "s3":
+        return cache.S3Backend(
+            os.environ["BUILD_MANIFEST_BUCKET"],
+            os.getenv("BUILD_MANIFEST_PREFIX", "manifest/"),
+            (client_registry or clients.default_registry()).client("s3"),
+        )
+    else:
+        raise ValueError(f"Invalid BUILD_MANIFEST mode: {mode}")
@@ -0,0 +1,580 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import concurrent.futures
+import functools
+import json
+from collections import OrderedDict
+import logging
+import copy
+from policyengine import actions, clients, deadlines, equivalence, logs, sizing, timing
+from policyengine.errors import PolicyProcessingError
+from policyengine.policytypes import SCP
+
+logger = logging.getLogger(__name__)
+
+
+def mergeguardrails(
+    guardrails_list,
+    guardrails_folder,
+    security_gate,
+    validation_cache=None,
+    policy_type=SCP,
+    access_analyzer_client=None,
+    catalog=None,
+    deadline=None,
+    sid=None,
+):
+    logger.info("Concatenating function")
+    with timing.span("merge", sid=sid):
+        policy = OrderedDict(
+            [
+                ("Version", "2012-10-17"),
+                (
+                    "Statement",
+                    concatenate_policy_files(
+                        guardrails_list, guardrails_folder, catalog
+                    ),
+                ),
+            ]
+        )
+    logger.debug("Value for policy: %s", logs.payload(policy))
+
+    logger.info(
+        "Size of the concatenated policy BEFORE optimization: %d characters",
+        sizing.policy_size(policy),
+    )
+
+    # Remove fields "SID" from statements to optmize size
+    with timing.span("optimize", sid=sid):
+        optimized_policy = remove_sids_from_policy(
+            optimize_iam_policy(policy, policy_type)
+        )
+    logger.debug("Value for optimized_policy: %s", logs.payload(optimized_policy))
+
+    # Split into documents under the size quota before any network call is spent
+    with timing.span("split", sid=sid):
+        policy_parts = split_policy(optimized_policy, policy_type)
+
+    # Comparing if policy BEFORE and AFTER optmization has the same effect
+    if access_analyzer_client is None:
+        access_analyzer_client = clients.get_client("accessanalyzer")
+
+    # The equivalence check and the validation of every document are independent,
+    # so their Access Analyzer calls are issued together on the shared client.
+    # Scopes the optimizer only restructured are proven locally.
+    logger.info("Validating %s policy with Access Analyzer", policy_type.label)
+    same_effect, *findings_per_part = run_concurrently(
+        [
+            functools.partial(
+                check_equivalence,
+                access_analyzer_client,
+                policy,
+                optimized_policy,
+                policy_type,
+                security_gate,
+                validation_cache,
+                deadline,
+                sid,
+            )
+        ]
+        + [
+            functools.partial(
+                validate_policy,
+                access_analyzer_client,
+                policy_part,
+                policy_type.organizations_type,
+                security_gate,
+                validation_cache,
+                deadline,
+                sid,
+            )
+            for policy_part in policy_parts
+        ]
+    )
+
+    if same_effect:
+        logger.info("Optimized policy has the same effect")
+    else:
+        logger.critical("[!] Optimized policy has different effects")
+        raise PolicyProcessingError("Optimized policy has different effects")
+
+    # Validation with IAM Access Analyzer for security findings
+    for findings in findings_per_part:
+        check_findings(findings, security_gate, f"{policy_type.label} policy")
+
+    logger.info(
+        "Size of the concatenated policy AFTER optimization: %d characters",
+        sizing.policy_size(optimized_policy),
+    )
+    return policy_parts
+
+
+def check_equivalence(
+    access_analyzer_client,
+    policy,
+    optimized_policy,
+    policy_type,
+    security_gate,
+    validation_cache=None,
+    deadline=None,
+    sid=None,
+):
+    """
+    Function to check that a policy and its optimized version have the same effect.
+    Statement groups that can not be proven equivalent locally are compared
+    together with Access Analyzer CheckNoNewAccess in both directions, so a
+    statement that moved between scopes is still matched with its counterpart.
+    """
+
+    with timing.span("equivalence", sid=sid):
+        proven, undecided = equivalence.compare_policies(policy, optimized_policy)
+    logger.info(
+        "%d statement group(s) proven equivalent locally, %d left for Access Analyzer",
+        proven,
+        len(undecided),
+    )
+
+    calls = []
+    if undecided:
+        original_statements = [s for group in undecided for s in group[0]]
+        optimized_statements = [s for group in undecided for s in group[1]]
+        temp_original_policy = OrderedDict(
+            [
+                ("Version", "2012-10-17"),
+                ("Statement", copy.deepcopy(original_statements)),
+            ]
+        )
+        temp_optimized_policy = OrderedDict(
+            [
+                ("Version", "2012-10-17"),
+                ("Statement", copy.deepcopy(optimized_statements)),
+            ]
+        )
+
+        # Deny statements need a statement with 'Allow All' so they can be used in IAM Access Analyzer
+        if any(
+            statement.get("Effect") == "Deny"
+            for statement in original_statements + optimized_statements
+        ):
+            allow_all_statement = OrderedDict([("Effect", "Allow")])
+            if policy_type.has_principal:
+                allow_all_statement["Principal"] = "*"
+            allow_all_statement["Action"] = ["*"]
+            allow_all_statement["Resource"] = ["*"]
+            temp_original_policy["Statement"].append(allow_all_statement)
+            temp_optimized_policy["Statement"].append(allow_all_statement)
+
+        # Comparing both policies with Access Analyer, in both directions
+        for new_policy, existing_policy in (
+            (temp_optimized_policy, temp_original_policy),
+            (temp_original_policy, temp_optimized_policy),
+        ):
+            calls.append(
+                functools.partial(
+                    check_no_new_access,
+                    access_analyzer_client,
+                    new_policy,
+                    existing_policy,
+                    policy_type.comparison_type,
+                    security_gate,
+                    validation_cache,
+                    deadline,
+                    sid,
+                )
+            )
+
+    responses = run_concurrently(calls)
+    return all(
+        response1["message"] == response2["message"]
+        for response1, response2 in zip(responses[::2], responses[1::2])
+    )
+
+
+def run_concurrently(calls):
+    """
+    Function to run independent Access Analyzer calls at the same time and return
+    their results in order. The first failure, by position, is raised once the
+    calls already in flight have finished.
+    """
+
+    if len(calls) <= 1:
+        return [call() for call in calls]
+
+    # Log records and spans of the helper threads keep the caller's SID
+    sid = timing.current_sid()
+
+    def in_sid_context(call):
+        with timing.sid_context(sid):
+            return call()
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(calls)) as executor:
+        futures = [executor.submit(in_sid_context, call) for call in calls]
+        concurrent.futures.wait(futures, return_when=concurrent.futures.FIRST_EXCEPTION)
+        for future in futures:
+            future.cancel()
+
+    for future in futures:
+        if not future.cancelled() and future.exception() is not None:
+            raise future.exception()
+    return [future.result() for future in futures]
+
+
+def split_policy(policy, policy_type):
+    """
+    Function to pack a policy into the fewest documents under the Organizations size quota
+    """
+
+    try:
+        policy_parts = sizing.pack_policy(
+            policy, policy_type.size_limit, policy_type.max_parts
+        )
+    except sizing.PolicySizeError as e:
+        logger.critical("[!] %s policy is too large: %s", policy_type.label, e)
+        raise PolicyProcessingError(f"{policy_type.label} policy is too large: {e}")
+
+    if len(policy_parts) > 1:
+        logger.info(
+            "Policy of %d characters split into %d documents: %s",
+            sizing.policy_size(policy),
+            len(policy_parts),
+            [sizing.policy_size(part) for part in policy_parts],
+        )
+    return policy_parts
+
+
+def check_findings(findings, security_gate, description):
+    """
+    Function to fail on findings that match the security gate and report the others
+    """
+
+    if findings:
+        critical_findings = [
+            finding
+            for finding in findings
+            if finding.get("findingType") in security_gate
+        ]
+
+        if critical_findings:
+            logger.critical(
+                "[!] Findings were found in %s: %s",
+                description,
+                # Findings that fail the build are always logged in full
+                logs.payload(critical_findings, limit=0),
+            )
+            raise PolicyProcessingError(
+                f"{len(critical_findings)} critical finding(s) in {description}"
+            )
+        else:
+            logger.warning(
+                "Non-critical findings were found in %s: %s",
+                description,
+                logs.payload(findings),
+            )
+    else:
+        logger.info("No findings found")
+
+
+def check_no_new_access(
+    access_analyzer_client,
+    new_policy,
+    existing_policy,
+    policy_type,
+    security_gate,
+    validation_cache=None,
+    deadline=None,
+    sid=None,
+):
+    """
+    Function to call Access Analyzer CheckNoNewAccess, reusing cached results when available
+    """
+
+    if validation_cache is not None:
+        key = validation_cache.make_key(
+            "check_no_new_access",
+            policy_type,
+            security_gate,
+            new_policy,
+            existing_policy,
+        )
+        cached_response = validation_cache.get(key)
+        if cached_response is not None:
+            logger.info("CheckNoNewAccess result loaded from cache")
+            return cached_response
+
+    with timing.span("CheckNoNewAccess", "aws", sid):
+        response = deadlines.call(
+            deadline,
+            "CheckNoNewAccess",
+            lambda: access_analyzer_client.check_no_new_access(
+                newPolicyDocument=json.dumps(new_policy),
+                existingPolicyDocument=json.dumps(existing_policy),
+                policyType=policy_type,
+            ),
+            sid,
+            idempotent=True,
+        )
+    response = {k: v for k, v in response.items() if k != "ResponseMetadata"}
+
+    if validation_cache is not None:
+        validation_cache.put(key, response)
+    return response
+
+
+def validate_policy(
+    access_analyzer_client,
+    policy,
+    policy_type,
+    security_gate,
+    validation_cache=None,
+    deadline=None,
+    sid=None,
+):
+    """
+    Function to collect all Access Analyzer ValidatePolicy findings, reusing cached results when available
+    """
+
+    if validation_cache is not None:
+        key = validation_cache.make_key(
+            "validate_policy", policy_type, security_gate, policy
+        )
+        cached_findings = validation_cache.get(key)
+        if cached_findings is not None:
+            logger.info("ValidatePolicy findings loaded from cache")
+            return cached_findings
+
+    def collect_findings():
+        findings = []
+        paginator = access_analyzer_client.get_paginator("validate_policy")
+        for page in paginator.paginate(
+            locale="EN",
+            policyDocument=json.dumps(policy),
+            policyType=policy_type,
+        ):
+            findings.extend(page["findings"])
+        return findings
+
+    with timing.span("ValidatePolicy", "aws", sid):
+        findings = deadlines.call(
+            deadline, "ValidatePolicy", collect_findings, sid, idempotent=True
+        )
+
+    if validation_cache is not None:
+        validation_cache.put(key, findings)
+    return findings
+
+
+def concatenate_policy_files(guardrails_list, guardrails_folder, catalog=None):
+    """
+    Function to concatenate multiple guardrails into a single policy.
+    When a GuardrailCatalog is given, statements are served from memory.
+    """
+
+    logger.info(
+        "The following guardrails will be merged in a single policy: %s",
+        guardrails_list,
+    )
+    file_contents = []
+    for file_name in guardrails_list:
+        file_full_path = f"{guardrails_folder}{file_name}.json"
+        if catalog is not None:
+            # Parsed once per run; invalid files were already reported by the catalog
+            file_contents.extend(
+                OrderedDict(statement)
+                for statement in catalog.get(file_full_path).statements
+            )
+            continue
+        try:
+            with open(file_full_path, "r") as file:
+                content = json.load(file, object_pairs_hook=OrderedDict)
+                file_contents.extend(
+                    [
+                        {k: v for k, v in statement.items() if k.lower() != "sid"}
+                        for statement in content
+                    ]
+                )
+        except json.JSONDecodeError:
+            logger.error("[!] Error: %s is not a valid file.", file_full_path)
+    return file_contents
+
+
+def remove_sids_from_policy(policy):
+    """
+    Function remove SID field from each statement to optimize size
+    """
+
+    if isinstance(policy, str):
+        policy = json.loads(policy, object_pairs_hook=OrderedDict)
+
+    new_policy = OrderedDict((k, v) for k, v in policy.items() if k != "Statement")
+    new_policy["Statement"] = [
+        {k: v for k, v in statement.items() if k.lower() != "sid"}
+        for statement in policy.get("Statement", [])
+    ]
+
+    return new_policy
+
+
+def normalize_condition(condition):
+    """
+    Recursively sort condition operators and their values to ensure consistent ordering
+    """
+    if isinstance(condition, dict):
+        return OrderedDict(
+            (k, normalize_condition(v)) for k, v in sorted(condition.items())
+        )
+    elif isinstance(condition, list):
+        return sorted(condition)
+    return condition
+
+
+def normalize_resource(resource):
+    """
+    Normalize resource field to treat "*" and ["*"] as the same
+    """
+    if isinstance(resource, str):
+        return [resource]
+    elif isinstance(resource, list):
+        return resource
+    return []
+
+
+def normalize_principal(principal):
+    """
+    Normalize principal field for RCPs - Access Analyzer validates requirements
+    """
+    if principal == "*" or principal == ["*"]:
+        return "*"
+    elif isinstance(principal, dict) and principal == {"AWS": "*"}:
+        return "*"
+    elif principal == "" or principal is None:
+        # Provide clear error for missing/empty Principal
+        logger.error("[!] Missing or empty Principal in RCP policy")
+        logger.error("[!] RCP policies must have Principal set to '*'")
+        logger.error(
+            "[!] See: https://docs.aws.amazon.com/organizations/latest/userguide/orgs_manage_policies_rcps_syntax.html#rcp-syntax-principal"
+        )
+        raise PolicyProcessingError("Missing or empty Principal in RCP policy")
+    else:
+        # Let Access Analyzer handle validation of invalid principals
+        return principal
+
+
+def remove_redundant_actions(statement):
+    """
+    Remove actions already covered by a wildcard of the same Action/NotAction list.
+    A new statement is returned so the original policy stays untouched.
+    """
+    new_statement = None
+    for element in ("Action", "NotAction"):
+        value = statement.get(element)
+        if isinstance(value, list) and len(value) > 1:
+            pruned = actions.remove_subsumed_actions(value)
+            if pruned != value:
+                logger.info(
+                    "Removed %d %s value(s) covered by wildcards",
+                    len(value) - len(pruned),
+                    element,
+                )
+                new_statement = new_statement or OrderedDict(statement)
+                new_statement[element] = pruned
+    return new_statement or statement
+
+
+def optimize_iam_policy(policy, policy_type=SCP):
+    """
+    Function to optimize IAM policy with normalized condition ordering and resource handling.
+    NotAction statements are kept separate to maintain their original security effects.
+    For RCPs the Principal is part of the grouping key.
+    """
+    if isinstance(policy, str):
+        policy = json.loads(policy, object_pairs_hook=OrderedDict)
+
+    statements = policy.get("Statement", [])
+    action_statements = []
+    notaction_statements = []
+
+    # First separate NotAction statements from Action statements
+    for statement in statements:
+        if "NotAction" in statement:
+            notaction_statements.append(statement)
+        else:
+            action_statements.append(statement)
+
+    # Only group and optimize Action statements
+    grouped_statements = OrderedDict()
+    for statement in action_statements:
+        if "Action" in statement:
+            # Normalize the condition before creating the key
+            normalized_condition = normalize_condition(statement.get("Condition", {}))
+
+            # Normalize the resource field
+            resource = statement.get("Resource", ["*"])
+            normalized_resource = normalize_resource(resource)
+
+            # If resource is "*" or ["*"], standardize to ["*"]
+            if normalized_resource == ["*"] or normalized_resource == "*":
+                resource_key = json.dumps(["*"], sort_keys=True)
+            else:
+                resource_key = json.dumps(normalized_resource, sort_keys=True)
+
+            key = (
+                resource_key,
+                json.dumps(normalized_condition, sort_keys=True),
+                statement.get("Effect", ""),
+            )
+            if policy_type.has_principal:
+                # Normalize the principal field
+                normalized_principal = normalize_principal(
+                    statement.get("Principal", "")
+                )
+                key += (json.dumps(normalized_principal, sort_keys=True),)
+            grouped_statements.setdefault(key, []).append(statement)
+
+    optimized_statements = []
+
+    # Process Action statements
+    for (resource, condition, effect, *_), group in grouped_statements.items():
+        if len(group) == 1:
+            optimized_statements.append(group[0])
+        else:
+            merged_statement = OrderedDict([("Effect", effect)])
+            if policy_type.has_principal:
+                merged_statement["Principal"] = group[0].get("Principal", "*")
+            merged_statement.update(
+                [
+                    (
+                        "Action",
+                        sorted(
+                            set(
+                                action
+                                for stmt in group
+                                for action in (
+                                    stmt.get("Action", [])
+                                    if isinstance(stmt.get("Action"), list)
+                                    else [stmt.get("Action")]
+                                )
+                            )
+                        ),
+                    ),
+                    ("Resource", json.loads(resource)),
+                ]
+            )
+            if condition != "{}":
+                merged_statement["Condition"] = json.loads(
+                    condition, object_pairs_hook=OrderedDict
+                )
+            optimized_statements.append(merged_statement)
+
+    # Add all NotAction statements without any merging
+    optimized_statements.extend(notaction_statements)
+
+    # Drop actions covered by a wildcard of the same statement, e.g. ec2:RunInstances next to ec2:*
+    optimized_statements = [
+        remove_redundant_actions(statement) for statement in optimized_statements
+    ]
+
+    optimized_policy = policy.copy()
+    optimized_policy["Statement"] = optimized_statements
+
+    return optimized_policy
@@ -0,0 +1,181 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import concurrent.futures
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+from policyengine import clients, deadlines, timing
+
+logger = logging.getLogger(__name__)
+
+# Organization snapshot shared with the sample-repository utils scripts
+# (utils/org_snapshot.py): {"version": 1, "sections": {name: {"created", "data"}}}.
+# The processor reads and refreshes the "accounts" and "tags" sections.
+SNAPSHOT_VERSION = 1
+DEFAULT_SNAPSHOT_TTL = 3600
+
+
+def read_snapshot(file_path):
+    """
+    Return the sections of a snapshot file, {} when it is missing, unreadable or
+    of another version
+    """
+    try:
+        with open(file_path, "r") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if data.get("version") != SNAPSHOT_VERSION:
+        return {}
+    return data.get("sections", {})
+
+
+def write_snapshot_sections(file_path, sections):
+    """
+    Replace some sections of a snapshot file and keep the others, atomically
+    """
+    snapshot = {"version": SNAPSHOT_VERSION, "sections": read_snapshot(file_path)}
+    snapshot["sections"].update(sections)
+    folder = os.path.dirname(os.path.abspath(file_path))
+    os.makedirs(folder, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=folder, prefix=".org-snapshot-")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(snapshot, f, separators=(",", ":"))
+        os.replace(temp_path, file_path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+class AccountTagIndex:
+    """
+    In-memory index of every account in the organization and its tags.
+    The index is built on first use and shared by all Tag statements of a run.
+    With a snapshot file, fresh accounts and tags are loaded from it instead of
+    crawling Organizations, and a crawl refreshes them in the file.
+    """
+
+    def __init__(
+        self,
+        max_workers=4,
+        client=None,
+        client_registry=None,
+        snapshot_file=None,
+        snapshot_ttl=DEFAULT_SNAPSHOT_TTL,
+    ):
+        self.max_workers = max(1, max_workers)
+        self.snapshot_file = snapshot_file
+        self.snapshot_ttl = snapshot_ttl
+        self._client = client
+        self._client_registry = client_registry
+        self._lock = threading.Lock()
+        self._account_tags = None
+
+    def _get_client(self):
+        if self._client is None:
+            registry = self._client_registry or clients.default_registry()
+            self._client = registry.client("organizations")
+        return self._client
+
+    def _list_tags(self, account_id):
+        tags = {}
+        paginator = self._get_client().get_paginator("list_tags_for_resource")
+        for page in paginator.paginate(ResourceId=account_id):
+            for tag in page["Tags"]:
+                tags[tag["Key"]] = tag["Value"]
+        return tags
+
+    def _list_accounts(self):
+        accounts = {}
+        paginator = self._get_client().get_paginator("list_accounts")
+        for page in paginator.paginate():
+            for account in page["Accounts"]:
+                accounts[account["Id"]] = {
+                    "Name": account.get("Name"),
+                    "Status": account.get("Status"),
+                }
+        return accounts
+
+    def _load_snapshot(self):
+        """
+        Return {account_id: tags} from the snapshot file, None when it is not fresh
+        """
+        sections = read_snapshot(self.snapshot_file)
+        now = time.time()
+        if not all(
+            name in sections and now - sections[name]["created"] <= self.snapshot_ttl
+            for name in ("accounts", "tags")
+        ):
+            return None
+        tags = sections["tags"]["data"]
+        return {
+            account_id: tags.get(account_id, {})
+            for account_id in sections["accounts"]["data"]
+        }
+
+    def build(self, deadline=None, sid=None):
+        """
+        List all accounts and fetch their tags concurrently. Returns {account_id: {key: value}}
+        """
+        with self._lock:
+            if self._account_tags is not None:
+                return self._account_tags
+
+            if self.snapshot_file:
+                self._account_tags = self._load_snapshot()
+                if self._account_tags is not None:
+                    logger.info(
+                        "Loaded %d account(s) and their tags from the organization snapshot %s",
+                        len(self._account_tags),
+                        self.snapshot_file,
+                    )
+                    return self._account_tags
+
+            crawled = time.time()
+            with timing.span("ListAccounts", "aws", sid):
+                accounts = deadlines.call(
+                    deadline, "ListAccounts", self._list_accounts, sid, idempotent=True
+                )
+
+            def list_tags(account_id):
+                with timing.span("ListTagsForResource", "aws", sid):
+                    return deadlines.call(
+                        deadline,
+                        "ListTagsForResource",
+                        lambda: self._list_tags(account_id),
+                        sid,
+                        idempotent=True,
+                    )
+
+            with concurrent.futures.ThreadPoolExecutor(
+                max_workers=self.max_workers
+            ) as executor:
+                # map keeps the list_accounts order so lookups stay deterministic
+                account_tags = dict(zip(accounts, executor.map(list_tags, accounts)))
+
+            if self.snapshot_file:
+                write_snapshot_sections(
+                    self.snapshot_file,
+                    {
+                        "accounts": {"created": crawled, "data": accounts},
+                        "tags": {"created": crawled, "data": account_tags},
+                    },
+                )
+            self._account_tags = account_tags
+            return self._account_tags
+
+    def accounts_with_tag(self, tag_key, tag_value, deadline=None, sid=None):
+        """
+        Return the IDs of the accounts tagged with tag_key=tag_value
+        """
+        return [
+            account_id
+            for account_id, tags in self.build(deadline, sid).items()
+            if tags.get(tag_key) == tag_value
+        ]
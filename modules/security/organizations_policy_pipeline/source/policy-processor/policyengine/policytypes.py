@@ -0,0 +1,100 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+from dataclasses import dataclass
+
+_COMMON_ELEMENTS = frozenset(
+    ["Sid", "Effect", "Action", "Resource", "NotResource", "Condition"]
+)
+
+# Principal values meaning every principal, the only ones RCPs allow
+WILDCARD_PRINCIPALS = ("*", ["*"], {"AWS": "*"}, {"AWS": ["*"]})
+
+
+@dataclass(frozen=True)
+class PolicyType:
+    """
+    Everything that differs between the SCP and RCP flavours of the engine
+    """
+
+    name: str
+    label: str
+    folder: str
+    organizations_type: str
+    comparison_type: str
+    output_file: str
+    terraform_file: str
+    log_file: str
+    has_principal: bool
+    # Organizations quotas: characters per policy document, policies per target
+    size_limit: int = 5120
+    max_attachments: int = 5
+    # Policy grammar checked locally before Access Analyzer is called
+    statement_elements: frozenset = _COMMON_ELEMENTS | {"NotAction"}
+    effects: tuple = ("Allow", "Deny")
+    # Service prefixes the policy type applies to, None for every service
+    services: frozenset = None
+
+    @property
+    def management_file(self):
+        return f"{self.folder}.json"
+
+    @property
+    def max_parts(self):
+        # One attachment slot is always used by FullAWSAccess / RCPFullAWSAccess
+        return self.max_attachments - 1
+
+
+SCP = PolicyType(
+    name="scp",
+    label="SCP",
+    folder="scp-management",
+    organizations_type="SERVICE_CONTROL_POLICY",
+    comparison_type="IDENTITY_POLICY",
+    output_file="scps.json",
+    terraform_file="scps.tf.json",
+    log_file="scp.log",
+    has_principal=False,
+)
+
+RCP = PolicyType(
+    name="rcp",
+    label="RCP",
+    folder="rcp-management",
+    organizations_type="RESOURCE_CONTROL_POLICY",
+    comparison_type="RESOURCE_POLICY",
+    output_file="rcps.json",
+    terraform_file="rcps.tf.json",
+    log_file="rcp.log",
+    has_principal=True,
+    statement_elements=_COMMON_ELEMENTS | {"Principal"},
+    effects=("Deny",),
+    services=frozenset(
+        [
+            "aoss",
+            "cognito-identity",
+            "dynamodb",
+            "ecr",
+            "kms",
+            "logs",
+            "s3",
+            "secretsmanager",
+            "sqs",
+            "sts",
+        ]
+    ),
+)
+
+POLICY_TYPES = {SCP.name: SCP, RCP.name: RCP}
+
+
+def get_policy_type(policy_type):
+    """
+    Accept a PolicyType or its name ("scp" or "rcp")
+    """
+    if isinstance(policy_type, PolicyType):
+        return policy_type
+    try:
+        return POLICY_TYPES[policy_type.lower()]
+    except (KeyError, AttributeError):
+        raise ValueError(f"Unsupported policy type: {policy_type}")
@@ -0,0 +1,147 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import os
+import threading
+import time
+
+# Requests per second allowed by default for each API family, overridden with
+# RATE_LIMIT_<FAMILY> (e.g. RATE_LIMIT_ACCESSANALYZER=20). 0 disables the limit.
+DEFAULT_RATES = {"accessanalyzer": 10.0, "organizations": 5.0}
+
+THROTTLING_ERROR_CODES = frozenset(
+    [
+        "Throttling",
+        "ThrottlingException",
+        "ThrottledException",
+        "TooManyRequestsException",
+        "RequestLimitExceeded",
+        "RequestThrottled",
+        "RequestThrottledException",
+        "SlowDown",
+    ]
+)
+
+
+class TokenBucket:
+    """
+    Token bucket shared by every thread calling one API family. The rate follows
+    AIMD: it is halved on throttling errors and grows back by a small step on
+    every successful call, up to the configured rate.
+    """
+
+    def __init__(self, name, max_rate, burst=None, min_rate=0.5):
+        self.name = name
+        self.max_rate = float(max_rate)
+        self.min_rate = min(float(min_rate), self.max_rate)
+        self.rate = self.max_rate
+        self.burst = burst or max(1.0, self.max_rate)
+        self.calls = 0
+        self.throttles = 0
+        self.waited_seconds = 0.0
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._last_decrease = 0.0
+        self._condition = threading.Condition()
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self):
+        """
+        Block until a request can be sent
+        """
+        started = time.monotonic()
+        with self._condition:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    self.calls += 1
+                    self.waited_seconds += now - started
+                    return
+                self._condition.wait((1 - self._tokens) / self.rate)
+
+    def on_success(self):
+        with self._condition:
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 100)
+
+    def on_throttle(self):
+        with self._condition:
+            self.throttles += 1
+            now = time.monotonic()
+            # Throttles of calls sent before the last decrease do not count twice
+            if now - self._last_decrease >= 1 / self.rate:
+                self._refill(now)
+                self.rate = max(self.min_rate, self.rate / 2)
+                self._tokens = min(self._tokens, 0)
+                self._last_decrease = now
+
+    def stats(self):
+        return {
+            "calls": self.calls,
+            "throttles": self.throttles,
+            "waitedSeconds": round(self.waited_seconds, 3),
+            "rate": round(self.rate, 2),
+        }
+
+
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+
+def get_bucket(family):
+    """
+    Return the process-wide bucket of an API family, or None when it is not limited
+    """
+    with _buckets_lock:
+        if family not in _buckets:
+            rate = float(
+                os.getenv(
+                    f"RATE_LIMIT_{family.upper().replace('-', '_')}",
+                    DEFAULT_RATES.get(family, 0),
+                )
+            )
+            _buckets[family] = TokenBucket(family, rate) if rate > 0 else None
+        return _buckets[family]
+
+
+def stats():
+    """
+    Counters of every API family limited so far, keyed by family
+    """
+    with _buckets_lock:
+        return {
+            family: bucket.stats()
+            for family, bucket in sorted(_buckets.items())
+            if bucket is not None
+        }
+
+
+def attach(client, family):
+    """
+    Make every HTTP attempt of a boto3 client, retries included, go through the
+    bucket of its API family
+    """
+    bucket = get_bucket(family)
+    if bucket is None:
+        return client
+
+    def before_send(**kwargs):
+        bucket.acquire()
+
+    def needs_retry(response=None, **kwargs):
+        if response is None:
+            return None
+        error_code = response[1].get("Error", {}).get("Code")
+        if error_code in THROTTLING_ERROR_CODES:
+            bucket.on_throttle()
+        elif not error_code:
+            bucket.on_success()
+        return None
+
+    client.meta.events.register("before-send", before_send)
+    client.meta.events.register("needs-retry", needs_retry)
+    return client
@@ -0,0 +1,77 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import json
+from collections import OrderedDict
+
+# Terraform's jsonencode escapes these characters, and AWS counts the escaped form
+_TERRAFORM_ESCAPES = {"<": "\\u003c", ">": "\\u003e", "&": "\\u0026"}
+
+
+def minified_json(document):
+    """
+    Serialize a document the way Terraform's jsonencode sends it to Organizations
+    """
+    text = json.dumps(document, separators=(",", ":"), ensure_ascii=False)
+    for char, escaped in _TERRAFORM_ESCAPES.items():
+        text = text.replace(char, escaped)
+    return text
+
+
+def policy_size(policy):
+    """
+    Number of characters AWS Organizations counts against the policy size quota
+    """
+    return len(minified_json(policy))
+
+
+class PolicySizeError(ValueError):
+    """
+    Raised when a policy can not be split into documents under the size quota
+    """
+
+
+def pack_policy(policy, size_limit, max_parts):
+    """
+    Split a policy into the smallest number of documents found by first-fit
+    decreasing, each under size_limit. Statements keep their original order
+    inside every document. A policy that already fits is returned unchanged.
+    """
+    if policy_size(policy) <= size_limit:
+        return [policy]
+
+    statements = policy.get("Statement", [])
+    header = OrderedDict((k, v) for k, v in policy.items() if k != "Statement")
+    empty_size = policy_size(OrderedDict(list(header.items()) + [("Statement", [])]))
+    sizes = [len(minified_json(statement)) for statement in statements]
+
+    for index, size in enumerate(sizes):
+        if empty_size + size > size_limit:
+            raise PolicySizeError(
+                f"Statement {index + 1} alone is {empty_size + size} characters, over the {size_limit} characters quota"
+            )
+
+    # Each part is [used_size, [statement indexes]]; a comma separates statements
+    parts = []
+    for index in sorted(range(len(statements)), key=lambda i: (-sizes[i], i)):
+        for part in parts:
+            if part[0] + 1 + sizes[index] <= size_limit:
+                part[0] += 1 + sizes[index]
+                part[1].append(index)
+                break
+        else:
+            parts.append([empty_size + sizes[index], [index]])
+
+    if len(parts) > max_parts:
+        raise PolicySizeError(
+            f"Policy needs {len(parts)} documents of at most {size_limit} characters, over the limit of {max_parts}"
+        )
+
+    # Order documents by their first statement so sub-SIDs are stable
+    return [
+        OrderedDict(
+            list(header.items())
+            + [("Statement", [statements[index] for index in sorted(indexes)])]
+        )
+        for indexes in sorted((indexes for _, indexes in parts), key=min)
+    ]
@@ -0,0 +1,86 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import json
+from collections import OrderedDict
+
+from policyengine import sizing
+
+
+def escape_template(text):
+    """
+    Escape Terraform template sequences so strings of a .tf.json file are taken literally,
+    e.g. IAM policy variables like ${aws:username}
+    """
+    return text.replace("${", "$${").replace("%{", "%%{")
+
+
+def render_policy(policy):
+    """
+    Render a policy exactly like jsonencode() in HCL: sorted keys, no whitespace,
+    HTML-sensitive characters escaped
+    """
+    return sizing.minified_json(json.loads(json.dumps(policy, sort_keys=True)))
+
+
+def managed_name_prefix(policy_type):
+    """
+    Prefix of the names of the policies created by the rendered resources
+    """
+    return f"{policy_type.name}-mgmt-"
+
+
+def render_resources(policy_type, output):
+    """
+    Build the .tf.json document creating the policies and attachments of a
+    PolicyEngine.build() output. Map keys are sorted so the file is stable
+    between runs and resource addresses match the previous HCL configuration.
+    """
+    # Object keys are templates too, and every policy key must match the sid value
+    # of its attachments once Terraform evaluates both
+    policies = OrderedDict(
+        (
+            escape_template(sid),
+            OrderedDict(
+                [
+                    ("comments", escape_template(str(body["comments"]))),
+                    ("content", escape_template(render_policy(body["policy"]))),
+                ]
+            ),
+        )
+        for sid, body in sorted(output["policies"].items())
+    )
+    attachments = OrderedDict(
+        (
+            escape_template(f"{sid}-{target_id}"),
+            OrderedDict(
+                [
+                    ("sid", escape_template(sid)),
+                    ("target_id", escape_template(target_id)),
+                ]
+            ),
+        )
+        for sid, target_id in sorted(output["attachments"])
+    )
+
+    policy_resource = f"{policy_type.name}_policy"
+    return {
+        "resource": {
+            "aws_organizations_policy": {
+                policy_resource: {
+                    "for_each": policies,
+                    "name": f"{managed_name_prefix(policy_type)}${{each.key}}",
+                    "description": f"{policy_type.label} Policy for ${{each.value.comments}}",
+                    "content": "${each.value.content}",
+                    "type": policy_type.organizations_type,
+                }
+            },
+            "aws_organizations_policy_attachment": {
+                f"{policy_type.name}_attachment": {
+                    "for_each": attachments,
+                    "policy_id": f"${{aws_organizations_policy.{policy_resource}[each.value.sid].id}}",
+                    "target_id": "${each.value.target_id}",
+                }
+            },
+        }
+    }
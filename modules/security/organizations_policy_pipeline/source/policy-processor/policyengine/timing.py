@@ -0,0 +1,161 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import contextlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+class Recorder:
+    """
+    Thread-safe record of timed spans (stages, statements and AWS calls) of a run.
+    It produces a per-stage and per-SID summary and a Chrome trace-event timeline
+    that can be opened in chrome://tracing or Perfetto.
+    """
+
+    def __init__(self):
+        self._spans = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._started = time.perf_counter()
+
+    def reset(self):
+        with self._lock:
+            self._spans = []
+            self._started = time.perf_counter()
+
+    def current_sid(self):
+        return getattr(self._local, "sid", None)
+
+    @contextlib.contextmanager
+    def sid_context(self, sid):
+        """
+        Attribute the spans and log records of the enclosed block to sid, e.g. in
+        a helper thread started on behalf of a SID
+        """
+        parent_sid = getattr(self._local, "sid", None)
+        self._local.sid = sid or parent_sid
+        try:
+            yield
+        finally:
+            self._local.sid = parent_sid
+
+    @contextlib.contextmanager
+    def span(self, name, category="stage", sid=None):
+        """
+        Time the enclosed block. Spans opened inside a SID span inherit its SID
+        when they run on the same thread.
+        """
+        parent_sid = getattr(self._local, "sid", None)
+        sid = sid or parent_sid
+        self._local.sid = sid
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            self._local.sid = parent_sid
+            with self._lock:
+                self._spans.append(
+                    (name, category, sid, start, end, threading.get_ident())
+                )
+
+    def summary(self):
+        """
+        Return {wallSeconds, stages: {name: {count, totalSeconds, maxSeconds}},
+        sids: {sid: {name: totalSeconds}}}
+        """
+        with self._lock:
+            spans = list(self._spans)
+            wall = time.perf_counter() - self._started
+
+        stages = {}
+        sids = {}
+        for name, _, sid, start, end, _ in spans:
+            duration = end - start
+            stage = stages.setdefault(
+                name, {"count": 0, "totalSeconds": 0.0, "maxSeconds": 0.0}
+            )
+            stage["count"] += 1
+            stage["totalSeconds"] += duration
+            stage["maxSeconds"] = max(stage["maxSeconds"], duration)
+            if sid is not None:
+                sid_stages = sids.setdefault(sid, {})
+                sid_stages[name] = sid_stages.get(name, 0.0) + duration
+
+        return OrderedDict(
+            [
+                ("wallSeconds", round(wall, 6)),
+                (
+                    "stages",
+                    OrderedDict(
+                        (name, {k: round(v, 6) for k, v in stage.items()})
+                        for name, stage in sorted(
+                            stages.items(), key=lambda item: -item[1]["totalSeconds"]
+                        )
+                    ),
+                ),
+                (
+                    "sids",
+                    OrderedDict(
+                        (sid, {k: round(v, 6) for k, v in sorted(sid_stages.items())})
+                        for sid, sid_stages in sorted(sids.items())
+                    ),
+                ),
+            ]
+        )
+
+    def trace_events(self):
+        """
+        Return the spans as Chrome trace "complete" events, one row per thread
+        """
+        with self._lock:
+            spans = list(self._spans)
+            started = self._started
+
+        thread_rows = {}
+        events = []
+        for name, category, sid, start, end, thread_id in sorted(
+            spans, key=lambda span: span[3]
+        ):
+            row = thread_rows.setdefault(thread_id, len(thread_rows) + 1)
+            event = {
+                "name": name,
+                "cat": category,
+                "ph": "X",
+                "ts": round((start - started) * 1e6, 1),
+                "dur": round((end - start) * 1e6, 1),
+                "pid": os.getpid(),
+                "tid": row,
+            }
+            if sid is not None:
+                event["args"] = {"sid": sid}
+            events.append(event)
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write_summary(self, file_path):
+        with open(file_path, "w") as f:
+            json.dump(self.summary(), f, indent=2)
+
+    def write_trace(self, file_path):
+        with open(file_path, "w") as f:
+            json.dump(self.trace_events(), f)
+
+
+# Process-wide recorder used by the engine and the merge/optimize functions
+recorder = Recorder()
+
+
+def span(name, category="stage", sid=None):
+    return recorder.span(name, category, sid)
+
+
+def current_sid():
+    return recorder.current_sid()
+
+
+def sid_context(sid):
+    return recorder.sid_context(sid)
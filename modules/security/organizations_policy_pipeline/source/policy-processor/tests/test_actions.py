@@ -0,0 +1,51 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import pytest
+
+from policyengine.actions import pattern_subsumes, remove_subsumed_actions
+
+
+@pytest.mark.parametrize(
+    "general, specific",
+    [
+        ("*", "s3:GetObject"),
+        ("*", "s3:*"),
+        ("s3:*", "s3:GetObject"),
+        ("s3:*", "s3:Get*"),
+        ("s3:Get*", "s3:GetObject*"),
+        ("s3:Get*", "s3:GetObject"),
+        ("s3:Get?bject", "s3:GetObject"),
+        ("s3:GetObject", "s3:getobject"),
+        ("s3:*Object", "s3:Get*Object"),
+        ("ec2:*", "ec2:?"),
+    ],
+)
+def test_pattern_subsumes(general, specific):
+    assert pattern_subsumes(general, specific)
+
+
+@pytest.mark.parametrize(
+    "general, specific",
+    [
+        ("s3:GetObject", "s3:Get*"),
+        ("s3:Get*", "s3:*"),
+        ("s3:Get?bject", "s3:Get*bject"),
+        ("s3:?", "s3:*"),
+        ("s3:*", "s3express:GetObject"),
+        ("s3:Get*", "s3:PutObject"),
+        ("s3:*Object", "s3:Get*"),
+    ],
+)
+def test_pattern_does_not_subsume(general, specific):
+    assert not pattern_subsumes(general, specific)
+
+
+def test_remove_subsumed_actions_keeps_order_and_first_equivalent_pattern():
+    actions = ["ec2:RunInstances", "s3:Get*", "ec2:*", "s3:GetObject", "EC2:*"]
+    assert remove_subsumed_actions(actions) == ["s3:Get*", "ec2:*"]
+
+
+def test_remove_subsumed_actions_keeps_unrelated_actions():
+    actions = ["s3:GetObject", "s3:PutObject", "iam:Get*"]
+    assert remove_subsumed_actions(actions) == actions
@@ -0,0 +1,32 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+from benchmarks.run import compare, percentile
+
+
+def scenario(**metrics):
+    values = {"seconds": 1.0, "throughput": 48.0, "p50": 0.02, "p99": 0.04}
+    values["peakRssMb"] = 40.0
+    values.update(metrics)
+    return values
+
+
+def report(**metrics):
+    return {"scenarios": {"mergeguardrails": scenario(**metrics)}}
+
+
+def test_p99_of_few_samples_is_the_slowest_call():
+    assert percentile([0.01] * 47 + [0.5], 0.99) == 0.5
+
+
+def test_one_stalled_call_is_not_a_p99_regression():
+    assert compare(report(p99=0.055), report(), 0.25) == []
+
+
+def test_tail_regressions_are_reported():
+    assert compare(report(p99=0.07), report(), 0.25) == [
+        "mergeguardrails: p99 0.07, baseline 0.04"
+    ]
+    assert compare(report(throughput=30.0, seconds=1.6), report(), 0.25) == [
+        "mergeguardrails: throughput 30.0/s, baseline 48.0/s"
+    ]
@@ -0,0 +1,83 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import os
+import time
+
+import pytest
+from botocore.exceptions import ClientError
+
+from policyengine.cache import DiskBackend, S3Backend, ValidationCache
+
+DOCUMENT = {"Version": "2012-10-17", "Statement": [{"Effect": "Deny"}]}
+
+
+def test_key_ignores_formatting_and_security_gate_order():
+    key = ValidationCache.make_key(
+        "validate", "SCP", ["ERROR", "SECURITY_WARNING"], DOCUMENT
+    )
+    assert key == ValidationCache.make_key(
+        "validate",
+        "SCP",
+        '["SECURITY_WARNING", "ERROR"]',
+        '{"Statement": [{"Effect": "Deny"}], "Version": "2012-10-17"}',
+    )
+    assert key != ValidationCache.make_key("validate", "RCP", ["ERROR"], DOCUMENT)
+    assert key != ValidationCache.make_key(
+        "validate",
+        "SCP",
+        ["ERROR", "SECURITY_WARNING"],
+        {"Version": "2012-10-17", "Statement": [{"Effect": "Allow"}]},
+    )
+
+
+def test_entries_expire_after_the_ttl(tmp_path):
+    backend = DiskBackend(str(tmp_path))
+    validation_cache = ValidationCache(backend, ttl_seconds=60)
+    validation_cache.put("key", ["finding"])
+    assert validation_cache.get("key") == ["finding"]
+
+    backend.put("key", b'{"created": 0, "value": ["finding"]}')
+    assert validation_cache.get("key") is None
+    assert backend.get("key") is None
+    assert (validation_cache.hits, validation_cache.misses) == (1, 1)
+
+
+def test_corrupted_entry_is_a_miss(tmp_path):
+    backend = DiskBackend(str(tmp_path))
+    backend.put("key", b"{not json")
+    assert ValidationCache(backend).get("key") is None
+
+
+def test_evict_removes_the_oldest_entries_over_the_size_limit(tmp_path):
+    backend = DiskBackend(str(tmp_path))
+    now = time.time()
+    for age, key in [(30, "old"), (20, "middle"), (10, "new")]:
+        backend.put(key, b"x" * 100)
+        os.utime(tmp_path / f"{key}.json", (now - age, now - age))
+    backend.put("expired", b"x")
+    os.utime(tmp_path / "expired.json", (now - 7200, now - 7200))
+
+    evicted = ValidationCache(backend, ttl_seconds=3600, max_bytes=150).evict()
+
+    assert evicted == 2
+    assert sorted(key for key, _, _ in backend.entries()) == ["new"]
+
+
+class StubS3Client:
+    def __init__(self, code):
+        self.code = code
+
+    def get_object(self, Bucket, Key):
+        raise ClientError({"Error": {"Code": self.code}}, "GetObject")
+
+
+@pytest.mark.parametrize("code", ["NoSuchKey", "404", "403", "AccessDenied"])
+def test_s3_missing_object_is_a_miss(code):
+    assert S3Backend("bucket", client=StubS3Client(code)).get("key") is None
+
+
+def test_s3_other_errors_are_raised():
+    backend = S3Backend("bucket", client=StubS3Client("SlowDown"))
+    with pytest.raises(ClientError):
+        backend.get("key")
@@ -0,0 +1,72 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+from policyengine.capacity import attachment_report, over_quota
+from policyengine.policytypes import RCP, SCP
+
+
+def live_policy(name):
+    return {"Id": f"p-{name}", "Name": name}
+
+
+def test_attachment_report_replaces_managed_and_keeps_other_policies():
+    output = {
+        "policies": {},
+        "attachments": [
+            ["deny-root", "ou-1"],
+            ["deny-s3", "ou-1"],
+            ["deny-root", "111111111111"],
+        ],
+    }
+    live = {
+        "ou-1": [
+            live_policy("FullAWSAccess"),
+            live_policy("scp-mgmt-old-sid"),
+            live_policy("external"),
+        ],
+        "111111111111": [live_policy("FullAWSAccess")],
+    }
+
+    report = attachment_report(SCP, output, live)
+
+    assert list(report) == ["ou-1", "111111111111"]
+    assert report["ou-1"] == {
+        "Kept": ["FullAWSAccess", "external"],
+        "Desired": ["deny-root", "deny-s3"],
+        "Total": 4,
+        "Quota": 5,
+    }
+    assert report["111111111111"]["Total"] == 2
+    assert over_quota(report) == []
+
+
+def test_target_over_the_quota():
+    output = {
+        "policies": {},
+        "attachments": [[f"sid-{index}", "ou-1"] for index in range(4)],
+    }
+    live = {
+        "ou-1": [
+            live_policy("RCPFullAWSAccess"),
+            live_policy("rcp-elsewhere"),
+            live_policy("rcp-mgmt-sid-0"),
+        ]
+    }
+
+    report = attachment_report(RCP, output, live)
+
+    assert report["ou-1"]["Total"] == 6
+    assert over_quota(report) == [("ou-1", report["ou-1"])]
+
+
+def test_prefix_of_the_other_policy_type_is_not_managed():
+    output = {"policies": {}, "attachments": [["sid", "ou-1"]]}
+    live = {"ou-1": [live_policy("rcp-mgmt-sid")]}
+    assert attachment_report(SCP, output, live)["ou-1"]["Kept"] == ["rcp-mgmt-sid"]
+
+
+def test_unknown_target_counts_only_desired_policies():
+    output = {"policies": {}, "attachments": [["a", "ou-missing"], ["b", "ou-missing"]]}
+    report = attachment_report(SCP, output, {"ou-missing": None})
+    assert report["ou-missing"]["Kept"] is None
+    assert report["ou-missing"]["Total"] == 2
@@ -0,0 +1,61 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import json
+import os
+
+from policyengine.catalog import GuardrailCatalog
+
+STATEMENT = {"Sid": "DenyRoot", "Effect": "Deny", "Action": "*", "Resource": "*"}
+
+
+def write(path, content):
+    path.write_text(json.dumps(content))
+    return os.path.normpath(str(path))
+
+
+def test_folder_is_loaded_and_sids_are_stripped(tmp_path):
+    guardrail = write(tmp_path / "root.json", [STATEMENT])
+    policy = write(tmp_path / "policy.json", {"Statement": [dict(STATEMENT, sid="x")]})
+    (tmp_path / "notes.txt").write_text("ignored")
+
+    catalog = GuardrailCatalog(max_workers=2)
+    catalog.load_folder(str(tmp_path))
+
+    assert sorted(catalog._entries) == sorted([guardrail, policy])
+    expected = [{"Effect": "Deny", "Action": "*", "Resource": "*"}]
+    assert catalog.get(guardrail).statements == expected
+    assert catalog.get(policy).statements == expected
+    assert catalog.get(guardrail).content == [STATEMENT]
+    assert catalog.get(guardrail).statement_hashes == (
+        catalog.get(policy).statement_hashes
+    )
+
+
+def test_invalid_and_missing_files(tmp_path):
+    (tmp_path / "broken.json").write_text("{not json")
+    catalog = GuardrailCatalog()
+    entry = catalog.get(str(tmp_path / "broken.json"))
+    assert (entry.content, entry.statements) == (None, [])
+    assert catalog.digest(str(tmp_path / "missing.json")) is None
+
+
+def test_refresh_reloads_edited_files_and_drops_deleted_ones(tmp_path):
+    edited = write(tmp_path / "edited.json", [STATEMENT])
+    touched = write(tmp_path / "touched.json", [STATEMENT])
+    deleted = write(tmp_path / "deleted.json", [STATEMENT])
+    catalog = GuardrailCatalog()
+    catalog.load_folder(str(tmp_path))
+    digest = catalog.digest(edited)
+
+    write(tmp_path / "edited.json", [dict(STATEMENT, Effect="Allow")])
+    stat = os.stat(touched)
+    os.utime(touched, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    os.remove(deleted)
+
+    # touched.json has a new mtime but the same content, so it is not reported
+    assert sorted(catalog.refresh()) == sorted([edited, deleted])
+    assert catalog.digest(edited) != digest
+    assert catalog.get(edited).statements[0]["Effect"] == "Allow"
+    assert deleted not in catalog._entries
+    assert catalog.refresh() == []
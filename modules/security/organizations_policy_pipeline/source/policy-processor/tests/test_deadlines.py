@@ -0,0 +1,82 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import threading
+import time
+
+import pytest
+
+from policyengine import deadlines
+from policyengine.deadlines import Deadline
+from policyengine.errors import DeadlineExceeded
+
+
+class Calls:
+    """
+    Callable answering with one behaviour per call: a (delay, result) pair, where
+    an exception result is raised
+    """
+
+    def __init__(self, *behaviours):
+        self.behaviours = list(behaviours)
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            delay, result = self.behaviours[self.count]
+            self.count += 1
+        time.sleep(delay)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+def test_call_without_limits_runs_directly():
+    assert deadlines.call(None, "Api", Calls((0, "ok"))) == "ok"
+    assert Deadline().call("Api", Calls((0, "ok"))) == "ok"
+
+
+def test_slow_call_exceeds_its_timeout():
+    deadline = Deadline(call_timeout=0.05)
+    with pytest.raises(DeadlineExceeded, match="Api for SID sid did not complete"):
+        deadline.call("Api", Calls((1, "late")), "sid")
+
+
+def test_spent_budget_fails_before_the_call():
+    deadline = Deadline(budget_seconds=0.01)
+    time.sleep(0.02)
+    calls = Calls((0, "ok"))
+    with pytest.raises(DeadlineExceeded, match="exhausted before Api"):
+        deadline.call("Api", calls)
+    assert calls.count == 0
+
+
+def test_slow_idempotent_call_is_hedged():
+    deadline = Deadline(hedge_after=0.05)
+    calls = Calls((1, "slow"), (0, "fast"))
+    assert deadline.call("Api", calls, idempotent=True) == "fast"
+    assert (calls.count, deadline.hedged_calls) == (2, 1)
+
+    calls = Calls((0.2, "slow"), (0, "fast"))
+    assert deadline.call("Api", calls) == "slow"
+    assert calls.count == 1
+
+
+def test_failed_hedged_request_leaves_the_other_one_an_answer():
+    deadline = Deadline(hedge_after=0.05)
+    calls = Calls((0.1, "first"), (0, RuntimeError("hedge failed")))
+    assert deadline.call("Api", calls, idempotent=True) == "first"
+
+
+def test_success_wins_when_both_requests_are_done():
+    deadline = Deadline(hedge_after=0.05)
+    calls = Calls((0.1, RuntimeError("first failed")), (0.05, "hedge"))
+    assert deadline.call("Api", calls, idempotent=True) == "hedge"
+
+
+def test_error_of_the_first_request_when_both_fail():
+    deadline = Deadline(hedge_after=0.05)
+    calls = Calls((0.1, RuntimeError("first failed")), (0, RuntimeError("hedge")))
+    with pytest.raises(RuntimeError, match="first failed"):
+        deadline.call("Api", calls, idempotent=True)
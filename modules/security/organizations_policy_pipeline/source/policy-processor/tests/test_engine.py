@@ -0,0 +1,102 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import json
+import threading
+import time
+
+import pytest
+
+from policyengine.engine import PolicyEngine
+from policyengine.errors import PolicyProcessingError
+from policyengine.policytypes import SCP
+
+
+class StubEngine(PolicyEngine):
+    """
+    Engine whose policies are built locally, with a delay or a failure per SID
+    """
+
+    def __init__(self, repository_root, delays=None, failures=(), **kwargs):
+        super().__init__(repository_root, capacity_check=False, **kwargs)
+        self.delays = delays or {}
+        self.failures = set(failures)
+        self.built = []
+        self._built_lock = threading.Lock()
+
+    def build_policy(self, policy_type, statement):
+        with self._built_lock:
+            self.built.append(statement["SID"])
+        time.sleep(self.delays.get(statement["SID"], 0))
+        if statement["SID"] in self.failures:
+            raise PolicyProcessingError(f"Failed SID {statement['SID']}")
+        return [{"Version": "2012-10-17", "Statement": [statement["SID"]]}]
+
+
+def write_repository(root, sids):
+    statements = [
+        {
+            "SID": sid,
+            "Guardrails": [],
+            "Policy": "",
+            "Target": {"Type": "Account", "ID": f"acct:{index:012d}"},
+            "Comments": f"Statement {sid}",
+        }
+        for index, sid in enumerate(sids)
+    ]
+    folder = root / SCP.folder
+    (folder / "guardrails").mkdir(parents=True)
+    (folder / "policies").mkdir()
+    (folder / SCP.management_file).write_text(json.dumps(statements))
+    (root / "environments").mkdir()
+    (root / "environments" / "environments.json").write_text("[]")
+    return str(root)
+
+
+def test_output_keeps_manifest_order(tmp_path):
+    sids = ["a", "b", "c", "d"]
+    delays = {"a": 0.2, "b": 0.1, "c": 0.05}
+    engine = StubEngine(write_repository(tmp_path, sids), delays, max_workers=4)
+
+    output = engine.build(SCP)
+
+    assert list(output["policies"]) == sids
+    assert output["attachments"] == [
+        [sid, f"{index:012d}"] for index, sid in enumerate(sids)
+    ]
+    assert output["policies"]["b"]["comments"] == "Statement b"
+
+
+def test_failure_of_the_lowest_index_is_raised(tmp_path):
+    # "a" fails after "b" has already failed; the error of "a" is reported
+    engine = StubEngine(
+        write_repository(tmp_path, ["a", "b"]),
+        delays={"a": 0.2},
+        failures={"a", "b"},
+        max_workers=2,
+    )
+
+    with pytest.raises(PolicyProcessingError, match="Failed SID a"):
+        engine.build(SCP)
+
+
+def test_statements_after_a_failure_are_not_built(tmp_path):
+    engine = StubEngine(
+        write_repository(tmp_path, ["a", "b", "c", "d"]),
+        delays={"c": 0.2},
+        failures={"b"},
+        max_workers=1,
+    )
+
+    with pytest.raises(PolicyProcessingError, match="Failed SID b"):
+        engine.build(SCP)
+    # "c" may be picked up before the failure is seen, "d" is cancelled
+    assert engine.built[:2] == ["a", "b"]
+    assert "d" not in engine.built
+
+
+def test_duplicated_sids_are_rejected(tmp_path):
+    engine = StubEngine(write_repository(tmp_path, ["a", "a"]))
+    with pytest.raises(PolicyProcessingError, match="Duplicated SID: a"):
+        engine.build(SCP)
+    assert engine.built == []
@@ -0,0 +1,105 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+from policyengine.equivalence import compare_policies, statement_scope
+from policyengine.mergeandoptimize import optimize_iam_policy
+from policyengine.policytypes import RCP
+
+
+def policy(*statements):
+    return {"Version": "2012-10-17", "Statement": list(statements)}
+
+
+def test_merged_statements_are_proven_equivalent():
+    original = policy(
+        {"Sid": "A", "Effect": "Deny", "Action": ["s3:PutObject"], "Resource": "*"},
+        {"Sid": "B", "Effect": "Deny", "Action": "ec2:RunInstances", "Resource": ["*"]},
+    )
+    proven, undecided = compare_policies(original, optimize_iam_policy(original))
+    assert (proven, undecided) == (1, [])
+
+
+def test_missing_resource_is_read_as_star():
+    original = policy(
+        {"Effect": "Deny", "Action": ["s3:PutObject"]},
+        {"Effect": "Deny", "Action": ["ec2:RunInstances"], "Condition": {}},
+    )
+    proven, undecided = compare_policies(original, optimize_iam_policy(original))
+    assert (proven, undecided) == (1, [])
+
+
+def test_wildcard_covering_pruned_actions_is_equivalent():
+    original = policy(
+        {"Effect": "Deny", "Action": ["s3:GetObject", "s3:Get*"], "Resource": "*"}
+    )
+    optimized = policy({"Effect": "Deny", "Action": ["s3:Get*"], "Resource": ["*"]})
+    assert compare_policies(original, optimized) == (1, [])
+
+
+def test_dropped_action_is_not_proven():
+    original = policy(
+        {"Effect": "Deny", "Action": ["s3:GetObject", "s3:PutObject"], "Resource": "*"}
+    )
+    optimized = policy({"Effect": "Deny", "Action": ["s3:GetObject"], "Resource": "*"})
+    proven, undecided = compare_policies(original, optimized)
+    assert proven == 0
+    assert undecided == [(original["Statement"], optimized["Statement"])]
+
+
+def test_different_conditions_are_different_scopes():
+    condition = {"Bool": {"aws:SecureTransport": "false"}}
+    original = policy(
+        {"Effect": "Deny", "Action": ["s3:*"], "Resource": "*", "Condition": condition}
+    )
+    optimized = policy({"Effect": "Deny", "Action": ["s3:*"], "Resource": "*"})
+    proven, undecided = compare_policies(original, optimized)
+    assert proven == 0
+    assert len(undecided) == 2
+
+
+def test_notaction_statements_are_matched_one_to_one():
+    original = policy(
+        {"Effect": "Deny", "NotAction": ["iam:*", "sts:*"], "Resource": "*"},
+    )
+    optimized = policy(
+        {"Effect": "Deny", "NotAction": ["sts:*", "iam:*"], "Resource": "*"},
+    )
+    assert compare_policies(original, optimized) == (1, [])
+
+    widened = policy({"Effect": "Deny", "NotAction": ["iam:*"], "Resource": "*"})
+    assert compare_policies(original, widened)[0] == 0
+
+
+def test_scope_normalizes_principal_and_resource_lists():
+    first = {
+        "Effect": "Deny",
+        "Principal": "*",
+        "Action": "s3:*",
+        "Resource": ["b", "a"],
+    }
+    second = {
+        "Effect": "Deny",
+        "Principal": {"AWS": "*"},
+        "Action": "s3:Get*",
+        "Resource": ["a", "b", "a"],
+    }
+    assert statement_scope(first) == statement_scope(second)
+
+
+def test_rcp_merge_is_proven_equivalent():
+    original = policy(
+        {
+            "Effect": "Deny",
+            "Principal": "*",
+            "Action": ["s3:PutObject"],
+            "Resource": "*",
+        },
+        {
+            "Effect": "Deny",
+            "Principal": {"AWS": "*"},
+            "Action": ["sqs:*"],
+            "Resource": "*",
+        },
+    )
+    proven, undecided = compare_policies(original, optimize_iam_policy(original, RCP))
+    assert (proven, undecided) == (1, [])
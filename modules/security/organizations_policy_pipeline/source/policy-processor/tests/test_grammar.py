@@ -0,0 +1,102 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import json
+
+import pytest
+
+from policyengine.equivalence import statement_scope
+from policyengine.grammar import check_document, check_statement, check_statements
+from policyengine.policytypes import RCP, SCP, WILDCARD_PRINCIPALS
+
+
+def test_valid_statements():
+    assert (
+        check_statement(
+            {"Sid": "A", "Effect": "Deny", "Action": "s3:*", "Resource": "*"}, SCP
+        )
+        == []
+    )
+    assert check_statement({"Effect": "Deny", "Action": ["s3:Get*"]}, SCP) == []
+    assert (
+        check_statement(
+            {"Effect": "Deny", "Principal": "*", "Action": "s3:*", "Resource": "*"}, RCP
+        )
+        == []
+    )
+
+
+def test_action_and_notaction_are_exclusive():
+    problems = check_statement(
+        {"Effect": "Deny", "Action": "s3:*", "NotAction": "iam:*"}, SCP
+    )
+    assert "Action and NotAction can not be used together" in problems
+    assert "Action or NotAction is missing" in check_statement({"Effect": "Deny"}, SCP)
+
+
+def test_rcp_rules():
+    problems = check_statement(
+        {"Effect": "Allow", "Action": "s3:*", "Resource": "*"}, RCP
+    )
+    assert any(
+        problem.startswith("Effect 'Allow' is not supported") for problem in problems
+    )
+    assert any(problem.startswith("Principal is missing") for problem in problems)
+
+
+@pytest.mark.parametrize("principal", WILDCARD_PRINCIPALS)
+def test_wildcard_principals_are_accepted_and_equivalent(principal):
+    statement = {"Effect": "Deny", "Principal": principal, "Action": "s3:*"}
+    assert check_statement(statement, RCP) == []
+    assert statement_scope(statement) == statement_scope(dict(statement, Principal="*"))
+
+
+def test_specific_principal_is_rejected():
+    statement = {
+        "Effect": "Deny",
+        "Principal": {"AWS": ["arn:aws:iam::111111111111:root"]},
+        "Action": "s3:*",
+    }
+    assert any(
+        problem.startswith("Principal {'AWS'")
+        for problem in check_statement(statement, RCP)
+    )
+
+
+def test_oversized_statement():
+    statement = {
+        "Effect": "Deny",
+        "Action": [f"s3:Action{index:05d}" for index in range(400)],
+    }
+    assert any(
+        "characters quota" in problem for problem in check_statement(statement, SCP)
+    )
+
+
+def test_problems_are_labelled_with_position_and_sid():
+    problems = check_statements(
+        [{"Effect": "Deny", "Action": "s3:*"}, {"Sid": "Bad", "Effect": "Deny"}], SCP
+    )
+    assert problems == ["Statement 2 (Bad): Action or NotAction is missing"]
+
+
+def test_document_elements():
+    problems = check_document(
+        {"Version": "2008-10-17", "Extra": 1, "Statement": []}, SCP
+    )
+    assert "Policy element 'Extra' is not supported" in problems
+    assert not any(problem.startswith("Version") for problem in problems)
+    assert "Statement is missing" in check_document({"Version": "2012-10-17"}, SCP)
+
+
+def test_statement_size_does_not_count_the_sid():
+    statement = {"Effect": "Deny", "Action": ["s3:GetObject"], "Resource": "*"}
+    envelope_size = len('{"Version":"2012-10-17","Statement":[]}')
+    padding = 5120 - envelope_size - len(json.dumps(statement, separators=(",", ":")))
+    statement["Resource"] = "*" + "x" * padding
+    assert check_statement(statement, SCP) == []
+    assert check_statement(dict(statement, Sid="A" * 100), SCP) == []
+    statement["Resource"] += "x"
+    assert any(
+        "characters quota" in problem for problem in check_statement(statement, SCP)
+    )
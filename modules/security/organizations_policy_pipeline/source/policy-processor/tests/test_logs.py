@@ -0,0 +1,64 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import logging
+import threading
+
+import pytest
+
+from policyengine import logs, timing
+
+logger = logging.getLogger("policyengine.tests")
+
+
+@pytest.fixture
+def configured():
+    logs.configure(logging.INFO, console=False)
+    yield
+    logs.shutdown()
+
+
+def test_records_are_prefixed_with_the_sid_of_their_thread(configured, tmp_path):
+    log_path = tmp_path / "scp.log"
+
+    def helper():
+        with timing.sid_context("helper-sid"):
+            logger.info("from a helper thread")
+
+    with logs.log_file(str(log_path)):
+        with timing.span("statement", sid="deny-root"):
+            logger.info("processing")
+            thread = threading.Thread(target=helper)
+            thread.start()
+            thread.join()
+        logger.info("done")
+        logger.info("explicit", extra={"sid": "other"})
+
+    lines = log_path.read_text().splitlines()
+    assert [line.split(" - ", 3)[3] for line in lines] == [
+        "[deny-root] processing",
+        "[helper-sid] from a helper thread",
+        "done",
+        "[other] explicit",
+    ]
+
+
+def test_log_file_level(configured, tmp_path):
+    log_path = tmp_path / "rcp.log"
+    with logs.log_file(str(log_path), logging.WARNING):
+        logger.info("skipped")
+        logger.warning("kept")
+    assert log_path.read_text().count("\n") == 1
+    assert "kept" in log_path.read_text()
+
+
+def test_log_file_requires_configure(tmp_path):
+    with pytest.raises(RuntimeError, match="configure"):
+        with logs.log_file(str(tmp_path / "scp.log")):
+            pass
+
+
+def test_payload_is_truncated_at_the_limit():
+    value = {"Statement": ["x" * 100]}
+    assert str(logs.payload(value, limit=20)) == '{"Statement":["xxxxx... (truncated)'
+    assert str(logs.payload(value, limit=0)) == '{"Statement":["' + "x" * 100 + '"]}'
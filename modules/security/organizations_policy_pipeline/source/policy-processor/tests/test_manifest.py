@@ -0,0 +1,86 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import json
+
+import pytest
+
+from policyengine import manifest
+from policyengine.cache import DiskBackend
+from policyengine.manifest import BuildManifest, statement_input_hash
+
+STATEMENT = {
+    "SID": "deny-root",
+    "Guardrails": ["root"],
+    "Policy": "",
+    "Target": {"Type": "Environment", "ID": "env:prod"},
+    "Comments": "Deny root",
+}
+ENVIRONMENTS = [
+    {"ID": "env:prod", "Target": ["ou:ou-1"]},
+    {"ID": "env:dev", "Target": ["ou:ou-2"]},
+]
+POLICIES = [{"Version": "2012-10-17", "Statement": []}]
+
+
+def input_hash(statement=STATEMENT, environments=ENVIRONMENTS, gate=None, files=None):
+    files = files or {"guardrails/root.json": "digest-1"}
+    return statement_input_hash(
+        statement,
+        "guardrails/",
+        "policies/",
+        environments,
+        gate or ["ERROR", "SECURITY_WARNING"],
+        files.get,
+    )
+
+
+@pytest.mark.parametrize(
+    "changed",
+    [
+        {"statement": dict(STATEMENT, Guardrails=["root", "s3"])},
+        {"files": {"guardrails/root.json": "digest-2"}},
+        {"environments": [{"ID": "env:prod", "Target": ["ou:ou-3"]}]},
+        {"gate": ["ERROR"]},
+    ],
+)
+def test_changed_inputs_change_the_hash(changed):
+    assert input_hash(**changed) != input_hash()
+
+
+def test_unrelated_inputs_keep_the_hash():
+    assert input_hash(environments=ENVIRONMENTS[:1]) == input_hash()
+    assert input_hash(gate='["SECURITY_WARNING", "ERROR"]') == input_hash()
+
+
+def test_processor_change_changes_the_hash(monkeypatch):
+    previous = input_hash()
+    monkeypatch.setattr(manifest, "PROCESSOR_FINGERPRINT", "other")
+    assert input_hash() != previous
+
+
+def test_unchanged_sids_are_reused_and_removed_ones_dropped(tmp_path):
+    backend = DiskBackend(str(tmp_path))
+    first = BuildManifest(backend, "scp-manifest")
+    first.record("kept", "hash-1", POLICIES)
+    first.record("changed", "hash-2", POLICIES)
+    first.record("removed", "hash-3", POLICIES)
+    first.save()
+
+    second = BuildManifest(backend, "scp-manifest")
+    assert second.lookup("kept", "hash-1") == POLICIES
+    assert second.lookup("changed", "hash-new") is None
+    second.record("changed", "hash-new", POLICIES)
+    second.save()
+
+    assert (second.reused, second.rebuilt) == (1, 1)
+    saved = json.loads(backend.get("scp-manifest"))
+    assert sorted(saved) == ["changed", "kept"]
+    assert saved["changed"]["input_hash"] == "hash-new"
+
+
+def test_entries_without_split_policies_are_rebuilt(tmp_path):
+    backend = DiskBackend(str(tmp_path))
+    legacy = {"sid": {"input_hash": "hash-1", "policy": POLICIES[0]}}
+    backend.put("scp-manifest", json.dumps(legacy).encode("utf-8"))
+    assert BuildManifest(backend, "scp-manifest").lookup("sid", "hash-1") is None
@@ -0,0 +1,121 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import json
+import threading
+
+import pytest
+
+from policyengine.engine import PolicyEngine
+from policyengine.errors import PolicyProcessingError
+from policyengine.organization import AccountTagIndex, read_snapshot
+
+TAGS = {
+    "111111111111": {"env": "prod", "team": "a"},
+    "222222222222": {"env": "dev"},
+    "333333333333": {"env": "prod"},
+}
+
+
+class StubPaginator:
+    def __init__(self, pages):
+        self.pages = pages
+
+    def paginate(self, **kwargs):
+        return self.pages(**kwargs)
+
+
+class StubOrganizationsClient:
+    """
+    Serves list_accounts in two pages and list_tags_for_resource from TAGS
+    """
+
+    def __init__(self, failing_account=None):
+        self.failing_account = failing_account
+        self.calls = {"list_accounts": 0, "list_tags_for_resource": 0}
+        self._lock = threading.Lock()
+
+    def _count(self, operation):
+        with self._lock:
+            self.calls[operation] += 1
+
+    def _accounts(self):
+        self._count("list_accounts")
+        account_ids = list(TAGS)
+        yield {"Accounts": [{"Id": account_ids[0], "Name": "first"}]}
+        yield {
+            "Accounts": [
+                {"Id": account_id, "Status": "ACTIVE"} for account_id in account_ids[1:]
+            ]
+        }
+
+    def _tags(self, ResourceId):
+        self._count("list_tags_for_resource")
+        if ResourceId == self.failing_account:
+            raise RuntimeError(f"Cannot list the tags of {ResourceId}")
+        yield {
+            "Tags": [
+                {"Key": key, "Value": value} for key, value in TAGS[ResourceId].items()
+            ]
+        }
+
+    def get_paginator(self, operation):
+        if operation == "list_accounts":
+            return StubPaginator(self._accounts)
+        return StubPaginator(self._tags)
+
+
+def test_accounts_are_matched_by_tag_and_crawled_once():
+    client = StubOrganizationsClient()
+    index = AccountTagIndex(max_workers=2, client=client)
+
+    assert index.accounts_with_tag("env", "prod") == ["111111111111", "333333333333"]
+    assert index.accounts_with_tag("team", "a") == ["111111111111"]
+    assert index.accounts_with_tag("env", "test") == []
+    assert client.calls == {"list_accounts": 1, "list_tags_for_resource": 3}
+
+
+def test_crawl_is_written_to_and_loaded_from_the_snapshot(tmp_path):
+    snapshot_file = str(tmp_path / "org-snapshot.json")
+    AccountTagIndex(
+        client=StubOrganizationsClient(), snapshot_file=snapshot_file
+    ).build()
+
+    sections = read_snapshot(snapshot_file)
+    assert sections["tags"]["data"] == TAGS
+    assert sections["accounts"]["data"]["111111111111"] == {
+        "Name": "first",
+        "Status": None,
+    }
+
+    client = StubOrganizationsClient()
+    index = AccountTagIndex(client=client, snapshot_file=snapshot_file)
+    assert index.accounts_with_tag("env", "dev") == ["222222222222"]
+    assert client.calls["list_accounts"] == 0
+
+
+def test_stale_snapshot_is_crawled_again(tmp_path):
+    snapshot_file = tmp_path / "org-snapshot.json"
+    sections = {
+        "accounts": {"created": 0, "data": {"999999999999": {}}},
+        "tags": {"created": 0, "data": {"999999999999": {"env": "prod"}}},
+    }
+    snapshot_file.write_text(json.dumps({"version": 1, "sections": sections}))
+
+    client = StubOrganizationsClient()
+    index = AccountTagIndex(client=client, snapshot_file=str(snapshot_file))
+    assert index.accounts_with_tag("env", "prod") == ["111111111111", "333333333333"]
+    assert client.calls["list_accounts"] == 1
+
+
+def test_tag_lookup_errors_are_raised():
+    index = AccountTagIndex(client=StubOrganizationsClient("222222222222"))
+    with pytest.raises(RuntimeError, match="222222222222"):
+        index.accounts_with_tag("env", "prod")
+
+
+def test_engine_fails_the_statement_on_a_tag_lookup_error(tmp_path):
+    index = AccountTagIndex(client=StubOrganizationsClient("111111111111"))
+    engine = PolicyEngine(str(tmp_path), account_tag_index=index)
+    with pytest.raises(PolicyProcessingError, match="env=prod for SID tagged"):
+        engine.get_aws_accounts_by_tag("env", "prod", "tagged")
@@ -0,0 +1,94 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from policyengine import ratelimit
+from policyengine.ratelimit import TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(ratelimit, "time", clock)
+    return clock
+
+
+def test_throttles_halve_the_rate_down_to_the_floor(clock):
+    bucket = TokenBucket("test", 8, min_rate=1)
+    expected = [4, 2, 1, 1]
+    for rate in expected:
+        bucket.on_throttle()
+        assert bucket.rate == rate
+        clock.now += 1
+    assert bucket.throttles == 4
+
+
+def test_throttles_of_calls_in_flight_decrease_once(clock):
+    bucket = TokenBucket("test", 8)
+    bucket.on_throttle()
+    clock.now += 0.1
+    bucket.on_throttle()
+    assert (bucket.rate, bucket.throttles) == (4, 2)
+    clock.now += 0.25
+    bucket.on_throttle()
+    assert bucket.rate == 2
+
+
+def test_successes_grow_the_rate_back_to_the_maximum(clock):
+    bucket = TokenBucket("test", 10)
+    bucket.on_throttle()
+    for _ in range(49):
+        bucket.on_success()
+    assert bucket.rate == pytest.approx(9.9)
+    bucket.on_success()
+    bucket.on_success()
+    assert bucket.rate == 10
+
+
+def test_throttle_empties_the_bucket():
+    bucket = TokenBucket("test", 100, burst=5)
+    for _ in range(5):
+        bucket.acquire()
+    assert bucket.waited_seconds < 0.01
+
+    bucket.on_throttle()
+    started = time.monotonic()
+    bucket.acquire()
+    # One token at the halved rate of 50 calls per second
+    assert time.monotonic() - started >= 0.015
+    assert bucket.calls == 6
+
+
+class StubEvents:
+    def __init__(self):
+        self.handlers = {}
+
+    def register(self, event, handler):
+        self.handlers[event] = handler
+
+
+def test_attached_client_reports_throttles_and_successes(monkeypatch):
+    bucket = TokenBucket("test", 10)
+    monkeypatch.setattr(ratelimit, "get_bucket", lambda family: bucket)
+    client = SimpleNamespace(meta=SimpleNamespace(events=StubEvents()))
+    handlers = ratelimit.attach(client, "test").meta.events.handlers
+
+    handlers["before-send"]()
+    handlers["needs-retry"](response=(None, {"Error": {"Code": "ThrottlingException"}}))
+    assert (bucket.calls, bucket.throttles, bucket.rate) == (1, 1, 5)
+    handlers["needs-retry"](response=(None, {"Error": {"Code": "AccessDenied"}}))
+    assert bucket.rate == 5
+    handlers["needs-retry"](response=(None, {}))
+    assert bucket.rate == 5.1
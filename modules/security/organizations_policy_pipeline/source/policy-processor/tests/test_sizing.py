@@ -0,0 +1,78 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import json
+from collections import OrderedDict
+
+import pytest
+
+from policyengine.sizing import PolicySizeError, minified_json, pack_policy, policy_size
+
+
+def statement(sid, padding):
+    return OrderedDict(
+        [
+            ("Sid", sid),
+            ("Effect", "Deny"),
+            ("Action", ["s3:" + "x" * padding]),
+            ("Resource", "*"),
+        ]
+    )
+
+
+def document(*statements):
+    return OrderedDict([("Version", "2012-10-17"), ("Statement", list(statements))])
+
+
+def test_minified_json_escapes_like_terraform():
+    assert minified_json({"a": "<&>"}) == '{"a":"\\u003c\\u0026\\u003e"}'
+    assert policy_size({"a": "<"}) == len('{"a":"\\u003c"}')
+
+
+def test_policy_that_fits_is_returned_unchanged():
+    policy = document(statement("A", 10))
+    assert pack_policy(policy, policy_size(policy), 4) == [policy]
+
+
+def test_parts_fit_the_limit_and_keep_statement_order():
+    statements = [
+        statement(sid, size)
+        for sid, size in (("A", 100), ("B", 300), ("C", 200), ("D", 100))
+    ]
+    policy = document(*statements)
+    limit = policy_size(document(statements[1], statements[2])) + 5
+
+    parts = pack_policy(policy, limit, 4)
+
+    assert len(parts) == 2
+    assert all(policy_size(part) <= limit for part in parts)
+    sids = [[s["Sid"] for s in part["Statement"]] for part in parts]
+    assert sorted(sid for part in sids for sid in part) == ["A", "B", "C", "D"]
+    for part in sids:
+        assert part == sorted(part)
+    # Documents are ordered by their first statement
+    assert sids[0][0] == "A"
+
+
+def test_escaped_characters_count_against_the_limit():
+    wide = OrderedDict(
+        [("Effect", "Deny"), ("Action", "s3:" + "x" * 200), ("Resource", "<" * 10)]
+    )
+    policy = document(wide, wide)
+    # The policy fits before escaping, each "<" costs six characters after it
+    limit = len(json.dumps(policy, separators=(",", ":")))
+    assert policy_size(policy) > limit
+    assert len(pack_policy(policy, limit, 4)) == 2
+
+
+def test_statement_larger_than_the_limit_fails():
+    policy = document(statement("A", 500), statement("B", 10))
+    with pytest.raises(PolicySizeError, match="Statement 1 alone"):
+        pack_policy(policy, 200, 4)
+
+
+def test_too_many_parts_fail():
+    statements = [statement(str(index), 100) for index in range(4)]
+    limit = policy_size(document(statements[0])) + 5
+    with pytest.raises(PolicySizeError, match="needs 4 documents"):
+        pack_policy(document(*statements), limit, 3)
@@ -0,0 +1,107 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import json
+from collections import OrderedDict
+
+from policyengine.policytypes import RCP, SCP
+from policyengine.terraform import escape_template, render_policy, render_resources
+
+
+def test_escape_template():
+    assert (
+        escape_template("arn:aws:s3:::${aws:username}/*")
+        == "arn:aws:s3:::$${aws:username}/*"
+    )
+    assert escape_template("%{if x}") == "%%{if x}"
+    assert escape_template("$ and % alone") == "$ and % alone"
+
+
+def test_render_policy_matches_jsonencode():
+    policy = OrderedDict(
+        [
+            ("Version", "2012-10-17"),
+            ("Statement", [{"Resource": "<a&b>", "Effect": "Deny"}]),
+        ]
+    )
+    assert render_policy(policy) == (
+        '{"Statement":[{"Effect":"Deny","Resource":"\\u003ca\\u0026b\\u003e"}],"Version":"2012-10-17"}'
+    )
+
+
+def output():
+    return {
+        "policies": OrderedDict(
+            [
+                (
+                    "b-sid",
+                    {
+                        "comments": "Second",
+                        "policy": {"Statement": [], "Version": "2012-10-17"},
+                    },
+                ),
+                (
+                    "a-sid",
+                    {
+                        "comments": "Uses ${var}",
+                        "policy": {
+                            "Version": "2012-10-17",
+                            "Statement": [{"Resource": "${aws:username}"}],
+                        },
+                    },
+                ),
+            ]
+        ),
+        "attachments": [
+            ["b-sid", "ou-2"],
+            ["a-sid", "123456789012"],
+            ["a-sid", "ou-1"],
+        ],
+    }
+
+
+def test_render_resources():
+    resources = render_resources(SCP, output())["resource"]
+
+    policy = resources["aws_organizations_policy"]["scp_policy"]
+    assert list(policy["for_each"]) == ["a-sid", "b-sid"]
+    assert policy["for_each"]["a-sid"]["comments"] == "Uses $${var}"
+    assert json.loads(policy["for_each"]["a-sid"]["content"].replace("$${", "${")) == {
+        "Statement": [{"Resource": "${aws:username}"}],
+        "Version": "2012-10-17",
+    }
+    assert policy["name"] == "scp-mgmt-${each.key}"
+    assert policy["type"] == "SERVICE_CONTROL_POLICY"
+
+    attachment = resources["aws_organizations_policy_attachment"]["scp_attachment"]
+    assert list(attachment["for_each"]) == [
+        "a-sid-123456789012",
+        "a-sid-ou-1",
+        "b-sid-ou-2",
+    ]
+    assert attachment["for_each"]["a-sid-ou-1"] == {"sid": "a-sid", "target_id": "ou-1"}
+    assert (
+        attachment["policy_id"]
+        == "${aws_organizations_policy.scp_policy[each.value.sid].id}"
+    )
+
+
+def test_render_resources_is_stable():
+    reordered = output()
+    reordered["policies"] = OrderedDict(reversed(list(reordered["policies"].items())))
+    reordered["attachments"].reverse()
+    assert json.dumps(render_resources(RCP, output())) == json.dumps(
+        render_resources(RCP, reordered)
+    )
+
+
+def test_template_sequences_in_sids_are_escaped_everywhere():
+    body = {"comments": "c", "policy": {"Version": "2012-10-17", "Statement": []}}
+    resources = render_resources(
+        SCP, {"policies": {"sid-${x}": body}, "attachments": [["sid-${x}", "ou-1"]]}
+    )["resource"]
+
+    policies = resources["aws_organizations_policy"]["scp_policy"]["for_each"]
+    attachments = resources["aws_organizations_policy_attachment"]["scp_attachment"]
+    assert list(policies) == ["sid-$${x}"]
+    assert attachments["for_each"]["sid-$${x}-ou-1"]["sid"] == "sid-$${x}"
@@ -0,0 +1,86 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import json
+import threading
+import time
+
+import pytest
+
+from policyengine.timing import Recorder
+
+
+def test_nested_spans_inherit_the_sid_of_their_thread():
+    recorder = Recorder()
+    seen = []
+
+    def other_thread():
+        with recorder.span("other"):
+            seen.append(recorder.current_sid())
+
+    with recorder.span("statement", sid="a"):
+        with recorder.span("ListAccounts", "aws"):
+            assert recorder.current_sid() == "a"
+        thread = threading.Thread(target=other_thread)
+        thread.start()
+        thread.join()
+    assert recorder.current_sid() is None
+    assert seen == [None]
+
+    summary = recorder.summary()
+    assert set(summary["sids"]["a"]) == {"statement", "ListAccounts"}
+    assert "other" not in summary["sids"]["a"]
+
+
+def test_summary_aggregates_spans_by_stage():
+    recorder = Recorder()
+    for sid, delay in [("a", 0.02), ("b", 0.01)]:
+        with recorder.span("build", sid=sid):
+            time.sleep(delay)
+    with recorder.span("load"):
+        pass
+
+    summary = recorder.summary()
+    assert list(summary["stages"]) == ["build", "load"]
+    build = summary["stages"]["build"]
+    assert build["count"] == 2
+    assert build["maxSeconds"] >= 0.02
+    assert build["totalSeconds"] == pytest.approx(
+        summary["sids"]["a"]["build"] + summary["sids"]["b"]["build"], abs=1e-5
+    )
+    assert summary["wallSeconds"] >= build["totalSeconds"]
+
+
+def test_failed_span_is_recorded():
+    recorder = Recorder()
+    with pytest.raises(ValueError):
+        with recorder.span("build", sid="a"):
+            raise ValueError("boom")
+    assert recorder.summary()["stages"]["build"]["count"] == 1
+    assert recorder.current_sid() is None
+
+
+def test_trace_has_one_row_per_thread(tmp_path):
+    recorder = Recorder()
+
+    def worker():
+        with recorder.span("worker", "aws"):
+            pass
+
+    with recorder.span("main", sid="a"):
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+
+    recorder.write_trace(str(tmp_path / "trace.json"))
+    trace = json.loads((tmp_path / "trace.json").read_text())
+    events = trace["traceEvents"]
+    assert [event["name"] for event in events] == ["main", "worker"]
+    assert [event["tid"] for event in events] == [1, 2]
+    assert [event["cat"] for event in events] == ["stage", "aws"]
+    assert events[0]["args"] == {"sid": "a"}
+    assert "args" not in events[1]
+    assert all(event["ph"] == "X" and event["dur"] >= 0 for event in events)
+
+    recorder.reset()
+    assert recorder.trace_events()["traceEvents"] == []
@@ -53,6 +53,52 @@ variable "security_gate" {
   default = ["ERROR", "SECURITY_WARNING"]
 }
 
+variable "processor_max_workers" {
+  description = "Number of manifest statements the SCP/RCP policy processors handle concurrently. Use 1 for sequential processing"
+  type        = number
+  default     = 4
+  validation {
+    condition     = var.processor_max_workers >= 1
+    error_message = "processor_max_workers must be at least 1"
+  }
+}
+
+variable "processor_time_budget" {
+  description = "Seconds the policy processor may run before it fails with a timeout naming the SID and API. Use 0 for no limit"
+  type        = number
+  default     = 1800
+}
+
+variable "processor_call_timeout" {
+  description = "Seconds a single Access Analyzer or Organizations call may take, retries included. Use 0 for no limit"
+  type        = number
+  default     = 300
+}
+
+variable "enable_validation_cache" {
+  description = "Cache IAM Access Analyzer results in the artifacts bucket so unchanged policies are not validated again"
+  type        = bool
+  default     = true
+}
+
+variable "validation_cache_ttl" {
+  description = "If enable_validation_cache is true, number of seconds a cached Access Analyzer result is reused"
+  type        = number
+  default     = 604800
+}
+
+variable "enable_incremental_build" {
+  description = "Keep a build manifest in the artifacts bucket and only re-merge and re-validate statements whose inputs changed"
+  type        = bool
+  default     = true
+}
+
+variable "enable_capacity_check" {
+  description = "Fail the build before Terraform runs when a target would have more than 5 SCPs or 5 RCPs attached, counting the live attachments the pipeline does not manage"
+  type        = bool
+  default     = true
+}
+
 variable "tags" {
   description = "Tags for resources"
   default = {